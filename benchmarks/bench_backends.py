@@ -0,0 +1,46 @@
+""" Compares nfa simulation on Thompson and Glushkov nfas for the same
+patterns and inputs.
+
+$ python3 benchmarks/bench_backends.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mini_regex.dfa_sim import NFAEngine  # noqa: E402
+from mini_regex.parser import RegexParser  # noqa: E402
+from mini_regex.tokenizer import Tokenizer  # noqa: E402
+
+
+CASES = [
+    ("[a-zA-Z0-9.]+@gmail\\.com",
+     "name: john doe, email: johndoe@gmail.com, age: 21 " * 20),
+    ("(a|b)*abb", "abababbbabbaabbabab" * 20),
+    ("x(a|bc|d)*y", "xabcdabcdy xaay xbcbcbcbc " * 20),
+    ("(foo|bar|baz)+[0-9]?", "foobarbaz1 foofoo barbaz9 " * 20),
+]
+
+
+def search_all(engine, text):
+    return [engine.match(text, i) for i in range(len(text))]
+
+
+def main():
+    print("%-28s %10s %10s" % ("pattern", "thompson", "glushkov"))
+    for pattern, text in CASES:
+        times = []
+        results = []
+        for backend in ('thompson', 'glushkov'):
+            nfa = RegexParser(Tokenizer(pattern)).construct_nfa(backend)
+            engine = NFAEngine(nfa)
+            results.append(search_all(engine, text))
+            times.append(min(timeit.repeat(
+                lambda: search_all(engine, text), number=1, repeat=3)))
+        assert results[0] == results[1], pattern
+        print("%-28s %9.3fs %9.3fs" % (pattern, times[0], times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+""" Compares the generated dfa code (see codegen.py) with the table driven
+lazy dfa, searching for every match of the same patterns in the same texts.
+
+$ python3 benchmarks/bench_codegen.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mini_regex.regex import MiniRegex  # noqa: E402
+from mini_regex.bytes_regex import BytesRegex  # noqa: E402
+
+
+def random_text(chars, length, seed=0):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(chars) for _ in range(length))
+
+
+WORDS = random_text("abcdefghijklmnopqrstuvwxyz    ", 200000)
+LOG = random_text("abcdefgh xyz0123\n", 200000)
+
+CASES = [
+    ("[a-z]+ing", WORDS),
+    ("[a-h]+ [0-9]+", LOG),
+    ("(foo|bar)[0-9]", LOG),
+    ("\\b[a-z]+s\\b", WORDS),
+    ("[a-z]+ (cat|dog)s?", WORDS),
+]
+
+
+def spans(regex, text):
+    return [match.get_span() for match in regex.find_all_matches(text)]
+
+
+def best_time(regex, text):
+    regex.count(text)  # warms up the caches of the lazy dfa
+    return min(timeit.repeat(lambda: regex.count(text), number=1, repeat=3))
+
+
+def main():
+    print("%-24s %-6s %10s %10s" % ("pattern", "text", "lazy_dfa",
+                                    "codegen"))
+    for pattern, text in CASES:
+        for cls, data in ((MiniRegex, text), (BytesRegex, text.encode())):
+            lazy = cls(pattern, engine='lazy_dfa')
+            generated = cls(pattern, engine='codegen')
+            assert spans(lazy, data) == spans(generated, data), pattern
+            kind = 'bytes' if cls is BytesRegex else 'str'
+            print("%-24s %-6s %9.3fs %9.3fs" % (pattern, kind,
+                                                best_time(lazy, data),
+                                                best_time(generated, data)))
+
+
+if __name__ == '__main__':
+    main()
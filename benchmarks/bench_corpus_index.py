@@ -0,0 +1,67 @@
+""" Times building a trigram index over generated documents, adding more
+documents to it, and searching it, against scanning every document.
+
+$ python3 benchmarks/bench_corpus_index.py [documents] [words per document]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mini_regex.corpus_index import CorpusIndex  # noqa: E402
+from mini_regex.regex import MiniRegex  # noqa: E402
+
+
+PATTERNS = ["disk full", "user=(ann|bob) failed", "tim[a-z]+ out",
+            "[0-9]+ms", "quota exceeded"]
+WORDS = ["request", "served", "user=ann", "user=bob", "user=eve", "failed",
+         "ok", "disk", "full", "timed", "out", "retry", "cache", "miss",
+         "12ms", "cold", "start"]
+
+
+def make_documents(first, count, words, rng):
+    return [("doc%d" % i, " ".join(rng.choice(WORDS) for _ in range(words)))
+            for i in range(first, first + count)]
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rng = random.Random(0)
+    documents = make_documents(0, count, words, rng)
+    extra = make_documents(count, count // 10, words, rng)
+    texts = dict(documents)
+    with tempfile.TemporaryDirectory() as root:
+        index = CorpusIndex(root)
+        _, build = timed(lambda: index.add(documents))
+        print("build: %d documents in %.2fs" % (count, build))
+        _, add = timed(lambda: index.add(extra))
+        print("add: %d documents in %.2fs" % (len(extra), add))
+        texts.update(extra)
+        print("%-24s %10s %10s %10s" % ("pattern", "candidates", "index",
+                                        "scan all"))
+        for pattern in PATTERNS:
+            regex = MiniRegex(pattern)
+            found, indexed = timed(
+                lambda: [name for name, _ in
+                         index.search(regex, texts.__getitem__)])
+            expected, scanned = timed(
+                lambda: [name for name, text in texts.items()
+                         if regex.find_all_matches(text)])
+            assert sorted(found) == sorted(expected)
+            print("%-24s %10d %9.3fs %9.3fs" % (
+                pattern, len(index.candidates(regex)), indexed, scanned))
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+""" End to end throughput of the grep entry point, with a single process and
+with a process pool, over generated log files.
+
+$ python3 benchmarks/bench_grep.py [number of files] [lines per file]
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mini_regex.grep import main  # noqa: E402
+
+
+PATTERNS = ["ERROR", "user=[a-z]+[0-9]+", "took [0-9]+ms$"]
+LEVELS = ["INFO", "INFO", "INFO", "WARN", "ERROR"]
+
+
+def write_logs(root, files, lines):
+    rng = random.Random(0)
+    size = 0
+    for i in range(files):
+        rows = ["2024-01-01 12:00:%02d %s user=%s%d request took %dms" % (
+            j % 60, rng.choice(LEVELS), rng.choice(["ann", "bob", "eve"]),
+            rng.randint(0, 99), rng.randint(1, 999)) for j in range(lines)]
+        text = "\n".join(rows) + "\n"
+        size += len(text)
+        with open(os.path.join(root, "log%03d.txt" % i), 'w') as f:
+            f.write(text)
+    return size
+
+
+def main_bench():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    with tempfile.TemporaryDirectory() as root:
+        size = write_logs(root, files, lines)
+        print("%d files, %.1f MB" % (files, size / 1e6))
+        print("%-22s %12s %12s" % ("pattern", "1 process",
+                                   str(os.cpu_count()) + " processes"))
+        for pattern in PATTERNS:
+            times = []
+            outputs = []
+            for jobs in (1, os.cpu_count()):
+                out = io.StringIO()
+                start = time.perf_counter()
+                main(["-c", "-j", str(jobs), pattern, root], out)
+                times.append(time.perf_counter() - start)
+                outputs.append(out.getvalue())
+            assert outputs[0] == outputs[1], pattern
+            print("%-22s %7.2f MB/s %7.2f MB/s" % (
+                pattern, size / 1e6 / times[0], size / 1e6 / times[1]))
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -0,0 +1,5 @@
+import sys
+
+from mini_regex.grep import main
+
+sys.exit(main())
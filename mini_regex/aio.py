@@ -0,0 +1,68 @@
+import asyncio
+import codecs
+
+from mini_regex.scanner import ThreadScanner
+
+""" Searching asyncio streams without buffering the whole input
+
+    async for match in regex.afinditer(stream_reader):
+        print(match.get_span(), match.get_value())
+
+Chunks are scanned as they arrive by a ThreadScanner, which keeps the state
+of the automata between chunks. Control is handed back to the event loop
+after every chunk, and chunks of at least offload_size chars can be scanned
+in an executor so a single big chunk doesn't stall other connections.
+"""
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_chunks(stream, chunk_size):
+    """ Supports asyncio.StreamReader (anything with an async read(n)) and
+    async iterables
+    """
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in stream:
+            yield chunk
+
+
+async def afinditer(regex, stream, encoding='utf-8',
+                    chunk_size=DEFAULT_CHUNK_SIZE,
+                    offload_size=None, executor=None):
+    """ Yields the same matches as regex.find_all_matches would for the
+    whole stream, with spans relative to the start of the stream.
+    bytes chunks are decoded with encoding (a multi-byte char may be split
+    across chunks). offload_size=None never uses the executor, and
+    executor=None uses the event loop's default executor
+    """
+    loop = asyncio.get_running_loop()
+    scanner = ThreadScanner(regex._nfa, regex._greedy, regex._captures)
+    decoder = None
+
+    async for chunk in iter_chunks(stream, chunk_size):
+        if isinstance(chunk, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+
+        if offload_size is not None and len(chunk) >= offload_size:
+            matches = await loop.run_in_executor(executor, scanner.feed,
+                                                 chunk)
+        else:
+            matches = scanner.feed(chunk)
+        for match in matches:
+            yield match
+        # let other tasks run between chunks
+        await asyncio.sleep(0)
+
+    if decoder is not None:
+        for match in scanner.feed(decoder.decode(b'', final=True)):
+            yield match
+    for match in scanner.finish():
+        yield match
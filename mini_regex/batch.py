@@ -0,0 +1,165 @@
+from mini_regex.dfa import build_search_dfa
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, see match_column_py
+    np = None
+
+""" Matching a whole column of strings at once
+
+match_column(regex, column) returns a boolean mask where mask[i] tells if
+column[i] contains a match, the same as
+bool(regex.find_all_matches(column[i])).
+
+With numpy installed, the column is laid out as one contiguous buffer of code
+points plus an offsets array (string i is buffer[offsets[i]:offsets[i + 1]]).
+A dfa is built over the chars that appear in the column, and the state of
+every string is advanced in lockstep, one char position at a time, with
+vectorized gathers into the dfa's transition table. Without numpy, each
+string walks the same dfa in a plain python loop.
+
+The dfa is kept on the regex (see ColumnTable), and only built again when a
+column holds chars it wasn't built over, so matching many columns of the
+same kind of data builds it once.
+"""
+
+
+def column_to_buffer(column):
+    """ Packs a list of strings into (code point buffer, offsets) arrays """
+    lengths = np.fromiter((len(string) for string in column), dtype=np.int64,
+                          count=len(column))
+    offsets = np.zeros(len(column) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    encoded = ''.join(column).encode('utf-32-le')
+    buffer = np.frombuffer(encoded, dtype=np.uint32)
+    return buffer, offsets
+
+
+class ColumnTable:
+    """ The search dfa of a pattern over a set of chars, and its tables as
+    numpy arrays, built on first use
+    """
+    def __init__(self, nfa, chars):
+        self.chars = frozenset(chars)
+        self.dfa = build_search_dfa(nfa, sorted(self.chars))
+        self._arrays = None
+
+    def arrays(self):
+        """ (class_of indexed by code point, transitions, accept_before,
+        accept_end) numpy arrays
+        """
+        if self._arrays is None:
+            dfa = self.dfa
+            top = max((ord(char) for char in self.chars), default=0)
+            class_of = np.zeros(top + 1, dtype=np.int32)
+            for char in self.chars:
+                class_of[ord(char)] = dfa.class_of[char]
+            self._arrays = (class_of,
+                            np.array(dfa.transitions, dtype=np.int32),
+                            np.array(dfa.accept_before, dtype=bool),
+                            np.array(dfa.accept_end, dtype=bool))
+        return self._arrays
+
+
+def column_table(regex, chars):
+    """ The ColumnTable of regex covering chars. The one kept on the regex
+    is reused when it covers them, otherwise it is replaced by one over the
+    chars of both, so the alphabet only grows
+    """
+    table = regex._column_table
+    if table is None or not table.chars.issuperset(chars):
+        if table is not None:
+            chars = table.chars.union(chars)
+        table = ColumnTable(regex._nfa, chars)
+        regex._column_table = table
+    return table
+
+
+def match_buffer(regex, buffer, offsets):
+    """ buffer: uint32 code points, offsets: int64 array of len(strings) + 1
+    """
+    count = len(offsets) - 1
+    if count <= 0:
+        return np.zeros(0, dtype=bool)
+    if len(buffer) == 0:
+        return np.zeros(count, dtype=bool)
+
+    # Replace every char of the buffer by its char class with a lookup table
+    # indexed by code point (no sorting needed)
+    present = np.zeros(int(buffer.max()) + 1, dtype=bool)
+    present[buffer] = True
+    code_points = np.flatnonzero(present).tolist()
+    dfa_table = column_table(regex, [chr(cp) for cp in code_points])
+    class_of, table, accept_before, accept_end = dfa_table.arrays()
+    classes = class_of[buffer]
+    start = dfa_table.dfa.start
+
+    # Longest strings first, so the strings still running at char position j
+    # are always a prefix of the order
+    lengths = offsets[1:] - offsets[:-1]
+    order = np.argsort(-lengths, kind='stable')
+    starts = offsets[:-1][order]
+    descending = -lengths[order]
+
+    states = np.full(count, start, dtype=np.int32)
+    matched = np.zeros(count, dtype=bool)
+    for j in range(int(lengths.max())):
+        # number of strings longer than j
+        active = int(np.searchsorted(descending, -j, side='left'))
+        current = states[:active]
+        current_classes = classes[starts[:active] + j]
+        matched[:active] |= accept_before[current, current_classes]
+        states[:active] = table[current, current_classes]
+    matched |= accept_end[states]
+
+    result = np.empty(count, dtype=bool)
+    result[order] = matched
+    return result
+
+
+def match_column_py(regex, column):
+    """ The pure python fallback of match_buffer """
+    chars = set()
+    for string in column:
+        chars.update(string)
+    dfa = column_table(regex, chars).dfa
+    transitions = dfa.transitions
+    accept_before = dfa.accept_before
+    class_of = dfa.class_of
+    result = []
+    for string in column:
+        state = dfa.start
+        found = False
+        for char in string:
+            char_class = class_of[char]
+            if accept_before[state][char_class]:
+                found = True
+                break
+            state = transitions[state][char_class]
+        else:
+            found = dfa.accept_end[state]
+        result.append(found)
+    return result
+
+
+def match_column(regex, column, offsets=None, use_numpy=None):
+    """ column is a list of strings, or a uint32 code point buffer when
+    offsets is given. Returns a numpy bool array when numpy is used, and a
+    list of bools otherwise. use_numpy defaults to whether numpy is installed
+    """
+    if isinstance(regex.newline, bytes):
+        raise Exception("match_column matches columns of str, use a "
+                        "MiniRegex")
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    if offsets is not None:
+        if np is None:
+            raise Exception("buffer and offsets input requires numpy")
+        buffer = np.asarray(column).astype(np.uint32, copy=False)
+        return match_buffer(regex, buffer, np.asarray(offsets, dtype=np.int64))
+    if use_numpy:
+        if np is None:
+            raise Exception("numpy is not installed")
+        return match_buffer(regex, *column_to_buffer(column))
+    return match_column_py(regex, column)
@@ -0,0 +1,110 @@
+from mini_regex.glushkov import Positions
+
+""" Bit-parallel simulation of a position (Glushkov) automaton
+
+The set of active positions is a single python int, so advancing every active
+state at once takes a handful of and/or/shift operations per char instead of
+building lists of NFAIterators:
+
+    next_state = follow(state) & char_mask[char]
+
+char_mask[char] has a bit set for every position whose transition accepts
+char. follow(state) is the union of the follow sets of all active positions.
+It is read out of precomputed tables, one per 8 positions, where
+table[k][byte] is the union of follow sets for the positions 8k..8k+7 that are
+set in byte.
+"""
+
+# Patterns with more positions than this are better served by other engines
+MAX_POSITIONS = 256
+
+CHUNK_BITS = 8
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def build_follow_tables(follow):
+    tables = []
+    for base in range(0, len(follow), CHUNK_BITS):
+        chunk = follow[base:base + CHUNK_BITS]
+        table = [0] * (1 << CHUNK_BITS)
+        for byte in range(1, 1 << CHUNK_BITS):
+            low = byte & -byte
+            pos = low.bit_length() - 1
+            rest = table[byte ^ low]
+            table[byte] = rest | chunk[pos] if pos < len(chunk) else rest
+        tables.append(table)
+    return tables
+
+
+class BitParallelEngine:
+    def __init__(self, node, greedy=True):
+        positions = Positions(node)
+        self.greedy = greedy
+        self.size = len(positions)
+        self._transitions = positions.transitions
+        self._first = positions.first
+        self._last = positions.last
+        self._tables = build_follow_tables(positions.follow)
+        # char -> mask of positions accepting the char, filled in on demand
+        self._char_masks = {}
+
+    def char_mask(self, char):
+        mask = self._char_masks.get(char)
+        if mask is None:
+            mask = 0
+            for pos, transition in enumerate(self._transitions):
+                if transition.is_available(char):
+                    mask |= 1 << pos
+            # racing threads compute the same mask, so either one can win
+            mask = self._char_masks.setdefault(char, mask)
+        return mask
+
+    def follow(self, state):
+        result = 0
+        tables = self._tables
+        k = 0
+        while state:
+            result |= tables[k][state & CHUNK_MASK]
+            state >>= CHUNK_BITS
+            k += 1
+        return result
+
+    def match(self, text, pos=0, endpos=None):
+        """ Returns the end (exclusive) of the non-empty match starting at pos
+        or None. The longest match is returned when greedy, otherwise the
+        shortest
+        """
+        if endpos is None:
+            endpos = len(text)
+        if pos >= endpos:
+            return None
+
+        masks = self._char_masks
+        tables = self._tables
+        last = self._last
+        greedy = self.greedy
+
+        state = self._first & self.char_mask(text[pos])
+        result = None
+        i = pos + 1
+        while state:
+            if state & last:
+                if not greedy:
+                    return i
+                result = i
+            if i == endpos:
+                break
+            char = text[i]
+            mask = masks.get(char)
+            if mask is None:
+                mask = self.char_mask(char)
+            # inlined self.follow(state)
+            follow = 0
+            k = 0
+            while state:
+                follow |= tables[k][state & CHUNK_MASK]
+                state >>= CHUNK_BITS
+                k += 1
+            state = follow & mask
+            i += 1
+        return result
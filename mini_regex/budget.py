@@ -0,0 +1,78 @@
+import sys
+import time
+
+""" Bounding the latency of searches
+
+    regex.find_all_matches(text, max_steps=10000, timeout=0.01)
+
+A step is one char read by a match attempt, so the work between two checks
+is bounded whatever the size of the text or of the matches. Budgeted
+attempts run on the lazy dfa of the pattern (see LazyDFAEngine.match_budget)
+whatever engine was planned, as it has a single loop over the chars to
+charge. Engines that run in C, like str.find for literals, are given the
+text a window of steps at a time.
+The step count is a plain int compare, and the clock is only read every
+CLOCK_INTERVAL steps, so a budget costs little. Searches without a budget
+don't check anything at all.
+"""
+
+# The clock is read once every this many steps
+CLOCK_INTERVAL = 1024
+
+
+class BudgetExceeded(Exception):
+    """ Raised when a search runs out of steps or time, or when a compiled
+    automaton grows past its size budget. pos is the offset that the search
+    had reached, and partial holds what it had found so far
+    """
+    def __init__(self, message, pos=None, partial=None):
+        Exception.__init__(self, message)
+        self.pos = pos
+        self.partial = partial
+
+
+class Budget:
+    def __init__(self, max_steps=None, timeout=None):
+        """ timeout is in seconds, counted from now """
+        self.max_steps = max_steps
+        self.deadline = None
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+        self.steps = 0
+        self.next_check = 0  # the step count at which to check again
+        self._schedule()
+
+    def _schedule(self):
+        checks = []
+        if self.max_steps is not None:
+            checks.append(self.max_steps + 1)
+        if self.deadline is not None:
+            checks.append(self.steps + CLOCK_INTERVAL)
+        self.next_check = min(checks) if checks else sys.maxsize
+
+    def charge(self, pos, steps=1):
+        """ Counts steps taken up to pos, raises BudgetExceeded when over
+        budget
+        """
+        self.steps += steps
+        if self.steps >= self.next_check:
+            self.check(pos)
+
+    def window(self):
+        """ The number of steps left before the next check """
+        return max(self.next_check - self.steps, 1)
+
+    def check(self, pos):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded("search exceeds " + str(self.max_steps) +
+                                 " steps", pos)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("search timed out", pos)
+        self._schedule()
+
+
+def make_budget(max_steps=None, timeout=None):
+    """ A Budget, or None when there is nothing to bound """
+    if max_steps is None and timeout is None:
+        return None
+    return Budget(max_steps, timeout)
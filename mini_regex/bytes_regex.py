@@ -0,0 +1,49 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.parser import IDAllocator
+from mini_regex.utf8 import to_utf8_nfa
+
+""" Searching utf-8 encoded bytes without decoding them
+
+    regex = BytesRegex("[À-ÿ]+")
+    regex.find_all_matches("Voilà, déjà".encode('utf-8'))
+
+The pattern is compiled into an automata over bytes (see utf8.py), so a
+match of a multi-byte char is just a few byte steps, and spans are byte
+offsets into the original data. As in python's bytes patterns, \\b only
+treats ascii letters, digits and '_' as word chars.
+"""
+
+
+class BytesRegex(MiniRegex):
+    newline = b'\n'
+    # the bit-parallel engine works on chars, the others on whatever the
+    # nfa's transitions accept
+    engines = ('literal', 'lazy_dfa', 'nfa', 'codegen')
+
+    def __init__(self, pattern, greedy=True, multiline=False,
+                 ignore_case=False, engine=None, max_nfa_states=None,
+                 max_dfa_states=None, cache_bytes=None):
+        """ pattern is a str, or bytes holding utf-8 """
+        if isinstance(pattern, bytes):
+            pattern = pattern.decode('utf-8')
+        MiniRegex.__init__(self, pattern, greedy, multiline=multiline,
+                           ignore_case=ignore_case, engine=engine,
+                           max_nfa_states=max_nfa_states,
+                           max_dfa_states=max_dfa_states,
+                           cache_bytes=cache_bytes)
+
+    def _build_nfa(self, ast):
+        return to_utf8_nfa(ast, IDAllocator())
+
+    def _build_reverse_nfa(self, reversed_ast):
+        return to_utf8_nfa(reversed_ast, IDAllocator(), reverse=True)
+
+    def _required_literal(self, ast):
+        literal = MiniRegex._required_literal(self, ast)
+        return literal.encode('utf-8') if literal is not None else None
+
+    def _captures(self, text, start, end):
+        raise Exception("capture groups are not supported on bytes")
+
+    def afinditer(self, stream, **kwargs):
+        raise Exception("afinditer decodes its input, use a MiniRegex")
@@ -0,0 +1,345 @@
+from mini_regex.dfa import (
+    build_match_dfa,
+    cost_transitions,
+    has_assertions,
+    MAX_DFA_STATES,
+)
+from mini_regex.lazy_dfa import LazyDFAEngine
+from mini_regex.budget import BudgetExceeded
+from mini_regex.planner import sample_chars
+from mini_regex.transitions import char_kind, EDGE
+
+""" Compiling a dfa into python source
+
+    regex = MiniRegex("[a-z]+ing", engine='codegen')
+
+The whole dfa is built ahead of time, over the latin-1 chars and the chars
+of the pattern (over the 256 bytes for a BytesRegex), and the text is turned
+into char classes with a single str.translate / bytes.translate, in C.
+Generated source then walks a flat table, where table[row + class] is
+(row of the next state << 2) | (2 when the next state loops on itself) |
+(1 when the current state holds a match ending before the char).
+
+Both match and search (the loop over the start positions, with the body of
+match inlined) are generated, specialized for the pattern: greedy or not,
+with or without assertions, whether its text can hold chars the dfa hasn't
+seen. Two more tricks are only possible with the whole dfa known up front:
+  - starts: bytes.find skips, in C, over the positions whose char can't
+    start a match
+  - runs: in a state that loops on most chars, like the one after
+    '[a-z]+', bytes.find jumps straight to the first char leaving it
+
+A str char whose class isn't known is classified on the fly, by the
+transitions it is accepted by. When no class of the dfa has the same
+transitions, the attempt is run again by a LazyDFAEngine.
+
+The text is translated a chunk at a time, by each call: a chunk grows when
+an attempt runs past its end, and a search moves on to the next one when it
+finds nothing in it, so a match near the start of a large text only costs a
+small chunk, and nothing of the text is kept once the call returns.
+
+The source of each specialization is compiled once, and cached in SOURCES.
+"""
+
+# Classes are bytes, and one more is the fallback class, for the chars that
+# the dfa can't handle
+MAX_CLASSES = 255
+# A state loops on itself for at least this many classes to skip its runs
+MIN_RUN_CLASSES = 2
+
+# The chars translated by the first chunk of a match, and of a search. A
+# chunk grows 4 times when it is too small, up to MAX_CHUNK when it held no
+# match, and as much as a match needs
+FIRST_MATCH_CHUNK = 256
+FIRST_SEARCH_CHUNK = 4096
+MAX_CHUNK = 1 << 16
+# The end returned for an attempt that runs past the end of its chunk
+UNDECIDED = -1
+
+# source -> compiled code object
+SOURCES = {}
+
+# The generated functions work on the classes of the chunk of text starting
+# at base. pos and endpos are relative to the chunk, limit is the real end of
+# the search in text
+TEMPLATE = '''
+def make(table, starts, accept_end, fallback, kinds):
+    def match(text, classes, stops, base, pos, endpos, limit):
+        if pos >= endpos:
+            return None
+{match_body}
+        return result
+
+    def search(text, classes, stops, base, pos, endpos, limit):
+        find = stops['live'].find
+        first = find(1, pos, endpos)
+        while first != -1:
+            pos = first
+{search_body}
+            if result is not None:
+                return (first, result)
+            first = find(1, first + 1, endpos)
+        return None
+
+    return match, search
+'''
+
+
+def indent(lines, depth):
+    return "\n".join("    " * depth + line for line in lines)
+
+
+def generate(greedy, kinds, fallback, runs):
+    """ The source of a make(...) function returning specialized match and
+    search functions. The body of an attempt from pos has a single exit, with
+    its end in result, so that search can inline it
+    """
+    if kinds:
+        start = ("starts[kinds(text[base + pos - 1]) if base + pos > 0 "
+                 "else EDGE]")
+    else:
+        start = "starts[EDGE]"
+    body = ["row = " + start,
+            "result = None",
+            "cell = table[row + classes[pos]]",
+            "row = cell >> 2",
+            "if row > 0:",
+            "    i = pos + 1",
+            "    while i < endpos:"]
+    if runs:
+        # cell & 2: the state just entered loops on itself, so jump to the
+        # first char leaving it. The accept bit is the same all along the run
+        # (there are no assertions), so only its last char needs a step
+        body += ["        if cell & 2:",
+                 "            j = stops[row].find(1, i, endpos)",
+                 "            if j < 0:",
+                 "                i = endpos",
+                 "                continue",
+                 "            i = j"]
+    body += ["        cell = table[row + classes[i]]",
+             "        if cell & 1:",
+             "            result = i"]
+    if not greedy:
+        body += ["            break"]
+    body += ["        row = cell >> 2",
+             "        if row <= 0:",
+             "            break",
+             "        i += 1",
+             "    else:",
+             "        if base + endpos < limit:",
+             "            result = UNDECIDED",
+             "        elif endpos < len(classes):",
+             "            cell = table[row + classes[endpos]]"]
+    if fallback:
+        # a char the dfa can't handle, the whole attempt is run again
+        body += ["            if cell < 0:",
+                 "                row = -1",
+                 "            elif cell & 1:",
+                 "                result = endpos"]
+    else:
+        body += ["            if cell & 1:",
+                 "                result = endpos"]
+    body += ["        elif accept_end[row]:",
+             "            result = endpos"]
+    if fallback:
+        body += ["if row < 0:",
+                 "    result = fallback(text, base + pos, limit)",
+                 "    if result is not None:",
+                 "        result -= base"]
+    return TEMPLATE.format(match_body=indent(body, 2),
+                           search_body=indent(body, 3))
+
+
+def compile_source(source):
+    code = SOURCES.get(source)
+    if code is None:
+        code = compile(source, "<mini_regex codegen>", "exec")
+        code = SOURCES.setdefault(source, code)
+    namespace = {'EDGE': EDGE, 'UNDECIDED': UNDECIDED}
+    exec(code, namespace)
+    return namespace['make']
+
+
+class ClassMap(dict):
+    """ The str.translate table of a dfa: code point -> class. Chars that
+    weren't in the dfa's alphabet are classified by the transitions that
+    accept them, or else mapped to the fallback class
+    """
+    def __init__(self, transitions, kinds, signatures, fallback):
+        dict.__init__(self)
+        self.transitions = transitions
+        self.kinds = kinds
+        self.signatures = signatures  # signature -> class
+        self.fallback = fallback
+
+    def signature(self, char):
+        signature = tuple(t.is_available(char) for t in self.transitions)
+        if self.kinds:
+            signature += (char_kind(char),)
+        return signature
+
+    def __missing__(self, code):
+        char_class = self.signatures.get(self.signature(chr(code)),
+                                         self.fallback)
+        self[code] = char_class
+        return char_class
+
+
+class Translations(dict):
+    """ The classes of a text translated through each of the masks of a
+    CodegenEngine, on demand
+    """
+    def __init__(self, classes, masks):
+        dict.__init__(self)
+        self.classes = classes
+        self.masks = masks
+
+    def __missing__(self, key):
+        translated = self.classes.translate(self.masks[key])
+        self[key] = translated
+        return translated
+
+
+class CodegenEngine:
+    """ Runs the generated match of a dfa. Like the other engines, match
+    returns the end of the match starting at pos, or None
+    """
+    def __init__(self, nfa, ast, greedy=True, binary=False,
+                 max_states=MAX_DFA_STATES):
+        self.binary = binary
+        kinds = has_assertions(nfa)
+        if binary:
+            alphabet = list(range(256))
+        else:
+            alphabet = [chr(code) for code in range(256)]
+            alphabet.extend(sorted(sample_chars(ast) - set(alphabet)))
+        dfa = build_match_dfa(nfa, alphabet, max_states)
+        classes = len(dfa.transitions[0])
+        if classes > MAX_CLASSES:
+            raise BudgetExceeded("too many char classes to generate code: " +
+                                 str(classes))
+        # a row per state, with the fallback class in the last column
+        columns = classes + 1
+
+        if binary:
+            self.translation = bytes(dfa.class_of[byte] for byte in range(256))
+        else:
+            self.translation = ClassMap(cost_transitions(nfa), kinds, {},
+                                        classes)
+            for char in alphabet:
+                char_class = dfa.class_of[char]
+                signature = self.translation.signature(char)
+                self.translation.signatures[signature] = char_class
+                self.translation[ord(char)] = char_class
+
+        # translation tables of the classes to 1 where bytes.find stops:
+        # the chars that may start a match, and those leaving each run state
+        live = bytearray(256)
+        for start in set(dfa.starts):
+            for char_class in range(classes):
+                if dfa.transitions[start][char_class]:
+                    live[char_class] = 1
+        live[classes] = 1
+        self.masks = {'live': bytes(live)}
+        runs = not kinds
+        for state in range(1, len(dfa.transitions)):
+            row = dfa.transitions[state]
+            loops = [nxt == state for nxt in row]
+            # when not greedy, an accepting state ends the match at once
+            if runs and sum(loops) >= MIN_RUN_CLASSES and (
+                    greedy or not dfa.accept_end[state]):
+                self.masks[state * columns] = bytes(
+                    0 if char_class < classes and loops[char_class] else 1
+                    for char_class in range(256))
+
+        table = []
+        accept_end = []
+        for state, row in enumerate(dfa.transitions):
+            for char_class, nxt in enumerate(row):
+                nxt *= columns
+                table.append((nxt << 2) | (2 if nxt in self.masks else 0) |
+                             int(dfa.accept_before[state][char_class]))
+            table.append(-4)  # the fallback class
+            accept_end.extend([dfa.accept_end[state]] * columns)
+        starts = [start * columns for start in dfa.starts]
+
+        fallback = None
+        if not binary:
+            fallback = LazyDFAEngine(nfa, greedy).match
+        self.source = generate(greedy, kinds, fallback is not None, runs)
+        make = compile_source(self.source)
+        self._match, self._search = make(tuple(table), starts, accept_end,
+                                         fallback, char_kind)
+
+    def classify(self, text, pos, endpos):
+        """ (the classes of text[pos:endpos] and of the char after it, as
+        bytes, and their Translations)
+        """
+        end = min(len(text), endpos + 1)
+        if self.binary:
+            data = text[pos:end]
+            if not isinstance(data, (bytes, bytearray)):
+                data = bytes(data)
+            classes = data.translate(self.translation)
+        else:
+            classes = text[pos:end].translate(self.translation).encode(
+                'latin-1')
+        return classes, Translations(classes, self.masks)
+
+    def match(self, text, pos=0, endpos=None):
+        """ The end of the match starting at pos, or None """
+        if endpos is None:
+            endpos = len(text)
+        size = FIRST_MATCH_CHUNK
+        while True:
+            end = min(endpos, pos + size)
+            classes, stops = self.classify(text, pos, end)
+            result = self._match(text, classes, stops, pos, 0, end - pos,
+                                 endpos)
+            if result != UNDECIDED:
+                return None if result is None else pos + result
+            size *= 4
+
+    def search(self, text, pos=0, endpos=None):
+        """ (start, end) of the leftmost match from pos, or None """
+        return next(self.spans(text, pos, endpos), None)
+
+    def spans(self, text, pos=0, endpos=None):
+        """ Yields the (start, end) of the leftmost, non-overlapping matches
+        in text[pos:endpos], translating it a chunk at a time
+        """
+        if endpos is None:
+            endpos = len(text)
+        size = FIRST_SEARCH_CHUNK
+        base = end = pos  # the chunk translated, text[base:end]
+        while pos < endpos:
+            if pos >= end:
+                base = pos
+                end = min(endpos, base + size)
+                classes, stops = self.classify(text, base, end)
+            found = self._search(text, classes, stops, base, pos - base,
+                                 end - base, endpos)
+            if found is None:
+                # nothing starts in this chunk
+                pos = end
+                size = min(size * 4, MAX_CHUNK)
+            elif found[1] == UNDECIDED:
+                # a match starting at found[0] may run past the chunk, which
+                # starts again there, larger
+                pos = end = base + found[0]
+                size *= 4
+            else:
+                yield base + found[0], base + found[1]
+                pos = base + found[1]
+
+    def starts(self, text, pos, endpos):
+        """ Yields the positions from pos up to endpos whose char may start a
+        match
+        """
+        for base in range(pos, endpos, MAX_CHUNK):
+            end = min(endpos, base + MAX_CHUNK)
+            find = self.classify(text, base, end)[1]['live'].find
+            i = find(1, 0, end - base)
+            while i != -1:
+                yield base + i
+                i = find(1, i + 1, end - base)
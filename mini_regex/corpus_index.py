@@ -0,0 +1,242 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from mini_regex.trigrams import trigram_query, trigrams
+
+""" An on-disk trigram index over a collection of documents
+
+    index = CorpusIndex("logs.idx")
+    index.add(paths)  # or (name, text) pairs
+    for name, matches in index.search(MiniRegex("user=[a-z]+ failed")):
+        ...
+
+The index is a directory holding the names of the documents (names.jsonl,
+a document's id is its line number) and one or more segment files. Every
+call to add writes a new segment for the new documents only, so documents
+can be added without touching the ones already indexed; merge() rewrites
+all the segments into one.
+
+A segment maps every trigram (3 utf-8 bytes) to the sorted ids of the
+documents holding it:
+
+    header      magic, number of trigrams
+    keys        the trigrams as sorted 24-bit ints, uint32
+    offsets     where the ids of each trigram start in ids, uint32
+    ids         the document ids, uint32
+
+Segments are memory mapped and only the postings of the trigrams of a query
+are read. A search turns the pattern into a trigram query (see trigrams.py),
+and only runs the pattern over the documents that satisfy it.
+"""
+
+MAGIC = b'MRTRIGR1'
+HEADER = struct.Struct('<8sI')
+NAMES = 'names.jsonl'
+
+
+def trigram_key(trigram):
+    return (trigram[0] << 16) | (trigram[1] << 8) | trigram[2]
+
+
+def read_array(data, start, count):
+    values = array('I')
+    values.frombytes(data[start:start + 4 * count])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_array(f, values):
+    values = array('I', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    f.write(values.tobytes())
+
+
+def write_segment(path, postings):
+    """ postings maps trigram keys to lists of sorted document ids. The
+    segment is written to a temporary file first, so readers never see a
+    half written segment
+    """
+    keys = sorted(postings)
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(postings[key]))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        write_array(f, keys)
+        write_array(f, offsets)
+        for key in keys:
+            write_array(f, postings[key])
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise Exception("not an index segment: " + path)
+        self.keys = read_array(self.data, HEADER.size, count)
+        self.offsets = read_array(self.data, HEADER.size + 4 * count,
+                                  count + 1)
+        self.ids_start = HEADER.size + 4 * (2 * count + 1)
+
+    def postings(self, key):
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return array('I')
+        start = self.ids_start + 4 * self.offsets[i]
+        return read_array(self.data, start,
+                          self.offsets[i + 1] - self.offsets[i])
+
+    def close(self):
+        self.data.close()
+
+
+def read_document(name, binary):
+    if binary:
+        with open(name, 'rb') as f:
+            return f.read()
+    with open(name, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+class CorpusIndex:
+    def __init__(self, path):
+        """ Opens the index in the directory at path, creating it if needed
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.names = []
+        names_path = os.path.join(path, NAMES)
+        if os.path.exists(names_path):
+            with open(names_path, encoding='utf-8') as f:
+                self.names = [json.loads(line) for line in f]
+        self.segments = [Segment(os.path.join(path, name))
+                         for name in sorted(os.listdir(path))
+                         if name.endswith('.seg')]
+
+    def __len__(self):
+        return len(self.names)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def add(self, documents):
+        """ Indexes documents: paths of utf-8 files, or (name, text) pairs.
+        Returns the number of documents added
+        """
+        first = len(self.names)
+        names = []
+        postings = {}
+        for document in documents:
+            if isinstance(document, tuple):
+                name, text = document
+            else:
+                name, text = document, read_document(document, True)
+            data = text.encode('utf-8') if isinstance(text, str) else text
+            doc_id = first + len(names)
+            names.append(name)
+            for trigram in trigrams(data):
+                postings.setdefault(trigram_key(trigram), []).append(doc_id)
+        if not names:
+            return 0
+        self._write(postings, "%010d.seg" % first)
+        # names go last: ids without a name are ignored by searches
+        with open(os.path.join(self.path, NAMES), 'a',
+                  encoding='utf-8') as f:
+            for name in names:
+                f.write(json.dumps(name) + "\n")
+        self.names.extend(names)
+        return len(names)
+
+    def _write(self, postings, name):
+        path = os.path.join(self.path, name)
+        write_segment(path, postings)
+        self.segments.append(Segment(path))
+
+    def merge(self):
+        """ Rewrites every segment into the first one. If interrupted, some
+        ids are found in two segments, which searches don't mind
+        """
+        if len(self.segments) < 2:
+            return
+        postings = {}
+        for segment in self.segments:
+            for key in segment.keys:
+                postings.setdefault(key, []).extend(segment.postings(key))
+        first = os.path.basename(self.segments[0].path)
+        old = self.segments
+        self.close()
+        self._write(postings, first)
+        for segment in old[1:]:
+            os.remove(segment.path)
+
+    def postings(self, trigram):
+        ids = array('I')
+        key = trigram_key(trigram)
+        for segment in self.segments:
+            ids.extend(segment.postings(key))
+        return ids
+
+    def evaluate(self, query):
+        """ The set of the ids of the documents satisfying a trigram query,
+        or None for every document
+        """
+        if query.op == 'all':
+            return None
+        elif query.op == 'none':
+            return set()
+        elif query.op == 'trigram':
+            return set(self.postings(query.args))
+        elif query.op == 'and':
+            result = None
+            # single trigrams first, they are the cheapest to read
+            args = sorted(query.args, key=lambda arg: arg.op != 'trigram')
+            for arg in args:
+                ids = self.evaluate(arg)
+                if ids is not None:
+                    result = ids if result is None else result & ids
+                if result is not None and not result:
+                    break
+            return result
+        result = set()
+        for arg in query.args:
+            ids = self.evaluate(arg)
+            if ids is None:
+                return None
+            result |= ids
+        return result
+
+    def candidates(self, regex):
+        """ The sorted ids of the documents that may hold a match of regex """
+        ids = self.evaluate(trigram_query(regex._ast))
+        if ids is None:
+            return list(range(len(self.names)))
+        return sorted(i for i in ids if i < len(self.names))
+
+    def search(self, regex, load=None):
+        """ Yields (name, matches) for every document with a match. load(name)
+        returns the text of a document, by default the document is read from
+        the file at name (as bytes for a BytesRegex)
+        """
+        if load is None:
+            binary = isinstance(regex.newline, bytes)
+
+            def load(name):
+                return read_document(name, binary)
+        for i in self.candidates(regex):
+            matches = regex.find_all_matches(load(self.names[i]))
+            if matches:
+                yield self.names[i], matches
@@ -0,0 +1,224 @@
+from collections import deque
+
+from mini_regex.transitions import char_kind, EDGE, NEWLINE, WORD, OTHER
+from mini_regex.budget import BudgetExceeded
+
+""" Subset construction of a real DFA from an nfa
+
+The transitions of an nfa are predicates that can accept any char, so a dfa
+is built over a fixed alphabet (for example the distinct chars of the data
+that will be searched). Chars that every transition treats the same way are
+merged into a single "char class", and the dfa has one column per class.
+"""
+
+# Guards against the exponential blowup of the subset construction
+MAX_DFA_STATES = 10000
+
+KINDS = (EDGE, NEWLINE, WORD, OTHER)
+
+
+def epsilon_closure(nodes, context=None):
+    """ All nodes reachable from nodes without eating a char. Assertions are
+    only followed when the (prev_kind, next_kind) context is given
+    """
+    closure = set(nodes)
+    frontier = list(nodes)
+    while frontier:
+        node = frontier.pop()
+        for dst in node.epsilon_paths(context):
+            if dst not in closure:
+                closure.add(dst)
+                frontier.append(dst)
+    return closure
+
+
+def has_assertions(nfa):
+    """ True when the nfa holds a zero-width assertion (^, $, \\b, ...) """
+    explored = set([nfa.start])
+    frontier = [nfa.start]
+    while frontier:
+        node = frontier.pop()
+        for transition, dst in node.paths:
+            if transition.assertion is not None:
+                return True
+            if dst not in explored:
+                explored.add(dst)
+                frontier.append(dst)
+    return False
+
+
+def cost_transitions(nfa):
+    """ Every distinct char-consuming transition reachable in the nfa """
+    transitions = set()
+    explored = set([nfa.start])
+    frontier = [nfa.start]
+    while frontier:
+        node = frontier.pop()
+        for transition, dst in node.paths:
+            if transition.eats_input():
+                transitions.add(transition)
+            if dst not in explored:
+                explored.add(dst)
+                frontier.append(dst)
+    return list(transitions)
+
+
+def char_classes(nfa, alphabet):
+    """ Returns ({char: class}, [a representative char for each class]).
+    When the nfa has assertions, the chars of a class also share a char_kind
+    """
+    transitions = cost_transitions(nfa)
+    kinds = has_assertions(nfa)
+    class_of = {}
+    representatives = []
+    signatures = {}
+    for char in alphabet:
+        signature = tuple(t.is_available(char) for t in transitions)
+        if kinds:
+            signature += (char_kind(char),)
+        if signature not in signatures:
+            signatures[signature] = len(representatives)
+            representatives.append(char)
+        class_of[char] = signatures[signature]
+    return class_of, representatives
+
+
+class DFATable:
+    """ transitions[state][char_class] -> state
+    accept_before[state][char_class] is True when the state holds a match
+    that ends right before a char of the class, and accept_end[state] when it
+    holds one that ends at the end of the text. Both only differ from plain
+    "the state contains an accepting nfa state" when the nfa has assertions.
+    starts[kind] is the start state after a char of that kind (see KINDS)
+    """
+    def __init__(self, transitions, accept_before, accept_end, class_of,
+                 start=0, starts=None):
+        self.transitions = transitions
+        self.accept_before = accept_before
+        self.accept_end = accept_end
+        self.class_of = class_of
+        self.start = start
+        self.starts = starts or [start] * len(KINDS)
+
+    def __len__(self):
+        return len(self.transitions)
+
+
+def build_search_dfa(nfa, alphabet, max_states=MAX_DFA_STATES):
+    """ Builds a dfa that answers "does the text contain a non-empty match?"
+
+    A fresh thread is started at every position, by adding the start closure
+    to the state before each char is eaten. A dfa state is the set of nfa
+    states reached after eating at least one char, so a state is only
+    accepting when it holds a non-empty match. The start state (0) is the
+    empty set.
+
+    Assertions depend on the chars around a position, so with assertions a
+    state also remembers the kind of the last char eaten, and its
+    assertions are only followed once the next char (or the end) is known.
+    """
+    class_of, representatives = char_classes(nfa, alphabet)
+    kinds = has_assertions(nfa)
+    start_closure = epsilon_closure([nfa.start])
+    finals = set(nfa.finals)
+
+    def accepts(nodes, prev_kind, next_kind):
+        if kinds:
+            nodes = epsilon_closure(nodes, (prev_kind, next_kind))
+        return not finals.isdisjoint(nodes)
+
+    start = (frozenset(), EDGE if kinds else None)
+    states = {start: 0}
+    transitions = []
+    accept_before = []
+    accept_end = []
+    # explored in the same order ids are handed out, so row i is state i
+    unexplored = deque([start])
+    while unexplored:
+        nodes, prev_kind = unexplored.popleft()
+        row = []
+        accept_row = []
+        for char in representatives:
+            next_kind = char_kind(char) if kinds else None
+            current = nodes | start_closure
+            if kinds:
+                current = epsilon_closure(current, (prev_kind, next_kind))
+            moved = set()
+            for node in current:
+                moved.update(node.available_cost_paths(char))
+            key = (frozenset(epsilon_closure(moved)), next_kind)
+            if key not in states:
+                if len(states) >= max_states:
+                    raise BudgetExceeded("dfa exceeds " +
+                                         str(max_states) + " states")
+                states[key] = len(states)
+                unexplored.append(key)
+            row.append(states[key])
+            accept_row.append(accepts(nodes, prev_kind, next_kind))
+        transitions.append(row)
+        accept_before.append(accept_row)
+        accept_end.append(accepts(nodes, prev_kind, EDGE))
+    return DFATable(transitions, accept_before, accept_end, class_of)
+
+
+def build_match_dfa(nfa, alphabet, max_states=MAX_DFA_STATES):
+    """ Builds the dfa of a single match attempt, the same dfa that a
+    LazyDFAEngine builds while matching, but ahead of time over a fixed
+    alphabet. State 0 is the dead state, that no match can get out of.
+
+    With assertions, a state remembers the kind of the last char eaten, and
+    there is a start state for every kind of char before the start
+    """
+    class_of, representatives = char_classes(nfa, alphabet)
+    kinds = has_assertions(nfa)
+    finals = set(nfa.finals)
+
+    def accepts(nodes, prev_kind, next_kind):
+        if kinds:
+            nodes = epsilon_closure(nodes, (prev_kind, next_kind))
+        return not finals.isdisjoint(nodes)
+
+    dead = (frozenset(), None)
+    states = {dead: 0}
+    unexplored = deque([dead])
+    start_nodes = frozenset(epsilon_closure([nfa.start]))
+    starts = []
+    for kind in KINDS:
+        key = (start_nodes, kind if kinds else None)
+        if key not in states:
+            states[key] = len(states)
+            unexplored.append(key)
+        starts.append(states[key])
+
+    transitions = []
+    accept_before = []
+    accept_end = []
+    # explored in the same order ids are handed out, so row i is state i
+    while unexplored:
+        nodes, prev_kind = unexplored.popleft()
+        row = []
+        accept_row = []
+        for char in representatives:
+            next_kind = char_kind(char) if kinds else None
+            current = nodes
+            if kinds:
+                current = epsilon_closure(nodes, (prev_kind, next_kind))
+            moved = set()
+            for node in current:
+                moved.update(node.available_cost_paths(char))
+            key = (frozenset(epsilon_closure(moved)), next_kind)
+            if not key[0]:
+                key = dead
+            if key not in states:
+                if len(states) >= max_states:
+                    raise BudgetExceeded("dfa exceeds " +
+                                         str(max_states) + " states")
+                states[key] = len(states)
+                unexplored.append(key)
+            row.append(states[key])
+            accept_row.append(accepts(nodes, prev_kind, next_kind))
+        transitions.append(row)
+        accept_before.append(accept_row)
+        accept_end.append(accepts(nodes, prev_kind, EDGE))
+    return DFATable(transitions, accept_before, accept_end, class_of,
+                    starts[EDGE], starts)
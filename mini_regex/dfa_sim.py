@@ -1,15 +1,20 @@
 from mini_regex.util import Stack
-from mini_regex.dfa_state import NFAIterator, DFAState
+from mini_regex.dfa_state import NFAIterator, StatePool
+from mini_regex.dfa import has_assertions
+from mini_regex.transitions import char_kind
 
 
 class DFASimulatorBase:
-    def __init__(self, nfa):
+    def __init__(self, nfa, pool=None):
+        """ pool recycles the DFAStates, see StatePool """
         # Constant fields
         self.nfa = nfa
+        self.finals = list(nfa.finals)
+        self.pool = pool if pool is not None else StatePool()
         # Mutable fields
-        self.dfa = DFAState()
+        self.dfa = self.pool.take()
 
-    def get_epsilon_closure(self, dfa_state):
+    def get_epsilon_closure(self, dfa_state, context=None):
         """ The epsilon closure of a substate is the state containing all
         reachable substates that are accessible without "eating" a character.
         These paths are called "epsilons".
@@ -21,15 +26,16 @@ class DFASimulatorBase:
 
         IMPORTANT: A DFAState that has not advanced via all possible
         epsilon paths is NOT A VALID DFAState
+
+        Assertions are only followed when the (prev_kind, next_kind) context
+        of the current position is given, see NFAState.epsilon_paths
         """
         # DepthFirstSearch setup
 
-        # prevent cycles
-        explored = set()
-
         # new_dfa_state will only represent the full state at the end of this
-        # function call
-        new_dfa_state = DFAState()
+        # function call. It also prevents cycles: a node is only explored
+        # the first time it is added
+        new_dfa_state = self.pool.take()
 
         substates = dfa_state.get_substates()
 
@@ -41,55 +47,71 @@ class DFASimulatorBase:
             frontier.pop()
 
             node = substate.get_node()
-            if node not in explored:
-                new_dfa_state.add_substate(substate)
-                free_nodes = node.epsilon_paths()
+            if new_dfa_state.add_substate(substate):
+                free_nodes = node.epsilon_paths(context)
                 # derive all freely reachable nodes and give them the same age
-                new_substates = [NFAIterator(freenode, substate.get_age())
-                                 for freenode in free_nodes]
-                for new_sub in new_substates:
-                    frontier.push(new_sub)
-                explored.add(node)
+                age = substate.get_age()
+                for freenode in free_nodes:
+                    if not new_dfa_state.has_node(freenode):
+                        frontier.push(NFAIterator(freenode, age))
         return new_dfa_state
 
-    def consume_character(self, char, current_dfa):
-        """ returns a new_dfa
+    def consume_character(self, char, current_dfa, context=None):
+        """ returns a new_dfa. context describes the position right after char
         """
-        new_dfa_state = DFAState()
+        new_dfa_state = self.pool.take()
         substates = current_dfa.get_substates()
         for substate in substates:
             node = substate.node
+            # Consumes a char, age increases by one
+            new_age = substate.age + 1
             for destination in node.available_cost_paths(char):
-                # Consumes a char, age increases by one
-                new_age = substate.age + 1
-                new_substate = NFAIterator(destination, new_age)
-                new_dfa_state.add_substate(new_substate)
+                if not new_dfa_state.has_node(destination):
+                    new_dfa_state.add_substate(
+                        NFAIterator(destination, new_age))
 
+        if self.nfa.epsilon_free:
+            return new_dfa_state
         # take the new_dfa_state and add the epsilon closure to it
-        return self.get_epsilon_closure(new_dfa_state)
+        closure = self.get_epsilon_closure(new_dfa_state, context)
+        self.pool.give(new_dfa_state)
+        return closure
 
     def check_match(self):
-        match = self.dfa.get_substate_with_node(self.nfa.end)
-        if match:
-            return match.get_age()
-        else:
-            return None
+        """ Returns the age of the oldest substate at a final node, or None.
+        Only the final nodes are looked up, whatever the size of the state
+        """
+        ages = [substate.get_age() for substate in
+                map(self.dfa.get_substate_with_node, self.finals) if substate]
+        if ages:
+            return min(ages)
+        return None
 
     def check_finished(self):
         return len(self.dfa.get_substates()) == 0
 
 
 class DFASimulator(DFASimulatorBase):
-    def __init__(self, nfa):
-        DFASimulatorBase.__init__(self, nfa)
+    def __init__(self, nfa, context=None, pool=None):
+        DFASimulatorBase.__init__(self, nfa, pool)
 
         start_dfa = self.dfa
         start_state = NFAIterator(self.nfa.start, 0)
         start_dfa.add_substate(start_state)
-        self.dfa = self.get_epsilon_closure(start_dfa)
+        self.dfa = self.get_epsilon_closure(start_dfa, context)
+        self.pool.give(start_dfa)
+
+    def advance_state(self, char, context=None):
+        previous = self.dfa
+        self.dfa = self.consume_character(char, previous, context)
+        self.pool.give(previous)
 
-    def advance_state(self, char):
-        self.dfa = self.consume_character(char, self.dfa)
+    def close(self):
+        """ Gives the current state back to the pool, the simulator can't be
+        used anymore
+        """
+        self.pool.give(self.dfa)
+        self.dfa = None
 
     def run_sim(self, search_str):
         """ Returns (None | Num chars consumed of the matching iterator)
@@ -116,6 +138,54 @@ class DFASimulator(DFASimulatorBase):
             return None
 
 
+class NFAEngine:
+    """ Finds matches by running a fresh DFASimulator from each start
+    position. Works for any nfa
+    """
+    def __init__(self, nfa, greedy=True):
+        self.nfa = nfa
+        self.greedy = greedy
+        self.has_assertions = has_assertions(nfa)
+        # the states of every match are recycled, see StatePool
+        self._pool = StatePool()
+
+    def spare_states(self):
+        """ The number of DFAStates kept for the next matches to reuse """
+        return len(self._pool)
+
+    def context(self, text, pos):
+        """ The (prev_kind, next_kind) context of pos in text, or None when
+        the nfa has no assertions to check against it
+        """
+        if not self.has_assertions:
+            return None
+        prev = text[pos - 1] if pos > 0 else None
+        next = text[pos] if pos < len(text) else None
+        return (char_kind(prev), char_kind(next))
+
+    def match(self, text, pos=0, endpos=None):
+        """ Returns the end (exclusive) of the non-empty match starting at pos
+        or None. The longest match is returned when greedy, otherwise the
+        shortest
+        """
+        if endpos is None:
+            endpos = len(text)
+        runner = DFASimulator(self.nfa, self.context(text, pos), self._pool)
+        result = None
+        for i in range(pos, endpos):
+            if runner.check_finished():
+                break
+            runner.advance_state(text[i], self.context(text, i + 1))
+            # ages are never 0 here, so empty matches are never reported
+            age = runner.check_match()
+            if age:
+                result = pos + age
+                if not self.greedy:
+                    break
+        runner.close()
+        return result
+
+
 # TODO: Below lies an optimized version of a simulation that takes an entire
 # search string and finds all matches. It handles greediness and overloading.
 # It is extremely ugly, and is in severe need of refactoring. It also relies on
@@ -1,4 +1,4 @@
-import bisect
+from mini_regex.util import SparseSet
 
 
 class NFAIterator:
@@ -6,6 +6,7 @@ class NFAIterator:
     a single node in the nfa/graph, while the age represents the number of
     "input-chars" that the iterator has eaten from the input string
     """
+    __slots__ = ('node', 'age')
 
     def __init__(self, node, age):
         self.node = node
@@ -15,7 +16,9 @@ class NFAIterator:
         return "Age: " + str(self.age) + " node: " + str(self.node)
 
     def __eq__(self, other):
-        return self.age == other.age and self.node.id == other.node.id
+        # the cheap int compare first; nodes are almost always the same object
+        return self.age == other.age and (self.node is other.node or
+                                          self.node.id == other.node.id)
 
     def __lt__(self, other):
         return self.age < other.age
@@ -29,30 +32,81 @@ class NFAIterator:
 
 class DFAState:
     """ A set of NFAIterators that, when together, represent the state of the
-    automata given a starting position in a search string. Does not contain
-    identical substates.
+    automata given a starting position in a search string. Holds at most one
+    substate per nfa node: the first one added wins.
+
+    The ids of the nodes are kept in a SparseSet (nfa ids are handed out
+    densely from 0 by the IDAllocator), so adding a substate and looking one
+    up by node are O(1) even for nfas with thousands of states. Its sparse
+    array grows up to the largest id, so states are recycled through a
+    StatePool rather than built for every char.
     """
     def __init__(self):
-        # List of active iterators all sorted by age
-        self.partial_states = []
+        self.node_ids = SparseSet()
+        # substates[i] holds the node with the i-th id of node_ids
+        self.substates = []
+        # substates are usually added in order of age
+        self._sorted = True
 
     def __repr__(self):
-        return str(self.partial_states)
+        return str(self.get_substates())
+
+    def clear(self):
+        self.node_ids.clear()
+        self.substates = []
+        self._sorted = True
 
     def add_substate(self, substate):
-        bisect.insort_right(self.partial_states, substate)
+        """ Returns False when the state already held the substate's node """
+        if not self.node_ids.add(substate.node.id):
+            return False
+        substates = self.substates
+        if substates and substate.age < substates[-1].age:
+            self._sorted = False
+        substates.append(substate)
+        return True
+
+    def has_node(self, node):
+        return node.id in self.node_ids
 
     def get_substate_with_node(self, node):
-        for substate in self.partial_states:
-            if substate.node == node:
-                return substate
-        return None
+        if node.id not in self.node_ids:
+            return None
+        return self.substates[self.node_ids.index(node.id)]
 
     def get_substates(self):
-        return self.partial_states
+        """ Returns the substates sorted by age """
+        if not self._sorted:
+            # stable, so substates of the same age keep their insertion order
+            # (and node_ids' ranks must follow the new order)
+            self.substates.sort(key=lambda substate: substate.age)
+            self.node_ids.clear()
+            for substate in self.substates:
+                self.node_ids.add(substate.node.id)
+            self._sorted = True
+        return self.substates
+
+
+class StatePool:
+    """ Spare, empty DFAStates. A simulation holds at most three states at
+    once (the current one, the one after a char and its closure), so taking
+    them from a pool shared by every simulation of an nfa allocates the
+    sparse arrays once, instead of growing one to the nfa's size per char
+    """
+    def __init__(self):
+        self.spare = []
+
+    def take(self):
+        try:
+            return self.spare.pop()
+        except IndexError:
+            return DFAState()
+
+    def __len__(self):
+        """ The number of spare states """
+        return len(self.spare)
 
-    # def substates_with_age(self, age):
-    #     idx = self.partial_states.index(age)
-    #     last_index = (len(self.partial_state) -
-    #                   self.partial_states[::-1].index(age))
-    #     return self.partial_states[idx:last_index]
+    def give(self, state):
+        """ state must not be used anymore """
+        state.clear()
+        self.spare.append(state)
@@ -0,0 +1,173 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    AnyChar,
+    CharClass,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+)
+from mini_regex.nfa import NFAState, NFA
+from mini_regex.transitions import create_char_trans, create_metachar_trans
+from mini_regex.lowering import class_transition
+
+""" Glushkov (position) analysis of a regex ast
+
+Every char-consuming leaf of the ast (a literal, '.', or a class) is a
+"position". A position automaton has exactly one state per position and no
+epsilon transitions: entering a state means its position has just eaten a
+char. It is fully described by:
+  - first: the positions that can eat the first char of a match
+  - last: the positions that can eat the last char of a match
+  - follow[p]: the positions that can eat a char right after position p
+  - nullable: whether the empty string matches
+
+Sets of positions are stored as int bitmasks (bit p set <=> p in the set).
+See the Dragon Book, Chapter 3.9 ("followpos") for more information.
+"""
+
+
+def iter_bits(mask):
+    """ Yields the index of every set bit in mask, lowest first """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def position_count(node):
+    """ The number of positions in the ast, without building anything """
+    if isinstance(node, (Literal, AnyChar, CharClass)):
+        return 1
+    elif isinstance(node, String):
+        return len(node.chars)
+    elif isinstance(node, LiteralSet):
+        return sum(len(word) for word in node.words)
+    elif isinstance(node, Empty):
+        return 0
+    return sum(position_count(child) for child in node.children())
+
+
+class Positions:
+    def __init__(self, node):
+        # position -> Transition that the position eats chars with
+        self.transitions = []
+        # position -> bitmask of following positions
+        self.follow = []
+        self.nullable, self.first, self.last = self._analyze(node)
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def _new_position(self, transition):
+        self.transitions.append(transition)
+        self.follow.append(0)
+        return 1 << (len(self.transitions) - 1)
+
+    def _link(self, last, first):
+        """ Every position in last can be followed by every position in first
+        """
+        if first:
+            for pos in iter_bits(last):
+                self.follow[pos] |= first
+
+    def _analyze_string(self, chars):
+        first = prev = self._new_position(create_char_trans(chars[0]))
+        for char in chars[1:]:
+            bit = self._new_position(create_char_trans(char))
+            self._link(prev, bit)
+            prev = bit
+        return False, first, prev
+
+    def _analyze(self, node):
+        """ Returns (nullable, first, last) of node and fills in follow """
+        if isinstance(node, Literal):
+            bit = self._new_position(create_char_trans(node.char))
+            return False, bit, bit
+
+        elif isinstance(node, AnyChar):
+            bit = self._new_position(create_metachar_trans())
+            return False, bit, bit
+
+        elif isinstance(node, CharClass):
+            bit = self._new_position(class_transition(node))
+            return False, bit, bit
+
+        elif isinstance(node, String):
+            return self._analyze_string(node.chars)
+
+        elif isinstance(node, Empty):
+            return True, 0, 0
+
+        elif isinstance(node, LiteralSet):
+            first = last = 0
+            for word in node.words:
+                _, word_first, word_last = self._analyze_string(word)
+                first |= word_first
+                last |= word_last
+            return False, first, last
+
+        elif isinstance(node, Concat):
+            nullable, first, last = True, 0, 0
+            for child in node.nodes:
+                child_nullable, child_first, child_last = self._analyze(child)
+                self._link(last, child_first)
+                if nullable:
+                    first |= child_first
+                if child_nullable:
+                    last |= child_last
+                else:
+                    last = child_last
+                nullable = nullable and child_nullable
+            return nullable, first, last
+
+        elif isinstance(node, Alternate):
+            nullable, first, last = False, 0, 0
+            for child in node.nodes:
+                child_nullable, child_first, child_last = self._analyze(child)
+                nullable = nullable or child_nullable
+                first |= child_first
+                last |= child_last
+            return nullable, first, last
+
+        elif isinstance(node, Repeat):
+            nullable, first, last = self._analyze(node.node)
+            if node.op in ('*', '+'):
+                self._link(last, first)
+            if node.op in ('*', '?'):
+                nullable = True
+            return nullable, first, last
+
+        elif isinstance(node, Group):
+            return self._analyze(node.node)
+
+        else:
+            raise Exception("cannot analyze node: " + repr(node))
+
+
+def construct_glushkov(node, id_alloc):
+    """ Builds the position automata of an ast as an epsilon free nfa. There
+    is one start state plus exactly one state per position, and every
+    transition into a position's state eats a char with that position's
+    transition. Simulating it never needs an epsilon closure
+    """
+    positions = Positions(node)
+    start = NFAState(id_alloc.create_id())
+    states = [NFAState(id_alloc.create_id()) for _ in range(len(positions))]
+    transitions = positions.transitions
+
+    for pos in iter_bits(positions.first):
+        start.add_path(transitions[pos], states[pos])
+    for pos, follow in enumerate(positions.follow):
+        for next_pos in iter_bits(follow):
+            states[pos].add_path(transitions[next_pos], states[next_pos])
+
+    finals = [states[pos] for pos in iter_bits(positions.last)]
+    if positions.nullable:
+        finals.append(start)
+    nfa = NFA(start, None, finals)
+    nfa.epsilon_free = True
+    return nfa
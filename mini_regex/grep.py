@@ -0,0 +1,173 @@
+import argparse
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+
+""" A small grep
+
+    $ python -m mini_regex [-c | -l | -o] [-i] [-j JOBS] PATTERN PATH...
+
+Directories are searched recursively. Every file is memory mapped and
+searched as utf-8 bytes (see bytes_regex.py), so it is never read into
+memory nor decoded, except for the lines that are printed. Each file is
+searched line by line (see lines.py). Files are scanned in a pool of
+processes, and the results are printed in the order of the files on the
+command line (directories in sorted order), however long each file takes.
+"""
+
+# mode -> how the matches of a file are reported
+LINES, COUNT, FILES, ONLY = 'lines', 'count', 'files', 'only'
+
+# compiled patterns, per process
+_compiled = {}
+
+
+def compile_pattern(pattern, ignore_case):
+    """ Like in grep, '^' and '$' match at the start and end of lines """
+    key = (pattern, ignore_case)
+    regex = _compiled.get(key)
+    if regex is None:
+        regex = BytesRegex(pattern, multiline=True, ignore_case=ignore_case)
+        _compiled[key] = regex
+    return regex
+
+
+def iter_paths(paths):
+    """ The files to search, in a stable order """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def map_file(f):
+    """ An empty file can't be mapped """
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def decode(data):
+    return bytes(data).decode('utf-8', 'replace')
+
+
+def scan_file(job):
+    """ Returns (output lines, whether anything matched, error or None) for
+    a single file
+    """
+    path, pattern, ignore_case, mode, prefix = job
+    regex = compile_pattern(pattern, ignore_case)
+    label = path + ':' if prefix else ''
+    output = []
+    matched = 0
+    try:
+        with open(path, 'rb') as f:
+            data = map_file(f)
+            try:
+                lines = regex.matching_lines(data)
+                if mode == COUNT:
+                    matched = sum(1 for _ in lines)
+                    output.append(label + str(matched))
+                elif mode == FILES:
+                    if next(lines, None) is not None:
+                        matched = 1
+                        output.append(path)
+                elif mode == ONLY:
+                    for lineno, line_start, line_end in lines:
+                        matched += 1
+                        for start, end in regex._spans(data, line_start,
+                                                       line_end):
+                            output.append(label + str(lineno) + ':' +
+                                          decode(data[start:end]))
+                else:
+                    for lineno, start, end in lines:
+                        matched += 1
+                        output.append(label + str(lineno) + ':' +
+                                      decode(data[start:end]))
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except OSError as error:
+        return output, bool(matched), path + ': ' + str(error.strerror)
+    return output, bool(matched), None
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m mini_regex',
+        description="Print the lines of the files that match a pattern")
+    parser.add_argument('pattern')
+    parser.add_argument('paths', nargs='+', metavar='path')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('-c', '--count', dest='mode', action='store_const',
+                       const=COUNT, help="print the number of matching lines")
+    modes.add_argument('-l', '--files-with-matches', dest='mode',
+                       action='store_const', const=FILES,
+                       help="print the names of the files with a match")
+    modes.add_argument('-o', '--only-matching', dest='mode',
+                       action='store_const', const=ONLY,
+                       help="print only the matches")
+    parser.add_argument('-i', '--ignore-case', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help="number of processes (default: one per cpu)")
+    return parser
+
+
+def main(argv=None, out=None):
+    """ Returns the exit status: 0 when something matched, 1 when nothing
+    did, 2 on errors, like grep
+    """
+    args = build_arg_parser().parse_args(argv)
+    out = out or sys.stdout
+    try:
+        RegexParser(Tokenizer(args.pattern), True,
+                    args.ignore_case).construct_ast()
+    except Exception as error:
+        sys.stderr.write("bad pattern: " + str(error) + "\n")
+        return 2
+    # the pattern is valid, anything else is an error of the engines
+    try:
+        compile_pattern(args.pattern, args.ignore_case)
+    except Exception as error:
+        sys.stderr.write("error compiling the pattern: " + str(error) +
+                         "\n")
+        return 2
+
+    paths = list(iter_paths(args.paths))
+    prefix = len(paths) > 1 or any(os.path.isdir(p) for p in args.paths)
+    jobs = [(path, args.pattern, args.ignore_case, args.mode or LINES, prefix)
+            for path in paths]
+
+    if args.jobs and args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            # map keeps the order of the files
+            results = pool.map(scan_file, jobs,
+                               chunksize=max(1, len(jobs) // (4 * args.jobs)))
+            status = report(results, out)
+    else:
+        status = report(map(scan_file, jobs), out)
+    return status
+
+
+def report(results, out):
+    matched = False
+    failed = False
+    for output, file_matched, error in results:
+        if error is not None:
+            failed = True
+            sys.stderr.write(error + "\n")
+        for line in output:
+            out.write(line + "\n")
+        matched = matched or file_matched
+    if failed:
+        return 2
+    return 0 if matched else 1
@@ -0,0 +1,178 @@
+from bisect import bisect_left
+
+from mini_regex.match import Match
+from mini_regex.scanner import ThreadScanner
+from mini_regex.transitions import char_kind
+
+""" Keeping the matches of an edited text up to date
+
+    matcher = regex.incremental(text)
+    matcher.edit(10, 12, "new text")  # text[10:12] = "new text"
+    matcher.find_all_matches()
+
+The text is scanned once by a ThreadScanner, and its state is saved every
+interval chars. A checkpoint only holds offsets relative to its position,
+so two checkpoints with the same state at the same distance from the end of
+the text find exactly the same matches from there on.
+
+After an edit, the scan restarts from the last checkpoint that hadn't read
+any of the edited text, and stops as soon as it reaches the state of an old
+checkpoint past the edit: the rest of the old run, shifted by the change in
+length, is still valid. The matches and checkpoints found in between replace
+the old ones in place.
+"""
+
+DEFAULT_INTERVAL = 64
+
+
+def snapshot(scanner):
+    """ The state of the scanner, with offsets counted back from its pos """
+    pos = scanner.pos
+    threads = tuple((node, pos - start)
+                    for node, start in scanner.threads.items())
+    best = scanner.best
+    if best is not None:
+        best = (pos - best[0], pos - best[1])
+    return (threads, best, scanner.prev_kind)
+
+
+def restore(scanner, pos, state):
+    threads, best, prev_kind = state
+    scanner.pos = pos
+    scanner.threads = {node: pos - back for node, back in threads}
+    scanner.best = None if best is None else (pos - best[0], pos - best[1])
+    scanner.prev_kind = prev_kind
+
+
+def earliest_offset(scanner):
+    """ The leftmost offset of the text the scanner may read again """
+    earliest = scanner.pos
+    if scanner.best is not None:
+        earliest = min(earliest, scanner.best[0])
+    if scanner.threads:
+        # the first thread is always the leftmost one
+        earliest = min(earliest, next(iter(scanner.threads.values())))
+    return earliest
+
+
+class Checkpoint:
+    __slots__ = ('pos', 'horizon', 'count', 'state')
+
+    def __init__(self, pos, horizon, count, state):
+        self.pos = pos
+        # the rightmost offset read before this checkpoint
+        self.horizon = horizon
+        # the number of matches found before this checkpoint
+        self.count = count
+        self.state = state
+
+
+class IncrementalMatcher:
+    def __init__(self, regex, text, interval=DEFAULT_INTERVAL):
+        """ Scans text once. A checkpoint is saved every interval chars:
+        smaller intervals make edits cheaper but take more memory
+        """
+        self.regex = regex
+        self.text = text
+        self.interval = interval
+        self.spans = []  # (start, end) of the matches, end exclusive
+        self.rescanned = 0  # chars scanned by the last scan
+        scanner = ThreadScanner(regex._nfa, regex._greedy)
+        self.checkpoints = [Checkpoint(0, -1, 0, snapshot(scanner))]
+        self.checkpoints.extend(self._scan(scanner, -1, None)[0])
+
+    def find_all_matches(self):
+        return [Match(self.text, start, end - start,
+                      captures=self.regex._captures)
+                for start, end in self.spans]
+
+    def _scan(self, scanner, horizon, sync):
+        """ Runs scanner over the text from its pos, appending the matches to
+        self.spans. sync(scanner) returns the index of the old checkpoint the
+        scan has caught up with, if any. Returns (the new checkpoints, the
+        index it synced at or None, the rightmost offset read)
+        """
+        text = self.text
+        limit = len(text)
+        interval = self.interval
+        spans = self.spans
+        checkpoints = []
+        scanner.buffer = text
+        scanner.base = 0
+        self.rescanned = 0
+        while True:
+            if scanner.best and not scanner.threads:
+                # same as ThreadScanner._emit
+                end = scanner.best[1]
+                spans.append(scanner.best)
+                scanner.best = None
+                scanner.pos = end
+                scanner.prev_kind = char_kind(text[end - 1])
+                continue
+            pos = scanner.pos
+            if pos >= limit and not scanner.threads:
+                return checkpoints, None, horizon
+            if sync is not None:
+                synced = sync(scanner)
+                if synced is not None:
+                    return checkpoints, synced, horizon
+            if pos % interval == 0 and self.rescanned:
+                checkpoints.append(Checkpoint(pos, horizon, len(spans),
+                                              snapshot(scanner)))
+            scanner._step(text[pos] if pos < limit else None)
+            horizon = max(horizon, pos)
+            self.rescanned += 1
+
+    def edit(self, start, end, new):
+        """ Replaces text[start:end] with new, and updates the matches """
+        old_checkpoints = self.checkpoints
+        self.text = self.text[:start] + new + self.text[end:]
+        delta = len(new) - (end - start)
+        new_end = start + len(new)
+
+        # the last checkpoint that didn't read the edited text
+        horizons = [checkpoint.horizon for checkpoint in old_checkpoints]
+        resume = bisect_left(horizons, start) - 1
+        checkpoint = old_checkpoints[resume]
+
+        # the old checkpoints that the new scan may catch up with, by their
+        # position in the new text
+        candidates = {}
+        for i in range(resume + 1, len(old_checkpoints)):
+            old = old_checkpoints[i]
+            if old.pos >= end:
+                candidates.setdefault(old.pos + delta, []).append(i)
+
+        def sync(scanner):
+            found = candidates.get(scanner.pos)
+            if found is None or earliest_offset(scanner) < new_end:
+                return None
+            state = snapshot(scanner)
+            for i in found:
+                if old_checkpoints[i].state == state:
+                    return i
+            return None
+
+        scanner = ThreadScanner(self.regex._nfa, self.regex._greedy)
+        restore(scanner, checkpoint.pos, checkpoint.state)
+        tail = self.spans[checkpoint.count:]
+        del self.spans[checkpoint.count:]
+        checkpoints, synced, horizon = self._scan(scanner, checkpoint.horizon,
+                                                  sync)
+        if synced is not None:
+            # the rest of the old run still holds, shifted by delta
+            synced_count = old_checkpoints[synced].count
+            shift = len(self.spans) - synced_count
+            self.spans.extend(
+                (match_start + delta, match_end + delta)
+                for match_start, match_end
+                in tail[synced_count - checkpoint.count:])
+            for old in old_checkpoints[synced:]:
+                old.pos += delta
+                if old.horizon >= end:
+                    old.horizon += delta
+                # the new scan may have read further before catching up
+                old.horizon = max(old.horizon, horizon)
+                old.count += shift
+            checkpoints.extend(old_checkpoints[synced:])
+        old_checkpoints[resume + 1:] = checkpoints
@@ -0,0 +1,202 @@
+from mini_regex.dfa import (
+    epsilon_closure,
+    has_assertions,
+    MAX_DFA_STATES,
+    KINDS,
+)
+from mini_regex.transitions import char_kind, EDGE
+from mini_regex.budget import BudgetExceeded
+
+
+class DFACacheState:
+    """ A dfa state: the epsilon closed set of nfa states that a simulation
+    is in. Its outgoing transitions are computed the first time a char is
+    seen, and cached in next.
+
+    When the nfa has assertions, nodes are only closed over plain epsilons,
+    prev_kind is the char_kind of the char eaten to get here, and
+    accepting[next_kind] tells if the state holds a match ending before a
+    char of that kind
+    """
+    __slots__ = ('nodes', 'prev_kind', 'accepting', 'next')
+
+    def __init__(self, nodes, prev_kind, accepting):
+        self.nodes = nodes
+        self.prev_kind = prev_kind
+        self.accepting = accepting
+        self.next = {}  # char -> DFACacheState
+
+    def __repr__(self):
+        return "DFACacheState: " + str(sorted(node.id for node in self.nodes))
+
+
+class LazyDFAEngine:
+    """ Builds the dfa of an nfa lazily, while matching, and keeps it for the
+    lifetime of the compiled pattern.
+
+    A single engine can be shared by any number of threads. Reading the cache
+    takes no locks. States are interned with dict.setdefault, so when two
+    threads compute the same state or transition at the same time they both
+    end up using whichever was inserted first; the loser's copy is simply
+    dropped. Both operations are atomic in CPython, and in free-threaded
+    builds dicts lock themselves internally.
+
+    Once max_states states are cached, new states are still computed but not
+    stored, which bounds the memory used by patterns that blow up. When
+    strict, BudgetExceeded is raised instead.
+    """
+    def __init__(self, nfa, greedy=True, max_states=MAX_DFA_STATES,
+                 strict=False):
+        self.nfa = nfa
+        self.greedy = greedy
+        self.max_states = max_states
+        self.strict = strict
+        self.has_assertions = has_assertions(nfa)
+        self._finals = frozenset(nfa.finals)
+        # (frozenset of nfa states, prev_kind) -> DFACacheState
+        self._states = {}
+        start_nodes = frozenset(epsilon_closure([nfa.start]))
+        if self.has_assertions:
+            # what the start state can match depends on the char before pos
+            self._starts = [self._intern(start_nodes, kind) for kind in KINDS]
+            self.match = self._match_assertions
+        else:
+            self.start = self._intern(start_nodes, None)
+
+    def __len__(self):
+        return len(self._states)
+
+    def _intern(self, nodes, prev_kind):
+        key = (nodes, prev_kind)
+        state = self._states.get(key)
+        if state is None:
+            if prev_kind is None:
+                accepting = not self._finals.isdisjoint(nodes)
+            else:
+                accepting = tuple(
+                    not self._finals.isdisjoint(
+                        epsilon_closure(nodes, (prev_kind, next_kind)))
+                    for next_kind in KINDS)
+            state = DFACacheState(nodes, prev_kind, accepting)
+            if len(self._states) < self.max_states:
+                state = self._states.setdefault(key, state)
+            elif self.strict:
+                raise BudgetExceeded("the dfa exceeds " +
+                                     str(self.max_states) + " states")
+        return state
+
+    def transition(self, state, char):
+        nxt = state.next.get(char)
+        if nxt is not None:
+            return nxt
+        nodes = state.nodes
+        kind = None
+        if state.prev_kind is not None:
+            kind = char_kind(char)
+            nodes = epsilon_closure(nodes, (state.prev_kind, kind))
+        moved = set()
+        for node in nodes:
+            moved.update(node.available_cost_paths(char))
+        nxt = self._intern(frozenset(epsilon_closure(moved)), kind)
+        if (nxt.nodes, nxt.prev_kind) in self._states:
+            nxt = state.next.setdefault(char, nxt)
+        return nxt
+
+    def match(self, text, pos=0, endpos=None):
+        """ Returns the end (exclusive) of the non-empty match starting at pos
+        or None. The longest match is returned when greedy, otherwise the
+        shortest
+        """
+        if endpos is None:
+            endpos = len(text)
+        state = self.start
+        result = None
+        for i in range(pos, endpos):
+            char = text[i]
+            nxt = state.next.get(char)
+            if nxt is None:
+                nxt = self.transition(state, char)
+            state = nxt
+            if not state.nodes:
+                break
+            if state.accepting:
+                if not self.greedy:
+                    return i + 1
+                result = i + 1
+        return result
+
+    def _match_assertions(self, text, pos=0, endpos=None):
+        """ match, for nfas with assertions. Whether a state accepts is only
+        known once the char after it is, so acceptance is checked before
+        eating each char, and at endpos. Assertions see the whole text, even
+        past pos and endpos
+        """
+        if endpos is None:
+            endpos = len(text)
+        state = self._starts[char_kind(text[pos - 1]) if pos > 0 else EDGE]
+        result = None
+        for i in range(pos, endpos):
+            char = text[i]
+            if i > pos and state.accepting[char_kind(char)]:
+                if not self.greedy:
+                    return i
+                result = i
+            nxt = state.next.get(char)
+            if nxt is None:
+                nxt = self.transition(state, char)
+            state = nxt
+            if not state.nodes:
+                return result
+        if endpos > pos:
+            next = text[endpos] if endpos < len(text) else None
+            if state.accepting[char_kind(next)]:
+                result = endpos
+        return result
+
+    def match_budget(self, text, pos, endpos, budget):
+        """ match, with or without assertions, charging budget a step per
+        char read, so that even a single long attempt is stopped on time
+        """
+        if endpos is None:
+            endpos = len(text)
+        assertions = self.has_assertions
+        if assertions:
+            state = self._starts[char_kind(text[pos - 1]) if pos > 0
+                                 else EDGE]
+        else:
+            state = self.start
+        greedy = self.greedy
+        result = None
+        # the steps left before the budget must be checked, counted down
+        # locally and written back once done
+        left = budget.next_check - budget.steps
+        i = pos
+        while i < endpos:
+            left -= 1
+            if left <= 0:
+                budget.steps = budget.next_check - left
+                budget.check(i)
+                left = budget.next_check - budget.steps
+            char = text[i]
+            if assertions and i > pos and state.accepting[char_kind(char)]:
+                result = i
+                if not greedy:
+                    break
+            nxt = state.next.get(char)
+            if nxt is None:
+                nxt = self.transition(state, char)
+            state = nxt
+            if not state.nodes:
+                break
+            i += 1
+            if not assertions and state.accepting:
+                result = i
+                if not greedy:
+                    break
+        else:
+            if assertions and endpos > pos:
+                next = text[endpos] if endpos < len(text) else None
+                if state.accepting[char_kind(next)]:
+                    result = endpos
+        budget.steps = budget.next_check - left
+        return result
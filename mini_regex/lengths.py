@@ -0,0 +1,93 @@
+from collections import deque
+
+""" The shortest and longest matches of an nfa, in chars (bytes for the nfas
+of utf8.py)
+
+A match starting at pos needs at least min_length chars, so no match starts
+within min_length of the end of the text, and it never reads past
+pos + max_length. Both are found on the graph of the nfa, where a
+transition that eats a char weighs 1 and any other one 0: min_length is the
+shortest path to a final state, max_length the longest one, which only
+exists when no loop of the nfa eats a char.
+"""
+
+
+def reachable(nodes, edges):
+    """ Every node reachable from nodes, through edges(node) """
+    explored = set(nodes)
+    frontier = list(nodes)
+    while frontier:
+        node = frontier.pop()
+        for dst in edges(node):
+            if dst not in explored:
+                explored.add(dst)
+                frontier.append(dst)
+    return explored
+
+
+def min_match_length(nfa):
+    """ The length of the shortest match, or None when nothing matches """
+    finals = set(nfa.finals)
+    distances = {nfa.start: 0}
+    # 0-1 bfs: free transitions go to the front of the queue
+    queue = deque([nfa.start])
+    while queue:
+        node = queue.popleft()
+        distance = distances[node]
+        if node in finals:
+            return distance
+        for transition, dst in node.paths:
+            cost = 1 if transition.eats_input() else 0
+            if dst not in distances or distance + cost < distances[dst]:
+                distances[dst] = distance + cost
+                if cost:
+                    queue.append(dst)
+                else:
+                    queue.appendleft(dst)
+    return None
+
+
+def max_match_length(nfa):
+    """ The length of the longest match, or None when it is unbounded.
+    Loops that don't eat anything, like in '(^)*', are also taken as
+    unbounded, which only costs the pruning
+    """
+    sources = {}
+    for node in reachable([nfa.start], lambda node: [dst for _, dst in
+                                                     node.paths]):
+        for transition, dst in node.paths:
+            sources.setdefault(dst, []).append((transition, node))
+    # the nodes that are on a path from the start to a final state
+    useful = reachable(nfa.finals, lambda node: [src for _, src in
+                                                 sources.get(node, ())])
+    if nfa.start not in useful:
+        return None
+
+    # longest paths, in topological order (Kahn's algorithm)
+    incoming = dict.fromkeys(useful, 0)
+    for node in useful:
+        for _, src in sources.get(node, ()):
+            if src in useful:
+                incoming[node] += 1
+    distances = {nfa.start: 0}
+    ready = [node for node, count in incoming.items() if count == 0]
+    done = 0
+    longest = None
+    while ready:
+        node = ready.pop()
+        done += 1
+        distance = distances.get(node)
+        if distance is not None and node in nfa.finals:
+            longest = max(longest or 0, distance)
+        for transition, dst in node.paths:
+            if dst not in useful:
+                continue
+            if distance is not None:
+                cost = 1 if transition.eats_input() else 0
+                distances[dst] = max(distances.get(dst, 0), distance + cost)
+            incoming[dst] -= 1
+            if incoming[dst] == 0:
+                ready.append(dst)
+    if done < len(useful):
+        return None  # a loop
+    return longest
@@ -0,0 +1,72 @@
+from bisect import bisect_left
+
+""" Line oriented search
+
+    for lineno, start, end in regex.matching_lines(text):
+        print(lineno, text[start:end])
+
+The newlines of the text are indexed once, with str.find (or bytes.find),
+into a sorted list of offsets. Each line is then searched in place, by
+bounding every engine call with the end of the line, so the automaton is
+reset at every newline without slicing the text nor building a MiniRegex
+per line. The line of any offset is a binary search in the index.
+
+Lines are rejected early: when every match must contain some literal (see
+regex_ast.required_literal), str.find jumps straight to the next line
+holding it, and the lines in between are never looked at.
+"""
+
+
+class LineIndex:
+    def __init__(self, text, newline='\n'):
+        """ A line ends at a newline, or at the end of the text. As in
+        grep, a newline at the very end of the text doesn't start a line
+        """
+        self.length = len(text)
+        self.newlines = []
+        i = text.find(newline)
+        while i != -1:
+            self.newlines.append(i)
+            i = text.find(newline, i + 1)
+        self.line_count = len(self.newlines)
+        last_start = self.newlines[-1] + 1 if self.newlines else 0
+        if last_start < self.length:
+            self.line_count += 1
+
+    def line_of(self, pos):
+        """ The number of the line holding the char at pos, from 0 """
+        return bisect_left(self.newlines, pos)
+
+    def span(self, line):
+        """ (start, end) of the line, without its newline """
+        start = self.newlines[line - 1] + 1 if line > 0 else 0
+        if line < len(self.newlines):
+            return start, self.newlines[line]
+        return start, self.length
+
+
+def matching_lines(regex, text, index=None, budget=None):
+    """ Yields (line number from 1, line start, line end) for every line of
+    text holding a match of regex. Matches never cross a newline. The search
+    is charged to budget, if any
+    """
+    if index is None:
+        index = LineIndex(text, regex.newline)
+    literal = regex._literal
+    line = 0
+    while line < index.line_count:
+        start, end = index.span(line)
+        if literal is not None:
+            found = text.find(literal, start)
+            if found == -1:
+                return
+            if found + len(literal) > end:
+                # found on a later line, skip the lines in between
+                line = index.line_of(found)
+                start, end = index.span(line)
+                if found + len(literal) > end:
+                    line += 1  # the literal crosses a newline
+                    continue
+        if regex._search(text, start, end, budget) is not None:
+            yield line + 1, start, end
+        line += 1
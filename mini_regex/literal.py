@@ -0,0 +1,32 @@
+""" Patterns that are a plain string, ex) 'ERROR'
+
+There is no automaton to run: a match at pos is a substring comparison, and
+the next match is found with str.find (or bytes.find), which skips through
+the text in C.
+"""
+
+
+class LiteralEngine:
+    def __init__(self, literal):
+        """ literal is a non empty str, or bytes for the bytes engine """
+        self.literal = literal
+
+    def match(self, text, pos=0, endpos=None):
+        """ Returns the end (exclusive) of the match starting at pos or None.
+        Greedy or not, a string only has one way to match
+        """
+        if endpos is None:
+            endpos = len(text)
+        end = pos + len(self.literal)
+        if end <= endpos and text.find(self.literal, pos, end) == pos:
+            return end
+        return None
+
+    def search(self, text, pos=0, endpos=None):
+        """ Returns (start, end) of the first match in text[pos:endpos] """
+        if endpos is None:
+            endpos = len(text)
+        start = text.find(self.literal, pos, endpos)
+        if start == -1:
+            return None
+        return (start, start + len(self.literal))
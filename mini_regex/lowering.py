@@ -0,0 +1,97 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    AnyChar,
+    CharClass,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+    Assert,
+)
+from mini_regex.transitions import (
+    RegexClassBuilder,
+    create_char_trans,
+    create_epsilon_trans,
+    create_metachar_trans,
+    create_assert_trans,
+)
+from mini_regex.thompson_constructions import (
+    construct_graph,
+    concat,
+    union_all,
+    construct_trie,
+    repeater,
+)
+
+""" Lowers an ast (see regex_ast.py) into a Thompson NFA """
+
+
+def class_transition(node):
+    builder = RegexClassBuilder(node.negate, node.ignore_case)
+    for item in node.items:
+        if isinstance(item, tuple):
+            builder.add_range(item)
+        else:
+            builder.add_char(item)
+    return builder.create_trans()
+
+
+# The leaves that eat chars
+CHAR_NODES = (Literal, String, LiteralSet, AnyChar, CharClass)
+
+
+def to_thompson(node, id_alloc, lower_leaf=None):
+    """ lower_leaf(node, id_alloc), when given, lowers the CHAR_NODES
+    instead (see utf8.py)
+    """
+    if lower_leaf is not None and isinstance(node, CHAR_NODES):
+        return lower_leaf(node, id_alloc)
+
+    elif isinstance(node, Literal):
+        return construct_graph(create_char_trans(node.char), id_alloc)
+
+    elif isinstance(node, String):
+        graph = None
+        for char in node.chars:
+            char_graph = construct_graph(create_char_trans(char), id_alloc)
+            graph = concat(graph, char_graph) if graph else char_graph
+        return graph
+
+    elif isinstance(node, AnyChar):
+        return construct_graph(create_metachar_trans(), id_alloc)
+
+    elif isinstance(node, CharClass):
+        return construct_graph(class_transition(node), id_alloc)
+
+    elif isinstance(node, Assert):
+        return construct_graph(create_assert_trans(node.kind), id_alloc)
+
+    elif isinstance(node, Empty):
+        return construct_graph(create_epsilon_trans(), id_alloc)
+
+    elif isinstance(node, Concat):
+        graph = to_thompson(node.nodes[0], id_alloc, lower_leaf)
+        for child in node.nodes[1:]:
+            graph = concat(graph, to_thompson(child, id_alloc, lower_leaf))
+        return graph
+
+    elif isinstance(node, Alternate):
+        graphs = [to_thompson(child, id_alloc, lower_leaf)
+                  for child in node.nodes]
+        return union_all(graphs, id_alloc)
+
+    elif isinstance(node, LiteralSet):
+        return construct_trie(node.words, id_alloc)
+
+    elif isinstance(node, Repeat):
+        return repeater(to_thompson(node.node, id_alloc, lower_leaf), node.op,
+                        id_alloc)
+
+    elif isinstance(node, Group):
+        return to_thompson(node.node, id_alloc, lower_leaf)
+
+    else:
+        raise Exception("cannot lower node: " + repr(node))
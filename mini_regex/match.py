@@ -3,24 +3,33 @@ class Match:
                  search_space=None,
                  start=None,
                  length=None,
-                 start_idx=0):
+                 start_idx=0,
+                 captures=None):
 
         """ start_idx is the idx where the search space begins in the overall
         search_string.
         start is the start of the match within the particular substring (called
         search_space in this case)
+        captures(search_space, start, end) returns the capture slots of the
+        match (see PikeVM.captures). It is only called the first time a group
+        is asked for
         """
         if search_space:
-            self.value = search_space[start: length]
+            self.value = search_space[start: start + length]
             end = start_idx + start + length - 1
-            self.span = (start+start_idx, end)
+            self._span = (start+start_idx, end)
         else:
             self.value = None
-            self.span = None
+            self._span = None
+        self._search_space = search_space
+        self._start = start
+        self._start_idx = start_idx
+        self._captures = captures
+        self._slots = None
 
     def __repr__(self):
         if(self.value):
-            return "MatchObj: " + str(self.value) + " " + str(self.span)
+            return "MatchObj: " + str(self.value) + " " + str(self._span)
         else:
             return "None"
 
@@ -37,7 +46,46 @@ class Match:
         return self.value
 
     def get_span(self):
-        return self.span
+        return self._span
+
+    def _load_slots(self):
+        if self._slots is None:
+            if self._captures is None:
+                raise Exception("match has no capture groups")
+            self._slots = self._captures(self._search_space, self._start,
+                                         self._start + len(self.value))
+        return self._slots
+
+    def _group_slots(self, n):
+        if n == 0:
+            return (self._start, self._start + len(self.value))
+        slots = self._load_slots()
+        if not 0 < n < len(slots) // 2:
+            raise Exception("no such group: " + str(n))
+        return (slots[2 * n], slots[2 * n + 1])
+
+    def group(self, n=0):
+        """ The text matched by group n (0 is the whole match), or None when
+        the group didn't take part in the match
+        """
+        start, end = self._group_slots(n)
+        if start is None:
+            return None
+        return self._search_space[start:end]
+
+    def groups(self):
+        """ A tuple of the text matched by every capture group """
+        count = len(self._load_slots()) // 2 - 1
+        return tuple(self.group(n) for n in range(1, count + 1))
+
+    def span(self, n=0):
+        """ Like get_span, for group n. None when the group didn't take part
+        in the match
+        """
+        start, end = self._group_slots(n)
+        if start is None:
+            return None
+        return (start + self._start_idx, end + self._start_idx - 1)
 
 
 def remove_overlaps(match_list):
@@ -3,9 +3,15 @@ class NFA:
     The end state is only reachable from the start state via references/python
     pointers. This makes it harder to traverse the graph in an improper manner
     """
-    def __init__(self, start, end):
+    def __init__(self, start, end, finals=None):
         self.start = start
         self.end = end
+        # A Thompson nfa only accepts in its end state. Position automatas
+        # (see glushkov.py) accept in several states and have no end state
+        self.finals = [end] if finals is None else finals
+        # Set by constructions that never emit epsilon transitions, which lets
+        # simulations skip computing epsilon closures
+        self.epsilon_free = False
 
 
 class NFAState:
@@ -16,6 +22,8 @@ class NFAState:
     def __init__(self, id):
         self.id = id
         self.paths = set()
+        # (literal char -> destinations, other cost paths), built on demand
+        self._cost_index = None
 
     def __str__(self):
         header = "NFAState: " + str(self.id)
@@ -29,20 +37,44 @@ class NFAState:
     def add_path(self, transition, destination):
         path = (transition, destination)
         self.paths.add(path)
+        self._cost_index = None
+
+    def _build_cost_index(self):
+        literals = {}
+        others = []
+        for transition, destination in self.paths:
+            if not transition.eats_input():
+                continue
+            if transition.literal is not None:
+                literals.setdefault(transition.literal, set()).add(destination)
+            else:
+                others.append((transition, destination))
+        self._cost_index = (literals, others)
+        return self._cost_index
 
     def available_cost_paths(self, char):
         """ Returns all available paths that require a character as input (that
-        "cost") and that match the input char
+        "cost") and that match the input char.
+        Literal paths are found with a single dict lookup, so a state with
+        many literal branches (like the root of a trie) stays cheap
         """
-        return set([
-            destination
-            for transition, destination in self.paths
-            if transition.eats_input() and transition.is_available(char)
-        ])
+        literals, others = self._cost_index or self._build_cost_index()
+        result = set(literals.get(char, ()))
+        for transition, destination in others:
+            if transition.is_available(char):
+                result.add(destination)
+        return result
 
-    def epsilon_paths(self):
+    def epsilon_paths(self, context=None):
+        """ Returns the destinations reachable without eating a char.
+        Assertions are only followed when the context, a
+        (prev_kind, next_kind) tuple describing the chars around the current
+        position (see transitions.char_kind), is given and satisfies them
+        """
         return set([
             destination
             for transition, destination in self.paths
-            if not transition.eats_input()
+            if not transition.eats_input() and (
+                transition.assertion is None or
+                (context is not None and transition.assertion(*context)))
         ])
@@ -0,0 +1,116 @@
+from mini_regex.transitions import char_kind, EDGE
+from mini_regex.budget import BudgetExceeded
+
+""" The match of every start position, in a single pass
+
+    regex.find_all_matches("abab", overlapped=True)  # one per start
+
+Running an engine from every offset reads the text over and over. Instead,
+every offset starts a thread in the lazy dfa (see lazy_dfa.py), and the
+threads are grouped by their dfa state: threads in the same state at the
+same position end the same way, so each char costs a transition per group,
+not per thread.
+
+When groups reach the same state they are merged into a new group, so the
+groups form a tree whose leaves are the start positions, and a group only
+records the accepts that happened while it was alive. The end of a start's
+match is then read from its leaf upwards: the last accept of the highest
+group that accepted when greedy, and the single one on the path when not
+(a group is done as soon as it accepts).
+"""
+
+
+class Group:
+    __slots__ = ('start', 'children', 'end')
+
+    def __init__(self, start=None, children=()):
+        self.start = start  # the start position of a leaf
+        self.children = children
+        self.end = None  # the last (or first) accept while alive
+
+
+def ends(roots):
+    """ Yields (start, end) for every start under the finished groups """
+    frontier = [(root, None) for root in roots]
+    while frontier:
+        group, end = frontier.pop()
+        if end is None:
+            end = group.end
+        if group.start is not None:
+            if end is not None:
+                yield group.start, end
+        for child in group.children:
+            frontier.append((child, end))
+
+
+def overlapped_spans(engine, text, pos=0, endpos=None, budget=None):
+    """ Returns the (start, end) of the match starting at every position of
+    text[pos:endpos] that has one, by start. engine is a LazyDFAEngine,
+    whose greedy flag picks the longest or the shortest match. A budget is
+    charged a step per position, and the partial results of BudgetExceeded
+    hold the starts whose matches were already decided
+    """
+    if endpos is None:
+        endpos = len(text)
+    greedy = engine.greedy
+    assertions = engine.has_assertions
+    transition = engine.transition
+    prev_kind = char_kind(text[pos - 1]) if pos > 0 else EDGE
+    next_kind = None
+    active = {}  # dfa state -> its group
+    roots = []  # the groups that are done
+    try:
+        for i in range(pos, endpos + 1):
+            char = text[i] if i < len(text) else None
+            if assertions:
+                next_kind = char_kind(char)
+            if active:
+                for state, group in list(active.items()):
+                    if assertions:
+                        accepting = state.accepting[next_kind]
+                    else:
+                        accepting = state.accepting
+                    if accepting:
+                        group.end = i
+                        if not greedy:
+                            del active[state]
+                            roots.append(group)
+            if i == endpos:
+                break
+            if budget is not None:
+                budget.charge(i)
+
+            moved = {}
+            for state, group in active.items():
+                nxt = state.next.get(char)
+                if nxt is None:
+                    nxt = transition(state, char)
+                if not nxt.nodes:
+                    roots.append(group)
+                    continue
+                other = moved.get(nxt)
+                if other is None:
+                    moved[nxt] = group
+                else:
+                    moved[nxt] = Group(children=(other, group))
+            # the thread starting at i, unless it dies right away
+            if assertions:
+                start = engine._starts[prev_kind]
+                prev_kind = next_kind
+            else:
+                start = engine.start
+            nxt = start.next.get(char)
+            if nxt is None:
+                nxt = transition(start, char)
+            if nxt.nodes:
+                other = moved.get(nxt)
+                if other is None:
+                    moved[nxt] = Group(i)
+                else:
+                    moved[nxt] = Group(children=(other, Group(i)))
+            active = moved
+    except BudgetExceeded as error:
+        error.partial = sorted(ends(roots))
+        raise
+    roots.extend(active.values())
+    return sorted(ends(roots))
@@ -1,21 +1,25 @@
-from mini_regex.transitions import (
-    RegexClassBuilder,
-    create_char_trans,
-    create_metachar_trans,
-)
-
-from mini_regex.thompson_constructions import (
-    construct_graph,
-    concat,
-    union,
-    repeater
+from mini_regex.regex_ast import (
+    Literal,
+    AnyChar,
+    CharClass,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+    Assert,
 )
+from mini_regex.rewrites import optimize, fold_case
+from mini_regex.lowering import to_thompson
+from mini_regex.glushkov import construct_glushkov
 
 
 """
 Small recursive descent parser for regular expressions
 
-IN: tokens, OUT: Non-deterministic finite state machine
+IN: tokens, OUT: Abstract syntax tree (see regex_ast.py)
+
+The tree is then simplified by the passes in rewrites.py and lowered into a
+Non-deterministic finite state machine by lowering.py
 
 
 Context Free Grammar for regular expressions:
@@ -24,8 +28,9 @@ Exp -> Term Exp`
 Exp`-> '|'Exp | empty
 Term -> Factor Term`
 Term`-> Term | empty
-Factor -> C Factor`
+Factor -> Assertion | C Factor`
 Factor`-> '*'|'?'|'+'| empty
+Assertion -> '^' | '$' | \\b | \\B
 C -> CharType | ( Exp )
 CharType -> Class | Char | MetaChar
 Char -> All ascii chars not including metachars or metachars with front slash
@@ -37,6 +42,13 @@ ClassChars -> Ascii chars, no special chars
 """
 
 
+# Ways of turning an ast into an nfa
+BACKENDS = {
+    'thompson': to_thompson,
+    'glushkov': construct_glushkov,
+}
+
+
 class IDAllocator:
 
     """ Responsible for providing each state with a unique_id. Not all states
@@ -58,10 +70,17 @@ class RegexParser:
             "|", "*", "(", ")", ".", "+", "[", "]", "?", "^", "$"
             ]
 
-    def __init__(self, tokenizer):
+    def __init__(self, tokenizer, multiline=False, ignore_case=False):
+        """ When multiline, '^' and '$' match at the start and end of every
+        line instead of only at the start and end of the text.
+        When ignore_case, the ast is case folded (see rewrites.fold_case)
+        """
         self.tok_stream = tokenizer
         self.id_alloc = IDAllocator()
+        # the Group node of every capture group, in order of their '('
         self.groups = []
+        self.multiline = multiline
+        self.ignore_case = ignore_case
 
     def is_special_token(self, token):
         for char in self.special_chars:
@@ -75,61 +94,87 @@ class RegexParser:
     def is_meta_token(self, token):
         return token.has_val(".")
 
+    def is_assert_token(self, token):
+        return (token.has_val("^") or token.has_val("$") or
+                token.has_val("b", True) or token.has_val("B", True))
+
     def is_start_of_char(self, tok):
         return (self.is_meta_token(tok) or
                 tok.has_val("[") or
-                self.is_literal_token(tok))
+                self.is_literal_token(tok) or
+                self.is_assert_token(tok))
 
-    def construct_nfa(self):
-        return self.parse_exp()
+    def parse(self):
+        """ Returns the unoptimized ast of the whole pattern """
+        ast = self.parse_exp()
+        if self.ignore_case:
+            ast = fold_case(ast)
+        return ast
+
+    def construct_ast(self):
+        return optimize(self.parse())
+
+    def construct_nfa(self, backend='thompson'):
+        return BACKENDS[backend](self.construct_ast(), self.id_alloc)
 
     def parse_exp(self):
+        """ Exp` is tail recursive, so it is unrolled into a loop. This keeps
+        huge alternations (ex: 'word1|word2|...|word50000') from hitting the
+        recursion limit
+        """
         tok = self.tok_stream.peek()
 
         if self.is_start_of_char(tok) or tok.has_val('('):
-            term = self.parse_term()
-            exp2 = self.parse_exp2()
-            if exp2:
-                return union(term, exp2, self.id_alloc)
-            else:
-                return term
+            terms = [self.parse_term()]
+            while self.parse_exp2():
+                terms.append(self.parse_term())
+            if len(terms) == 1:
+                return terms[0]
+            return Alternate(terms)
         else:
             raise Exception(
                     "unexpected token in parse_exp at pos: " + str(tok.pos))
 
     def parse_exp2(self):
+        """ Returns True when another term follows """
         tok = self.tok_stream.peek()
         if tok.has_val('|'):
             self.tok_stream.advance()
-            return self.parse_exp()
+            tok = self.tok_stream.peek()
+            if self.is_start_of_char(tok) or tok.has_val('('):
+                return True
+            raise Exception(
+                    "unexpected token in parse_exp at pos: " + str(tok.pos))
         elif tok.is_end() or tok.has_val(')'):
-            return None
+            return False
         else:
             raise Exception(
                     "unexpected token in parse_exp2 at pos: " + str(tok.pos))
 
     def parse_term(self):
+        """ Like Exp`, Term` is unrolled into a loop """
         tok = self.tok_stream.peek()
 
         if self.is_start_of_char(tok) or tok.has_val('('):
-            factor = self.parse_factor()
-            term2 = self.parse_term2()
-            if term2:
-                return concat(factor, term2)
-            else:
-                return factor
+            factors = [self.parse_factor()]
+            while self.parse_term2():
+                factors.append(self.parse_factor())
+            if len(factors) == 1:
+                return factors[0]
+            return Concat(factors)
         else:
             raise Exception(
                 "unexpected token in parse_term at pos: " + str(tok.pos)
             )
 
     def parse_term2(self):
+        """ Returns True when another factor follows """
         tok = self.tok_stream.peek()
 
         if self.is_start_of_char(tok) or tok.has_val('('):
-            return self.parse_term()
+            return True
         elif tok.has_val(')') or tok.has_val('|') or tok.is_end():
-            return None
+            return False
         else:
             raise Exception(
                 "unexpected token in parse_term2 at pos: " + str(tok.pos)
@@ -138,13 +183,16 @@ class RegexParser:
     def parse_factor(self):
         tok = self.tok_stream.peek()
 
-        if self.is_start_of_char(tok) or tok.has_val('('):
+        # assertions match no chars, so they can't be repeated
+        if self.is_assert_token(tok):
+            return self.parse_assertion()
+        elif self.is_start_of_char(tok) or tok.has_val('('):
             char = self.parse_char()
 
             tok = self.tok_stream.peek()
             factor2 = self.parse_factor2()
             if factor2:
-                return repeater(char, tok, self.id_alloc)
+                return Repeat(char, tok.val)
             else:
                 return char
         else:
@@ -160,6 +208,17 @@ class RegexParser:
         else:
             return None
 
+    def parse_assertion(self):
+        tok = self.tok_stream.peek()
+        self.tok_stream.advance()
+        if tok.has_val('^'):
+            return Assert('start_line' if self.multiline else 'start_text')
+        elif tok.has_val('$'):
+            return Assert('end_line' if self.multiline else 'end_text')
+        elif tok.has_val('b', True):
+            return Assert('word_boundary')
+        return Assert('not_word_boundary')
+
     def parse_regex_class(self):
         """ Parses a class.
         Regex classes represent a singular character and are contained within
@@ -173,7 +232,7 @@ class RegexParser:
             negate_flag = True
             self.tok_stream.advance()
             tok = self.tok_stream.peek()
-        builder = RegexClassBuilder(negate_flag)
+        items = []
 
         prev_tok = None
         range_start = None
@@ -183,26 +242,26 @@ class RegexParser:
                 range_start = prev_tok
                 prev_tok = tok
             elif prev_tok and prev_tok.has_val('-'):
-                builder.add_range((range_start.val, tok.val))
+                items.append((range_start.val, tok.val))
                 prev_tok = None
                 range_start = None
             elif prev_tok:
-                builder.add_char(prev_tok.val)
+                items.append(prev_tok.val)
                 prev_tok = tok
             else:
                 prev_tok = tok
             self.tok_stream.advance()
             tok = self.tok_stream.peek()
         if prev_tok:
-            builder.add_char(prev_tok.val)
+            items.append(prev_tok.val)
 
         self.tok_stream.advance()
-        return construct_graph(builder.create_trans(), self.id_alloc)
+        return CharClass(items, negate_flag)
 
     def parse_char(self):
-        """ Turn a character into an automata.
+        """ Turn a character into an ast node.
          A char is a anything represented by a two-state automata with a
-         singular transition that eats a char
+         singular transition that eats a char (or a parenthesized group)
         """
         tok = self.tok_stream.peek()
 
@@ -213,23 +272,23 @@ class RegexParser:
         # metachar
         elif tok.has_val('.'):
             self.tok_stream.advance()
-            return construct_graph(create_metachar_trans(), self.id_alloc)
+            return AnyChar()
 
         # char literal
         elif self.is_literal_token(tok):
             self.tok_stream.advance()
-            return construct_graph(
-                create_char_trans(tok.val), self.id_alloc
-            )
+            return Literal(tok.val)
 
-        # group start - currently has no effect
+        # capture group, numbered before the groups nested in it
         elif tok.has_val('('):
             self.tok_stream.advance()
-            exp = self.parse_exp()
+            group = Group(None, len(self.groups) + 1)
+            self.groups.append(group)
+            group.node = self.parse_exp()
             tok = self.tok_stream.peek()
             if tok.has_val(')'):
                 self.tok_stream.advance()
-                return exp
+                return group
             else:
                 raise Exception(
                     "unexpected token in parse_char at pos: " + str(tok.pos)
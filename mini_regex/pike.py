@@ -0,0 +1,179 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    AnyChar,
+    CharClass,
+    Assert,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+)
+from mini_regex.transitions import (
+    create_char_trans,
+    create_metachar_trans,
+    char_kind,
+    ASSERTIONS,
+)
+from mini_regex.lowering import class_transition
+
+""" Capture groups with a Pike VM (see Russ Cox, "Regular Expression
+Matching: the Virtual Machine Approach")
+
+The other engines only find where a match starts and ends. Once that span is
+known, this VM runs over it a single time to find which part of the text each
+group matched. Every thread carries its own capture slots, and threads are
+kept in priority order: when several ways of matching the span exist, the
+repeats take as many (or, when not greedy, as few) iterations as they can,
+and alternations prefer their leftmost branch.
+
+The program is a list of instructions, each a tuple whose first item is the
+opcode:
+    (CHAR, transition)   eat a char the transition accepts
+    (SPLIT, x, y)        continue at both x and y, x having priority
+    (JMP, x)
+    (SAVE, slot)         record the current position in a capture slot
+    (ASSERT, check)      continue if check(prev_kind, next_kind) holds
+    (MATCH,)
+"""
+
+CHAR, SPLIT, JMP, SAVE, ASSERT, MATCH = range(6)
+
+
+class PikeVM:
+    def __init__(self, node, group_count, greedy=True):
+        self.group_count = group_count
+        self.greedy = greedy
+        self.program = []
+        self._emit_node(node)
+        self.program.append((MATCH,))
+
+    def _emit_node(self, node):
+        program = self.program
+        if isinstance(node, Literal):
+            program.append((CHAR, create_char_trans(node.char)))
+        elif isinstance(node, String):
+            for char in node.chars:
+                program.append((CHAR, create_char_trans(char)))
+        elif isinstance(node, AnyChar):
+            program.append((CHAR, create_metachar_trans()))
+        elif isinstance(node, CharClass):
+            program.append((CHAR, class_transition(node)))
+        elif isinstance(node, Assert):
+            program.append((ASSERT, ASSERTIONS[node.kind]))
+        elif isinstance(node, Empty):
+            pass
+        elif isinstance(node, Concat):
+            for child in node.nodes:
+                self._emit_node(child)
+        elif isinstance(node, Alternate):
+            self._emit_alternate(node.nodes)
+        elif isinstance(node, LiteralSet):
+            self._emit_alternate([String(word) for word in node.words])
+        elif isinstance(node, Repeat):
+            self._emit_repeat(node)
+        elif isinstance(node, Group):
+            program.append((SAVE, 2 * node.index))
+            self._emit_node(node.node)
+            program.append((SAVE, 2 * node.index + 1))
+        else:
+            raise Exception("cannot compile node: " + repr(node))
+
+    def _emit_alternate(self, branches):
+        program = self.program
+        jumps = []
+        for branch in branches[:-1]:
+            split = len(program)
+            program.append(None)  # patched once the branch is emitted
+            self._emit_node(branch)
+            jumps.append(len(program))
+            program.append(None)
+            program[split] = (SPLIT, split + 1, len(program))
+        self._emit_node(branches[-1])
+        for jump in jumps:
+            program[jump] = (JMP, len(program))
+
+    def _split(self, more, less):
+        """ A split preferring more iterations when greedy """
+        if self.greedy:
+            return (SPLIT, more, less)
+        return (SPLIT, less, more)
+
+    def _emit_repeat(self, node):
+        program = self.program
+        start = len(program)
+        if node.op == '+':
+            self._emit_node(node.node)
+            program.append(self._split(start, len(program) + 1))
+        elif node.op == '*':
+            program.append(None)
+            self._emit_node(node.node)
+            program.append((JMP, start))
+            program[start] = self._split(start + 1, len(program))
+        else:  # '?'
+            program.append(None)
+            self._emit_node(node.node)
+            program[start] = self._split(start + 1, len(program))
+
+    def _add_thread(self, threads, visited, pc, slots, text, pos):
+        """ Follows every instruction that doesn't eat a char from pc, and
+        appends the threads that reach a CHAR or MATCH in priority order
+        """
+        program = self.program
+        stack = [(pc, slots)]
+        while stack:
+            pc, slots = stack.pop()
+            if pc in visited:
+                continue
+            visited.add(pc)
+            inst = program[pc]
+            op = inst[0]
+            if op == JMP:
+                stack.append((inst[1], slots))
+            elif op == SPLIT:
+                # pushed last, so the preferred branch is followed first
+                stack.append((inst[2], slots))
+                stack.append((inst[1], slots))
+            elif op == SAVE:
+                slots = list(slots)
+                slots[inst[1]] = pos
+                stack.append((pc + 1, slots))
+            elif op == ASSERT:
+                prev = text[pos - 1] if pos > 0 else None
+                next = text[pos] if pos < len(text) else None
+                if inst[1](char_kind(prev), char_kind(next)):
+                    stack.append((pc + 1, slots))
+            else:
+                threads.append((pc, slots))
+
+    def captures(self, text, start, end):
+        """ Returns the capture slots of the highest priority way of matching
+        exactly text[start:end]: slots[2 * n] and slots[2 * n + 1] are the
+        start and end (exclusive) of group n, None when it didn't take part.
+        Returns None when text[start:end] isn't a match
+        """
+        program = self.program
+        slots = [None] * (2 * self.group_count + 2)
+        slots[0] = start
+        threads = []
+        self._add_thread(threads, set(), 0, slots, text, start)
+        for pos in range(start, end):
+            char = text[pos]
+            next_threads = []
+            visited = set()
+            for pc, slots in threads:
+                inst = program[pc]
+                if inst[0] == CHAR and inst[1].is_available(char):
+                    self._add_thread(next_threads, visited, pc + 1, slots,
+                                     text, pos + 1)
+            threads = next_threads
+            if not threads:
+                return None
+        for pc, slots in threads:
+            if program[pc][0] == MATCH:
+                slots = list(slots)
+                slots[1] = end
+                return slots
+        return None
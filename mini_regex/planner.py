@@ -0,0 +1,212 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    CharClass,
+    Assert,
+    Group,
+    is_literal,
+    assertion_kinds,
+)
+from mini_regex.rewrites import transform
+from mini_regex.glushkov import Positions, position_count, iter_bits
+from mini_regex.bitparallel import MAX_POSITIONS, CHUNK_BITS
+
+""" Choosing the engine that runs a pattern
+
+When a pattern is compiled, its ast and nfa are measured (see Plan), and an
+engine is picked from what was measured:
+  - literal: the pattern is a plain string, searched with str.find
+  - bitparallel: one int holds the active positions (see bitparallel.py).
+    Its cost per char grows with the number of positions, but it can't blow
+    up like a dfa
+  - lazy_dfa: a dfa built while matching (see lazy_dfa.py). A dict lookup
+    per char, whatever the pattern, once its states are cached
+  - nfa: the plain nfa simulation (see dfa_sim.py). Never picked, it is
+    only there to be forced
+  - codegen: the whole dfa compiled into python source (see codegen.py).
+    Never picked either: building the whole dfa up front only pays off for
+    the hottest patterns
+
+The size of the dfa is estimated by running the subset construction over
+the position automaton, for a sample of chars taken from the pattern, until
+PROBE_LIMIT states are found.
+"""
+
+ENGINES = ('literal', 'bitparallel', 'lazy_dfa', 'nfa', 'codegen')
+
+# Up to this many positions, a step of the bit-parallel engine is a couple
+# of table lookups
+SMALL_POSITIONS = 8 * CHUNK_BITS
+
+# The dfa estimate stops exploring past this many states
+PROBE_LIMIT = 1000
+
+
+def count_nfa_states(nfa):
+    explored = set([nfa.start])
+    frontier = [nfa.start]
+    while frontier:
+        node = frontier.pop()
+        for _, dst in node.paths:
+            if dst not in explored:
+                explored.add(dst)
+                frontier.append(dst)
+    return len(explored)
+
+
+def strip_groups(node):
+    while isinstance(node, Group):
+        node = node.node
+    return node
+
+
+def literal_pattern(ast):
+    """ The string matched by the pattern when it is a plain string """
+    node = strip_groups(ast)
+    if is_literal(node):
+        return node.char if isinstance(node, Literal) else node.chars
+    return None
+
+
+def sample_chars(node):
+    """ The chars of the pattern, the bounds of its classes, both of their
+    cases, and a couple of chars that hopefully none of them accept
+    """
+    chars = set(['\n', '\x00'])
+    frontier = [node]
+    while frontier:
+        node = frontier.pop()
+        if isinstance(node, Literal):
+            chars.add(node.char)
+        elif isinstance(node, String):
+            chars.update(node.chars)
+        elif isinstance(node, LiteralSet):
+            for word in node.words:
+                chars.update(word)
+        elif isinstance(node, CharClass):
+            for item in node.items:
+                chars.update(item)
+        frontier.extend(node.children())
+    for char in list(chars):
+        for variant in (char.lower(), char.upper()):
+            if len(variant) == 1:
+                chars.add(variant)
+    return chars
+
+
+def estimate_dfa_states(ast, limit=PROBE_LIMIT):
+    """ The number of states of the pattern's dfa, over the chars of
+    sample_chars, up to limit. Assertions are left out
+    """
+    def drop_assertion(node):
+        return Empty() if isinstance(node, Assert) else node
+    node = transform(ast, drop_assertion)
+    positions = Positions(node)
+    masks = set()
+    for char in sample_chars(node):
+        mask = 0
+        for pos, transition in enumerate(positions.transitions):
+            if transition.is_available(char):
+                mask |= 1 << pos
+        if mask:
+            masks.add(mask)
+
+    # a state is the set of positions that ate the last char
+    start = None
+    seen = set([start])
+    frontier = [start]
+    while frontier and len(seen) < limit:
+        state = frontier.pop()
+        if state is None:
+            candidates = positions.first
+        else:
+            candidates = 0
+            for pos in iter_bits(state):
+                candidates |= positions.follow[pos]
+        for mask in masks:
+            nxt = candidates & mask
+            if nxt and nxt not in seen:
+                seen.add(nxt)
+                frontier.append(nxt)
+    return min(len(seen), limit)
+
+
+class Plan:
+    """ What was measured about a pattern, the engine chosen from it, and
+    why
+    """
+    def __init__(self, engine, reason, stats):
+        self.engine = engine
+        self.reason = reason
+        self.stats = stats  # list of (name, value)
+
+    def __str__(self):
+        lines = ["engine: " + self.engine, "  because " + self.reason]
+        for name, value in self.stats:
+            lines.append(name + ": " + str(value))
+        return "\n".join(lines)
+
+
+def choose(literal, kinds, positions, dfa_states, engines):
+    """ Returns (engine, reason) """
+    if literal and 'literal' in engines:
+        return 'literal', "the pattern is a plain string"
+    elif kinds:
+        return 'lazy_dfa', "assertions need the chars around a position"
+    elif 'bitparallel' not in engines:
+        return 'lazy_dfa', "the bitparallel engine can't run on this text"
+    elif positions > MAX_POSITIONS:
+        return 'lazy_dfa', ("%d positions are too many for an int"
+                            % positions)
+    elif positions <= SMALL_POSITIONS:
+        return 'bitparallel', ("%d positions fit in a few table lookups"
+                               % positions)
+    elif dfa_states >= PROBE_LIMIT:
+        return 'bitparallel', ("the dfa may blow up, and %d positions fit "
+                               "in an int" % positions)
+    return 'lazy_dfa', ("%d positions make slow bitparallel steps, and the "
+                        "dfa stays small" % positions)
+
+
+def plan(ast, nfa, anchor, prefilter, lengths, engines=ENGINES,
+         engine=None):
+    """ Measures the pattern and picks one of engines to run it, or checks
+    that the forced engine can. prefilter is the literal that every match
+    contains, if any, and lengths the (min, max) length of a match
+    """
+    literal = literal_pattern(ast)
+    kinds = assertion_kinds(ast)
+    positions = position_count(ast)
+    dfa_states = None
+    if positions <= MAX_POSITIONS:
+        # bigger patterns are run by the lazy dfa anyway
+        dfa_states = estimate_dfa_states(ast)
+    if dfa_states is None:
+        estimate = "not estimated"
+    elif dfa_states >= PROBE_LIMIT:
+        estimate = str(PROBE_LIMIT) + "+"
+    else:
+        estimate = dfa_states
+    stats = [
+        ("nfa states", count_nfa_states(nfa)),
+        ("positions", positions),
+        ("estimated dfa states", estimate),
+        ("anchor", anchor),
+        ("required literal", repr(prefilter) if prefilter else None),
+        ("min match length", lengths[0]),
+        ("max match length", lengths[1]),
+    ]
+    if engine is None:
+        engine, reason = choose(literal, kinds, positions, dfa_states,
+                                engines)
+        return Plan(engine, reason, stats)
+
+    if engine not in engines:
+        raise Exception("engine not available: " + str(engine))
+    elif engine == 'literal' and not literal:
+        raise Exception("the literal engine needs a plain string pattern")
+    elif engine == 'bitparallel' and kinds:
+        raise Exception("the bitparallel engine doesn't support assertions")
+    return Plan(engine, "it was forced", stats)
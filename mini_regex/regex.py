@@ -1,70 +1,461 @@
-from mini_regex.parser import RegexParser
+from mini_regex.parser import RegexParser, IDAllocator, BACKENDS
+from mini_regex.regex_ast import Assert, Concat, required_literal
+from mini_regex.rewrites import reverse
+from mini_regex.lowering import to_thompson
 from mini_regex.tokenizer import Tokenizer
-from mini_regex.dfa_sim import DFASimulator  # , MultiDFASimulator
-from mini_regex.match import Match, remove_overlaps
+from mini_regex.lazy_dfa import LazyDFAEngine
+from mini_regex.bitparallel import BitParallelEngine
+from mini_regex.literal import LiteralEngine
+from mini_regex.dfa_sim import NFAEngine
+from mini_regex.codegen import CodegenEngine
+from mini_regex.dfa import MAX_DFA_STATES
+from mini_regex.planner import plan, ENGINES, count_nfa_states
+from mini_regex.match import Match
+from mini_regex.pike import PikeVM
+from mini_regex.aio import afinditer
+from mini_regex.replace import substitute, split
+from mini_regex.lines import matching_lines
+from mini_regex.incremental import IncrementalMatcher, DEFAULT_INTERVAL
+from mini_regex.lengths import min_match_length, max_match_length
+from mini_regex.budget import BudgetExceeded, make_budget
+from mini_regex.overlap import overlapped_spans
+from mini_regex.result_cache import ResultCache, cache_key
+
+
+def anchor_of(ast):
+    """ The kind of the assertion that the whole pattern starts with, or
+    else ends with, if any
+    """
+    nodes = ast.nodes if isinstance(ast, Concat) else [ast]
+    if isinstance(nodes[0], Assert):
+        if nodes[0].kind in ('start_text', 'start_line'):
+            return nodes[0].kind
+    if isinstance(nodes[-1], Assert) and nodes[-1].kind == 'end_text':
+        return 'end_text'
+    return None
 
 
 class MiniRegex:
-    def __init__(self, pattern, greedy=True):
-        self._pattern = pattern
-        self._nfa = self._build_nfa(self._pattern)
+    newline = '\n'
+    # the engines that can search this kind of text, see planner.py
+    engines = ENGINES
 
+    def __init__(self, pattern, greedy=True, backend='thompson',
+                 multiline=False, ignore_case=False, engine=None,
+                 max_nfa_states=None, max_dfa_states=None,
+                 cache_bytes=None):
+        """ backend selects how the nfa is built: 'thompson' or 'glushkov'
+        (an epsilon free position automata, see glushkov.py). The glushkov
+        backend doesn't support assertions.
+        When multiline, '^' and '$' also match at the start and end of lines.
+        When ignore_case, letters match regardless of their case. The case
+        folding is compiled into the pattern, the text is searched as is.
+        engine forces one of planner.ENGINES instead of letting the planner
+        pick, see explain()
+        max_nfa_states and max_dfa_states bound the size of the automata.
+        BudgetExceeded is raised when the nfa is too large, and when the dfa,
+        which is built lazily, would need more states during a search.
+        Without max_dfa_states, the dfa only stops caching new states.
+        cache_bytes turns on a cache of the matches of whole texts, bounded
+        to about that many bytes, see result_cache.py and cache_info()
+        """
+        self._pattern = pattern
         self._greedy = greedy
+        self._backend = backend
+        self._multiline = multiline
+        self._ignore_case = ignore_case
+        self._max_dfa_states = max_dfa_states
+        self._cache = None
+        if cache_bytes is not None:
+            self._cache = ResultCache(cache_bytes)
+
+        self._ast = self._build_ast(self._pattern)
+        self._nfa = self._build_nfa(self._ast)
+        if max_nfa_states is not None:
+            nfa_states = count_nfa_states(self._nfa)
+            if nfa_states > max_nfa_states:
+                raise BudgetExceeded("the nfa has " + str(nfa_states) +
+                                     " states, over the budget of " +
+                                     str(max_nfa_states))
+        self._anchor = anchor_of(self._ast)
+        # a literal that every match contains, to skip ahead with find
+        self._literal = self._required_literal(self._ast)
+        # bounds on the length of a match, see lengths.py
+        self._min_length = min_match_length(self._nfa)
+        self._max_length = max_match_length(self._nfa)
+        self._plan = plan(self._ast, self._nfa, self._anchor, self._literal,
+                          (self._min_length, self._max_length),
+                          self.engines, engine)
+        self._engine = self._build_engine(self._plan.engine)
+        self._pike = None  # only built once a group is asked for
+        self._dfa = None  # only built for overlapped or budgeted searches
+        self._column_table = None  # only built by batch.match_column
+        self._reverse_engine = None
+        if self._anchor == 'end_text':
+            # Every match ends at the end of the text, so the leftmost one is
+            # found by a single longest match over the reversed text
+            self._reverse_engine = self._build_dfa_engine(
+                self._build_reverse_nfa(reverse(self._ast)))
 
-    def _build_nfa(self, pattern_str):
+    def _build_ast(self, pattern_str):
         tokenizer = Tokenizer(pattern_str)
-        parser = RegexParser(tokenizer)
-        return parser.construct_nfa()
+        parser = RegexParser(tokenizer, self._multiline, self._ignore_case)
+        return parser.construct_ast()
+
+    def _captures(self, text, start, end):
+        """ The capture slots of the match text[start:end], see
+        PikeVM.captures. The rewrite passes may move nodes across groups,
+        so the vm is built from a fresh, unoptimized parse of the pattern
+        """
+        if self._pike is None:
+            parser = RegexParser(Tokenizer(self._pattern), self._multiline,
+                                 self._ignore_case)
+            ast = parser.parse()
+            self._pike = PikeVM(ast, len(parser.groups), self._greedy)
+        return self._pike.captures(text, start, end)
+
+    def _build_nfa(self, ast):
+        return BACKENDS[self._backend](ast, IDAllocator())
+
+    def _build_reverse_nfa(self, reversed_ast):
+        return to_thompson(reversed_ast, IDAllocator())
+
+    def _required_literal(self, ast):
+        return required_literal(ast)
+
+    def _build_engine(self, name):
+        """ The engine is built once, and its caches are shared by every
+        search (and every thread) using this pattern
+        """
+        if name == 'literal':
+            return LiteralEngine(self._literal)
+        elif name == 'bitparallel':
+            return BitParallelEngine(self._ast, self._greedy)
+        elif name == 'lazy_dfa':
+            return self._build_dfa_engine(self._nfa, self._greedy)
+        elif name == 'codegen':
+            return CodegenEngine(self._nfa, self._ast, self._greedy,
+                                 isinstance(self.newline, bytes),
+                                 self._max_dfa_states or MAX_DFA_STATES)
+        return NFAEngine(self._nfa, self._greedy)
+
+    def _build_dfa_engine(self, nfa, greedy=True):
+        if self._max_dfa_states is None:
+            return LazyDFAEngine(nfa, greedy)
+        return LazyDFAEngine(nfa, greedy, self._max_dfa_states, strict=True)
+
+    def min_length(self):
+        """ The length of the shortest match, in chars (bytes for a
+        BytesRegex), or None when the pattern can't match anything
+        """
+        return self._min_length
+
+    def max_length(self):
+        """ The length of the longest match, or None when it is unbounded """
+        return self._max_length
+
+    def explain(self):
+        """ Describes the engine running the pattern, why it was chosen, and
+        what the planner measured to choose it
+        """
+        return "pattern: " + repr(self._pattern) + "\n" + str(self._plan)
 
     def find_match_at(self, search_space, start_idx=0):
         """ Returns match object
         """
-        runner = DFASimulator(self._nfa)
-        result = Match()
-        match = runner.check_match()
-
-        # the following checks must be done before the main loop in case the
-        # dfa has completed before any chars have been fed in.
-        # An example would be the pattern:
-        #   'a*' (with greedy set to false )
-        #   The above regex will be a match before any
-        #   characters from the search_string are fed in.
-
-        # only return early if not greedy
-        if match and not self._greedy:
-            return Match(search_space, 0, match, start_idx)
-        elif match:
-            result = Match(search_space, 0, match, start_idx)
-        if runner.check_finished():
-            return result
-
-        # main loop
-        for c in search_space:
-            runner.advance_state(c)
-            match = runner.check_match()
-            if match and not self._greedy:
-                return Match(search_space, 0, match, start_idx)
-            elif match:
-                result = Match(search_space, 0, match, start_idx)
-            if runner.check_finished():
-                break
-        # no more chars to feed runner; search over
-        return result
-
-    def find_all_matches(self, search_str):
-        result = []
-        for i in range(len(search_str)):
-            match = self.find_match_at(search_str[i:], i)
-            if match.has_value():
-                result.append(match)
-        return remove_overlaps(result)
-
-    def first_match(self, search_space):
-        for i in range(len(search_space)):
-            match = self.find_match_at(search_space[i:], i)
-            if(match.has_value()):
-                return match
-        return Match()
+        # Empty matches are never reported. An example would be the pattern
+        # 'a*', which matches before any chars have been fed in.
+        end = self._engine.match(search_space, 0)
+        if end is None:
+            return Match()
+        return Match(search_space, 0, end, start_idx, self._captures)
+
+    def _starts(self, text, pos, endpos):
+        """ The positions a match may start at, from pos up to endpos """
+        # a match needs at least one char, and min_length of them
+        endpos -= max(self._min_length, 1) - 1
+        if self._anchor == 'start_text':
+            return range(pos, min(1, endpos))
+        elif self._anchor == 'start_line':
+            return self._line_starts(text, pos, endpos)
+        elif self._plan.engine == 'codegen':
+            # only where the first char can start a match
+            return self._engine.starts(text, pos, endpos)
+        return range(pos, endpos)
+
+    def _line_starts(self, text, pos, endpos):
+        i = pos
+        if pos > 0 and text[pos - 1:pos] != self.newline:
+            i = text.find(self.newline, pos, endpos) + 1
+            if i == 0:
+                return
+        while i < endpos:
+            yield i
+            i = text.find(self.newline, i, endpos) + 1
+            if i == 0:
+                return
+
+    def _search(self, text, pos=0, endpos=None, budget=None):
+        """ Returns (start, end) of the leftmost match within
+        text[pos:endpos], or None. Assertions still see the chars around
+        pos and endpos. Every char read is charged to budget, if any
+        """
+        if endpos is None:
+            endpos = len(text)
+        if self._plan.engine == 'literal':
+            if budget is None:
+                return self._engine.search(text, pos, endpos)
+            return self._search_literal(text, pos, endpos, budget)
+        if self._min_length is None or endpos - pos < self._min_length:
+            return None
+        if self._literal is not None:
+            # every match contains the literal, so no match without it
+            found = text.find(self._literal, pos, endpos)
+            if found == -1:
+                return None
+            if self._max_length is not None and self._reverse_engine is None:
+                # a match ends past the literal, so it starts at most
+                # max_length chars before that
+                pos = max(pos, found + len(self._literal) - self._max_length)
+        if self._reverse_engine is not None:
+            # every match ends at the very end of the text
+            if endpos != len(text):
+                return None
+            if budget is None:
+                end = self._reverse_engine.match(text[::-1], 0,
+                                                 len(text) - pos)
+            else:
+                end = self._reverse_engine.match_budget(
+                    text[::-1], 0, len(text) - pos, budget)
+            if end is None:
+                return None
+            return (len(text) - end, len(text))
+        if budget is None:
+            if self._plan.engine == 'codegen' and self._anchor is None:
+                # the whole loop over the starts is generated code
+                return self._engine.search(text, pos, endpos)
+            for i in self._starts(text, pos, endpos):
+                end = self._engine.match(text, i, endpos)
+                if end is not None:
+                    return (i, end)
+            return None
+        # every attempt charges the chars it reads
+        match = self._dfa_engine().match_budget
+        for i in self._starts(text, pos, endpos):
+            end = match(text, i, endpos, budget)
+            if end is not None:
+                return (i, end)
+        return None
+
+    def _search_literal(self, text, pos, endpos, budget):
+        """ str.find over windows of the steps left before the budget must
+        be checked, so a long text is still stopped on time
+        """
+        search = self._engine.search
+        overlap = len(self._literal) - 1
+        while True:
+            stop = min(endpos, pos + budget.window() + overlap)
+            span = search(text, pos, stop)
+            if span is not None:
+                budget.charge(span[1], span[1] - pos)
+                return span
+            if stop == endpos:
+                budget.charge(endpos, endpos - pos)
+                return None
+            budget.charge(stop - overlap, stop - overlap - pos)
+            pos = stop - overlap
+
+    def _spans(self, text, pos=0, endpos=None, budget=None):
+        """ Yields the (start, end) of the leftmost, non-overlapping matches
+        in text[pos:endpos]. After a match, the search continues right after
+        its end. The spans of whole texts go through the result cache
+        """
+        key = None
+        if self._cache is not None and pos == 0 and endpos is None:
+            key = cache_key(text)
+        if key is None:
+            yield from self._scan(text, pos, endpos, budget)
+            return
+        spans = self._cache.get(key)
+        if spans is not None:
+            yield from spans
+            return
+        found = []
+        for span in self._scan(text, pos, endpos, budget):
+            found.append(span)
+            yield span
+        # only reached once the search is complete
+        self._cache.put(key, found)
+
+    def _scan(self, text, pos=0, endpos=None, budget=None):
+        if (budget is None and self._plan.engine == 'codegen' and
+                self._anchor is None):
+            # a single pass over the chunks of the text, see codegen.py
+            yield from self._engine.spans(text, pos, endpos)
+            return
+        if endpos is None:
+            endpos = len(text)
+        i = pos
+        while i < endpos:
+            span = self._search(text, i, endpos, budget)
+            if span is None:
+                return
+            yield span
+            i = span[1]
+
+    def find_all_matches(self, search_str, max_steps=None, timeout=None,
+                         partial=False, overlapped=False):
+        """ Returns the leftmost, non-overlapping matches in search_str. After
+        a match, the search continues right after the end of the match.
+        When overlapped, returns instead the match starting at every position
+        that has one, found in a single pass (see overlap.py).
+        A search taking more than max_steps steps or timeout seconds (see
+        budget.py) raises BudgetExceeded, or returns the matches found so far
+        when partial
+        """
+        budget = make_budget(max_steps, timeout)
+        matches = []
+        try:
+            if overlapped:
+                spans = overlapped_spans(self._overlapped_engine(),
+                                         search_str, budget=budget)
+            else:
+                spans = self._spans(search_str, budget=budget)
+            for start, end in spans:
+                matches.append(Match(search_str, start, end - start,
+                                     captures=self._captures))
+        except BudgetExceeded as error:
+            if overlapped:
+                matches = [Match(search_str, start, end - start,
+                                 captures=self._captures)
+                           for start, end in error.partial or []]
+            if not partial:
+                error.partial = matches
+                raise
+        return matches
+
+    def _dfa_engine(self):
+        """ The lazy dfa of the pattern, built on first use when another
+        engine was planned. Overlapped and budgeted searches run on it
+        """
+        if self._plan.engine == 'lazy_dfa':
+            return self._engine
+        if self._dfa is None:
+            self._dfa = self._build_dfa_engine(self._nfa, self._greedy)
+        return self._dfa
+
+    def _overlapped_engine(self):
+        return self._dfa_engine()
+
+    def count(self, text, max_steps=None, timeout=None, partial=False):
+        """ The number of matches find_all_matches would return, without
+        building any Match or span. The budget works as in find_all_matches
+        """
+        budget = make_budget(max_steps, timeout)
+        if budget is not None or self._cache is not None:
+            found = 0
+            try:
+                for _ in self._spans(text, budget=budget):
+                    found += 1
+            except BudgetExceeded as error:
+                if not partial:
+                    error.partial = found
+                    raise
+            return found
+        if (self._anchor is not None or self._literal is not None or
+                self._plan.engine == 'codegen'):
+            # skipping ahead with find beats trying every position
+            return sum(1 for _ in self._spans(text))
+        if self._min_length is None:
+            return 0
+        match = self._engine.match
+        # no match starts within min_length of the end
+        length = len(text) - max(self._min_length, 1) + 1
+        found = 0
+        i = 0
+        while i < length:
+            end = match(text, i)
+            if end is None:
+                i += 1
+            else:
+                found += 1
+                i = end
+        return found
+
+    def cache_info(self):
+        """ The hits, misses, evictions, entries and estimated bytes of the
+        result cache, or None when there is no cache
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def sub(self, repl, text, count=0, sink=None, max_steps=None,
+            timeout=None):
+        """ Returns text with its first count matches (all of them when 0)
+        replaced by repl. repl is a string, where '\\1' or '\\g<1>' is
+        replaced by a group, or a function taking a Match and returning its
+        replacement. When sink (anything with a write method) is given, the
+        output is written to it as it is built and None is returned.
+        A search over budget (see find_all_matches) raises BudgetExceeded
+        """
+        return substitute(self, repl, text, count, sink,
+                          make_budget(max_steps, timeout))[0]
+
+    def subn(self, repl, text, count=0, sink=None, max_steps=None,
+             timeout=None):
+        """ Like sub, but returns (output, number of replacements) """
+        return substitute(self, repl, text, count, sink,
+                          make_budget(max_steps, timeout))
+
+    def split(self, text, maxsplit=0, sink=None, max_steps=None,
+              timeout=None):
+        """ Returns the pieces of text between the matches, splitting at most
+        maxsplit times when it isn't 0. When sink is given, it is called with
+        every piece instead and None is returned. A search over budget (see
+        find_all_matches) raises BudgetExceeded
+        """
+        return split(self, text, maxsplit, sink,
+                     make_budget(max_steps, timeout))
+
+    def matching_lines(self, text, max_steps=None, timeout=None):
+        """ Yields (line number, start, end) for every line of text, from 1
+        and without its newline, that holds a match. Each line is searched on
+        its own, as if it was the whole text (except for '^' and '$' when not
+        multiline, which still only match at the edges of the text).
+        A search over budget (see find_all_matches) raises BudgetExceeded
+        """
+        return matching_lines(self, text,
+                              budget=make_budget(max_steps, timeout))
+
+    def incremental(self, text, interval=DEFAULT_INTERVAL):
+        """ Returns an IncrementalMatcher holding the matches of text, that
+        keeps them up to date through its edit(start, end, new) method by
+        only scanning again around the edits
+        """
+        return IncrementalMatcher(self, text, interval)
+
+    def first_match(self, search_space, max_steps=None, timeout=None):
+        """ The leftmost match, or an empty Match. The budget works as in
+        find_all_matches
+        """
+        span = self._search(search_space,
+                            budget=make_budget(max_steps, timeout))
+        if span is None:
+            return Match()
+        start, end = span
+        return Match(search_space, start, end - start,
+                     captures=self._captures)
+
+    def afinditer(self, stream, **kwargs):
+        """ Async iterator over the matches in an asyncio stream, see
+        aio.afinditer for the options
+        """
+        return afinditer(self, stream, **kwargs)
 
     # def is_match(self, search_space):
     #     match = self.find_match_at(search_space)
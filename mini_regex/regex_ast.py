@@ -0,0 +1,148 @@
+""" Abstract syntax tree for regular expressions
+
+The parser no longer builds automata directly. Instead it produces a tree of
+the nodes below, which can be simplified by the passes in rewrites.py before
+being lowered into an NFA (see lowering.py).
+"""
+
+
+class Node:
+    """ Base class for all ast nodes. Two nodes are equal when they have the
+    same type and the same fields, which keeps the rewrite passes easy to test
+    """
+    def __eq__(self, other):
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        fields = ", ".join(repr(val) for val in vars(self).values())
+        return type(self).__name__ + "(" + fields + ")"
+
+    def children(self):
+        return []
+
+
+class Empty(Node):
+    """ Matches the empty string. Only produced by the rewrite passes """
+    pass
+
+
+class Literal(Node):
+    def __init__(self, char):
+        self.char = char
+
+
+class String(Node):
+    """ A run of adjacent literals, ex) 'abc' """
+    def __init__(self, chars):
+        self.chars = chars
+
+
+class LiteralSet(Node):
+    """ An alternation made up only of literal words, ex) 'cat|dog|cow'.
+    Lowered into a trie instead of a chain of unions
+    """
+    def __init__(self, words):
+        self.words = words
+
+
+class AnyChar(Node):
+    """ The '.' metachar """
+    pass
+
+
+class CharClass(Node):
+    """ items is a list of single chars and (start, end) range tuples """
+    def __init__(self, items, negate=False, ignore_case=False):
+        self.items = items
+        self.negate = negate
+        self.ignore_case = ignore_case
+
+
+class Assert(Node):
+    """ A zero-width assertion ('^', '$', '\\b', '\\B'). kind is one of
+    the keys of transitions.ASSERTIONS
+    """
+    def __init__(self, kind):
+        self.kind = kind
+
+
+class Concat(Node):
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def children(self):
+        return self.nodes
+
+
+class Alternate(Node):
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def children(self):
+        return self.nodes
+
+
+class Repeat(Node):
+    """ op is one of '*', '+', '?' """
+    def __init__(self, node, op):
+        self.node = node
+        self.op = op
+
+    def children(self):
+        return [self.node]
+
+
+class Group(Node):
+    """ A parenthesized sub expression. index is the number of the capture
+    group, counting opening parentheses from 1
+    """
+    def __init__(self, node, index=None):
+        self.node = node
+        self.index = index
+
+    def children(self):
+        return [self.node]
+
+
+def is_literal(node):
+    return isinstance(node, (Literal, String))
+
+
+def literal_text(node):
+    """ Returns the string matched by a Literal or String node """
+    if isinstance(node, Literal):
+        return node.char
+    return node.chars
+
+
+def assertion_kinds(node):
+    """ The set of the kinds of every Assert in the tree """
+    kinds = set()
+    frontier = [node]
+    while frontier:
+        node = frontier.pop()
+        if isinstance(node, Assert):
+            kinds.add(node.kind)
+        frontier.extend(node.children())
+    return kinds
+
+
+def required_literal(node):
+    """ The longest literal string that every match of node contains, or
+    None. Searching for it with str.find skips over text that can't match
+    """
+    if is_literal(node):
+        return literal_text(node)
+    elif isinstance(node, Group):
+        return required_literal(node.node)
+    elif isinstance(node, Repeat) and node.op == '+':
+        return required_literal(node.node)
+    elif isinstance(node, Concat):
+        literals = [required_literal(child) for child in node.nodes]
+        literals = [literal for literal in literals if literal]
+        if literals:
+            return max(literals, key=len)
+    return None
@@ -0,0 +1,112 @@
+from mini_regex.match import Match
+
+""" Replacing and splitting on the matches of a pattern
+
+Both run over the matches in a single left to right pass and never build a
+list of the matches. The pieces of the output are either collected and
+joined once at the end, or written to a file-like sink as soon as they are
+known, so memory only grows with the output.
+"""
+
+
+def parse_template(repl):
+    """ Splits a replacement string into a list of literal strings and group
+    numbers. '\\1' to '\\9' and '\\g<n>' refer to groups, '\\\\' is a
+    backslash, any other backslash is kept as is
+    """
+    parts = []
+    literal = []
+    i = 0
+    while i < len(repl):
+        char = repl[i]
+        nxt = repl[i + 1:i + 2]
+        if char == '\\' and nxt.isdigit():
+            parts.append(''.join(literal))
+            parts.append(int(nxt))
+            literal = []
+            i += 2
+        elif char == '\\' and nxt == 'g' and repl[i + 2:i + 3] == '<':
+            close = repl.find('>', i)
+            if close == -1 or not repl[i + 3:close].isdigit():
+                raise Exception("bad group reference at pos: " + str(i))
+            parts.append(''.join(literal))
+            parts.append(int(repl[i + 3:close]))
+            literal = []
+            i = close + 1
+        elif char == '\\' and nxt == '\\':
+            literal.append('\\')
+            i += 2
+        else:
+            literal.append(char)
+            i += 1
+    parts.append(''.join(literal))
+    return [part for part in parts if part != '']
+
+
+def make_replacer(regex, repl):
+    """ Returns f(text, start, end) -> the replacement of text[start:end].
+    repl is a string (that may refer to groups) or a function taking a
+    Match. A Match is only built when the replacement needs one
+    """
+    if callable(repl):
+        def replace_with_function(text, start, end):
+            return repl(Match(text, start, end - start,
+                              captures=regex._captures))
+        return replace_with_function
+
+    parts = parse_template(repl) if isinstance(repl, str) else [repl]
+    if all(not isinstance(part, int) for part in parts):
+        constant = repl[:0].join(parts)
+        return lambda text, start, end: constant
+
+    def replace_with_template(text, start, end):
+        match = Match(text, start, end - start, captures=regex._captures)
+        return ''.join(part if not isinstance(part, int)
+                       else match.group(part) or '' for part in parts)
+    return replace_with_template
+
+
+def substitute(regex, repl, text, count=0, sink=None, budget=None):
+    """ Returns (output, number of replacements). When sink is given the
+    output is written to it piece by piece, and None is returned instead.
+    The search is charged to budget, if any
+    """
+    replace = make_replacer(regex, repl)
+    pieces = []
+    write = pieces.append if sink is None else sink.write
+    replaced = 0
+    last = 0
+    for start, end in regex._spans(text, budget=budget):
+        if start > last:
+            write(text[last:start])
+        write(replace(text, start, end))
+        last = end
+        replaced += 1
+        if replaced == count:
+            break
+    if last < len(text):
+        write(text[last:])
+    if sink is not None:
+        return None, replaced
+    return text[:0].join(pieces), replaced
+
+
+def split(regex, text, maxsplit=0, sink=None, budget=None):
+    """ Returns the list of the pieces of text between the matches, or, when
+    sink is given, calls sink(piece) for every piece and returns None. The
+    search is charged to budget, if any
+    """
+    pieces = []
+    write = pieces.append if sink is None else sink
+    splits = 0
+    last = 0
+    for start, end in regex._spans(text, budget=budget):
+        write(text[last:start])
+        last = end
+        splits += 1
+        if splits == maxsplit:
+            break
+    write(text[last:])
+    if sink is not None:
+        return None
+    return pieces
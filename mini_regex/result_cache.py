@@ -0,0 +1,102 @@
+import hashlib
+import sys
+import threading
+
+""" Remembering the matches of texts that come back
+
+    regex = MiniRegex("Mozilla/[0-9.]+", cache_bytes=1 << 20)
+    regex.find_all_matches(user_agent)  # searched once, then a dict lookup
+    regex.cache_info()  # {'hits': ..., 'misses': ..., ...}
+
+The spans of the leftmost, non-overlapping matches of a whole text are kept
+under the text itself, or under a digest of it when it is longer than
+HASH_ABOVE chars, so that large texts don't stay alive in the cache. A hit
+runs no engine at all: the spans are read back and turned into Matches.
+
+The cache holds at most max_bytes, estimated from the size of the keys and
+of the spans, and evicts the least recently used texts first. Only complete
+results are stored: a search stopped by its budget, or by its caller,
+leaves nothing behind. Mutable texts (a bytearray) are never cached.
+
+A compiled pattern can be shared by threads, so the cache and its stats
+are guarded by a lock. It is only held for the dict operations, never
+while searching.
+"""
+
+# Texts longer than this are keyed by their digest
+HASH_ABOVE = 256
+# The estimated size of a span and of the bookkeeping of an entry
+SPAN_BYTES = sys.getsizeof((0, 0)) + 2 * sys.getsizeof(1 << 20)
+ENTRY_BYTES = 100
+
+
+def cache_key(text):
+    """ The key of text, or None when it can't be cached """
+    if isinstance(text, str):
+        if len(text) <= HASH_ABOVE:
+            return text
+        data = text.encode('utf-8', 'surrogatepass')
+    elif isinstance(text, bytes):
+        if len(text) <= HASH_ABOVE:
+            return text
+        data = text
+    else:
+        return None
+    # the type and length are part of the key, the digest is of the rest
+    return (type(text), len(text), hashlib.blake2b(data, digest_size=16)
+            .digest())
+
+
+class ResultCache:
+    """ A bounded lru map from texts to the spans of their matches """
+    def __init__(self, max_bytes):
+        if max_bytes <= 0:
+            raise Exception("the cache size must be positive")
+        self.max_bytes = max_bytes
+        self.size = 0  # the estimated bytes held
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (spans, size). dicts keep their insertion order, so the
+        # first key is the least recently used
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ The spans stored under key, or None """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+        return entry[0]
+
+    def put(self, key, spans):
+        spans = tuple(spans)
+        size = ENTRY_BYTES + sys.getsizeof(key) + SPAN_BYTES * len(spans)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (spans, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self.size -= self._entries.pop(oldest)[1]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self.size,
+                    'max_bytes': self.max_bytes}
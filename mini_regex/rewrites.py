@@ -0,0 +1,341 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    CharClass,
+    Assert,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+    is_literal,
+    literal_text,
+)
+from mini_regex.transitions import has_case
+
+""" Optimization passes over the regex ast
+
+Every pass takes a tree and returns a new (or the same) tree that matches the
+exact same language. Groups are treated as boundaries: a pass may rewrite what
+is inside of a group, but never moves nodes in or out of one.
+"""
+
+
+def optimize(node):
+    """ Runs all of the rewrite passes in order """
+    node = collapse_repeats(node)
+    node = merge_literals(node)
+    node = collect_literal_sets(node)
+    node = factor_prefixes(node)
+    node = fold_char_alternations(node)
+    return node
+
+
+def transform(node, func):
+    """ Rebuilds the tree bottom up, applying func to every node after its
+    children have been transformed
+    """
+    if isinstance(node, Concat):
+        node = Concat([transform(child, func) for child in node.nodes])
+    elif isinstance(node, Alternate):
+        node = Alternate([transform(child, func) for child in node.nodes])
+    elif isinstance(node, Repeat):
+        node = Repeat(transform(node.node, func), node.op)
+    elif isinstance(node, Group):
+        node = Group(transform(node.node, func), node.index)
+    return func(node)
+
+
+def make_concat(nodes):
+    """ Builds a Concat, flattening nested concats and dropping empties """
+    flat = []
+    for node in nodes:
+        if isinstance(node, Concat):
+            flat.extend(node.nodes)
+        elif not isinstance(node, Empty):
+            flat.append(node)
+    if len(flat) == 0:
+        return Empty()
+    elif len(flat) == 1:
+        return flat[0]
+    return Concat(flat)
+
+
+def make_alternate(nodes):
+    """ Builds an Alternate, flattening nested alternates. An empty branch
+    makes the rest of the alternation optional: 'ab|' -> '(ab)?'
+    """
+    flat = []
+    has_empty = False
+    for node in nodes:
+        if isinstance(node, Alternate):
+            flat.extend(node.nodes)
+        elif isinstance(node, Empty):
+            has_empty = True
+        else:
+            flat.append(node)
+
+    if len(flat) == 0:
+        return Empty()
+    result = flat[0] if len(flat) == 1 else Alternate(flat)
+    if has_empty:
+        return make_repeat(result, '?')
+    return result
+
+
+def make_repeat(node, op):
+    if isinstance(node, Empty):
+        return node
+    return collapse_repeat(Repeat(node, op))
+
+
+def make_literal(text):
+    if len(text) == 0:
+        return Empty()
+    elif len(text) == 1:
+        return Literal(text)
+    return String(text)
+
+
+# --- (a*)* -> a* ---
+
+def combine_ops(inner, outer):
+    """ Repeating a repeat: equal ops collapse to themselves ('(a+)+' is 'a+')
+    and every other mix of '*', '+' and '?' is equivalent to '*'
+    """
+    if inner == outer:
+        return inner
+    return '*'
+
+
+def collapse_repeat(node):
+    if not isinstance(node, Repeat):
+        return node
+    inner = node.node
+    if isinstance(inner, Repeat):
+        return Repeat(inner.node, combine_ops(inner.op, node.op))
+    elif isinstance(inner, Group) and isinstance(inner.node, Repeat):
+        op = combine_ops(inner.node.op, node.op)
+        return Group(Repeat(inner.node.node, op), inner.index)
+    return node
+
+
+def collapse_repeats(node):
+    return transform(node, collapse_repeat)
+
+
+# --- 'a' 'b' 'c' -> 'abc' ---
+
+def merge_concat_literals(node):
+    if not isinstance(node, Concat):
+        return node
+    node = make_concat(node.nodes)
+    if not isinstance(node, Concat):
+        return node
+
+    merged = []
+    pending = []
+    for child in node.nodes:
+        if is_literal(child):
+            pending.append(literal_text(child))
+        else:
+            if pending:
+                merged.append(make_literal(''.join(pending)))
+                pending = []
+            merged.append(child)
+    if pending:
+        merged.append(make_literal(''.join(pending)))
+    return make_concat(merged)
+
+
+def merge_literals(node):
+    return transform(node, merge_concat_literals)
+
+
+# --- 'cat|dog|cow' -> LiteralSet(['cat', 'dog', 'cow']) ---
+
+def collect_literal_set(node):
+    """ Gathers the multi-char literal branches of an alternation into one
+    LiteralSet, which is lowered into a trie. Single chars are left for
+    fold_char_alternations, which turns them into a class
+    """
+    if not isinstance(node, Alternate):
+        return node
+    words = [literal_text(child) for child in node.nodes
+             if is_literal(child) and len(literal_text(child)) > 1]
+    if len(words) < 2:
+        return node
+
+    # the set takes the place of the first word in the alternation
+    literal_set = LiteralSet(list(dict.fromkeys(words)))
+    branches = []
+    for child in node.nodes:
+        if not is_literal(child) or len(literal_text(child)) == 1:
+            branches.append(child)
+        elif literal_set:
+            branches.append(literal_set)
+            literal_set = None
+    return make_alternate(branches)
+
+
+def collect_literal_sets(node):
+    return transform(node, collect_literal_set)
+
+
+# --- 'abc|abd' -> 'ab(c|d)' ---
+
+def leading_text(node):
+    """ The literal text that every match of node must start with, as far as
+    it can be read off of the first element of the node
+    """
+    if is_literal(node):
+        return literal_text(node)
+    elif isinstance(node, Concat) and is_literal(node.nodes[0]):
+        return literal_text(node.nodes[0])
+    return ''
+
+
+def strip_prefix(node, length):
+    """ Removes the first length chars from a node's leading literal """
+    if is_literal(node):
+        return make_literal(literal_text(node)[length:])
+    rest = make_literal(literal_text(node.nodes[0])[length:])
+    return make_concat([rest] + node.nodes[1:])
+
+
+def common_prefix(strings):
+    prefix = strings[0]
+    for string in strings[1:]:
+        length = 0
+        limit = min(len(prefix), len(string))
+        while length < limit and prefix[length] == string[length]:
+            length += 1
+        prefix = prefix[:length]
+    return prefix
+
+
+def factor_branches(branches):
+    """ Only adjacent branches are factored together, so the relative order of
+    the branches is preserved
+    """
+    result = []
+    i = 0
+    while i < len(branches):
+        lead = leading_text(branches[i])
+        j = i + 1
+        while (lead and j < len(branches) and
+               leading_text(branches[j])[:1] == lead[:1]):
+            j += 1
+
+        if j - i == 1:
+            result.append(branches[i])
+        else:
+            run = branches[i:j]
+            prefix = common_prefix([leading_text(node) for node in run])
+            suffixes = [strip_prefix(node, len(prefix)) for node in run]
+            factored = make_alternate(factor_branches(suffixes))
+            result.append(make_concat([make_literal(prefix), factored]))
+        i = j
+    return result
+
+
+def factor_alternate(node):
+    if not isinstance(node, Alternate):
+        return node
+    return make_alternate(factor_branches(node.nodes))
+
+
+def factor_prefixes(node):
+    return transform(node, factor_alternate)
+
+
+# --- 'a|b|[c-e]' -> '[abc-e]' ---
+
+def is_single_char(node):
+    return (isinstance(node, Literal) or
+            (isinstance(node, CharClass) and not node.negate))
+
+
+def fold_alternate_chars(node):
+    if not isinstance(node, Alternate):
+        return node
+    singles = [child for child in node.nodes if is_single_char(child)]
+    if len(singles) < 2:
+        return node
+
+    items = []
+    for child in singles:
+        if isinstance(child, Literal):
+            items.append(child.char)
+        else:
+            items.extend(child.items)
+    # fold_case leaves no cased literal behind, so the merged class ignores
+    # case exactly when its classes did
+    folded = CharClass(items, False,
+                       any(isinstance(child, CharClass) and child.ignore_case
+                           for child in singles))
+
+    branches = []
+    for child in node.nodes:
+        if not is_single_char(child):
+            branches.append(child)
+        elif child is singles[0]:
+            branches.append(folded)
+    return make_alternate(branches)
+
+
+def fold_char_alternations(node):
+    return transform(node, fold_alternate_chars)
+
+
+def fold_case_node(node):
+    if isinstance(node, Literal):
+        if has_case(node.char):
+            return CharClass([node.char], False, True)
+    elif isinstance(node, String):
+        return make_concat([fold_case_node(Literal(char))
+                            for char in node.chars])
+    elif isinstance(node, LiteralSet):
+        return Alternate([fold_case_node(String(word))
+                          for word in node.words])
+    elif isinstance(node, CharClass):
+        return CharClass(node.items, node.negate, True)
+    return node
+
+
+def fold_case(node):
+    """ Not an optimization: turns the tree into its case insensitive
+    version, by replacing every cased literal and every class with a case
+    folded class. Matching then costs the same as without ignore_case, and
+    the text never has to be lowered
+    """
+    return transform(node, fold_case_node)
+
+
+MIRRORED_ASSERTIONS = {
+    'start_text': 'end_text',
+    'end_text': 'start_text',
+    'start_line': 'end_line',
+    'end_line': 'start_line',
+}
+
+
+def reverse_node(node):
+    if isinstance(node, Concat):
+        return Concat(node.nodes[::-1])
+    elif isinstance(node, String):
+        return String(node.chars[::-1])
+    elif isinstance(node, LiteralSet):
+        return LiteralSet([word[::-1] for word in node.words])
+    elif isinstance(node, Assert):
+        return Assert(MIRRORED_ASSERTIONS.get(node.kind, node.kind))
+    return node
+
+
+def reverse(node):
+    """ Returns a tree matching the reverse of every string node matches.
+    Not an optimization by itself: it lets a pattern anchored at the end of
+    the text be searched with a single pass from the end
+    """
+    return transform(node, reverse_node)
@@ -0,0 +1,161 @@
+from mini_regex.dfa import epsilon_closure, has_assertions
+from mini_regex.match import Match
+from mini_regex.transitions import char_kind, EDGE
+
+
+class ThreadScanner:
+    """ Finds the same matches as MiniRegex.find_all_matches, but reads its
+    input one chunk at a time and keeps the state of the automata between
+    chunks.
+
+    Instead of running a new simulation from every offset, every offset adds
+    a "thread" to one shared simulation. Each active nfa state remembers the
+    leftmost offset that reached it: a later offset in the same state can
+    only produce the same matches, starting further right, so it is dropped.
+    Once a match is found, threads that started after it are killed, and the
+    match is reported as soon as no thread that started at or before it is
+    still alive. Scanning then resumes right after the match.
+
+    Only the text that may still be part of a match is buffered.
+
+    Threads are only checked for a match once the next char (or the end of
+    the input) is known, as assertions like $ and \\b depend on it.
+
+    captures is passed on to the Matches, see Match
+    """
+    def __init__(self, nfa, greedy=True, captures=None):
+        self.nfa = nfa
+        self.greedy = greedy
+        self.captures = captures
+        self.finals = set(nfa.finals)
+        self.has_assertions = has_assertions(nfa)
+        self.start_closure = list(epsilon_closure([nfa.start]))
+        self._closures = {}
+        self._context_closures = {}
+
+        self.buffer = ''
+        self.base = 0  # offset of buffer[0] in the whole input
+        self.pos = 0  # offset of the next char to scan
+        self.threads = {}  # nfa state -> offset its thread started at
+        self.best = None  # (start, end) of the current leftmost match
+        self.prev_kind = EDGE  # char_kind of the char before pos
+
+    def closure(self, node, context=None):
+        if context is None:
+            closures = self._closures
+        else:
+            closures = self._context_closures.setdefault(context, {})
+        closure = closures.get(node)
+        if closure is None:
+            closure = list(epsilon_closure([node], context))
+            closures[node] = closure
+        return closure
+
+    def feed(self, chunk):
+        """ Scans chunk, returns a list of the matches that have been fully
+        decided so far
+        """
+        self.buffer += chunk
+        matches = self._scan(eof=False)
+        self._trim()
+        return matches
+
+    def finish(self):
+        """ Call after the last chunk. Returns the remaining matches """
+        matches = self._scan(eof=True)
+        self._trim()
+        return matches
+
+    def _trim(self):
+        keep = self.pos
+        if self.best:
+            keep = min(keep, self.best[0])
+        if self.threads:
+            # the first thread is always the leftmost one
+            keep = min(keep, next(iter(self.threads.values())))
+        # and the char before, that the assertions of captures look at
+        keep -= 1
+        if keep - self.base > len(self.buffer) // 2:
+            self.buffer = self.buffer[keep - self.base:]
+            self.base = keep
+
+    def _emit(self, matches):
+        start, end = self.best
+        matches.append(Match(self.buffer, start - self.base, end - start,
+                             self.base, self.captures))
+        # Threads that started after the match were killed, so the text after
+        # the match is scanned again
+        self.best = None
+        self.threads = {}
+        self.pos = end
+        self.prev_kind = char_kind(self.buffer[end - 1 - self.base])
+
+    def _scan(self, eof):
+        matches = []
+        limit = self.base + len(self.buffer)
+        while True:
+            if self.best and not self.threads:
+                # every thread that could change the match has died
+                self._emit(matches)
+            elif self.pos < limit:
+                self._step(self.buffer[self.pos - self.base])
+            elif eof and self.threads:
+                # check the threads against the end of the input
+                self._step(None)
+            else:
+                return matches
+
+    def _step(self, char):
+        """ Checks the threads for a match ending at pos, then eats char.
+        char is None at the end of the input
+        """
+        pos = self.pos
+        threads = self.threads
+        if self.best is None:
+            for node in self.start_closure:
+                if node not in threads:
+                    threads[node] = pos
+
+        if self.has_assertions:
+            # now that the next char is known, follow the assertions
+            context = (self.prev_kind, char_kind(char))
+            closed = {}
+            for node, start in threads.items():
+                for reached in self.closure(node, context):
+                    if reached not in closed:
+                        closed[reached] = start
+            threads = closed
+
+        # threads that started at pos haven't eaten anything yet, and empty
+        # matches are never reported
+        matched = [threads[node] for node in self.finals
+                   if node in threads and threads[node] < pos]
+        if matched:
+            start = min(matched)
+            if self.best is None or start <= self.best[0]:
+                self.best = (start, pos)
+
+        if self.best:
+            # Threads that started after the match can't be leftmost anymore.
+            # When not greedy, the match is also as short as it gets. So only
+            # threads that could still change the match are kept
+            best_start = self.best[0]
+            threads = {
+                node: start for node, start in threads.items()
+                if start < best_start or (self.greedy and start == best_start)
+            }
+
+        if char is None:
+            self.threads = {}
+            return
+        # threads are kept in order of their start offset, so the first
+        # thread to reach a state is always the leftmost one
+        next_threads = {}
+        for node, start in threads.items():
+            for dst in node.available_cost_paths(char):
+                for reached in self.closure(dst):
+                    if reached not in next_threads:
+                        next_threads[reached] = start
+        self.threads = next_threads
+        self.pos = pos + 1
+        self.prev_kind = char_kind(char)
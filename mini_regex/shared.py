@@ -0,0 +1,252 @@
+from array import array
+from multiprocessing import shared_memory
+
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.dfa import build_match_dfa, MAX_DFA_STATES
+from mini_regex.literal import LiteralEngine
+from mini_regex.planner import Plan
+from mini_regex.result_cache import ResultCache
+from mini_regex.transitions import char_kind, EDGE
+
+""" Sharing a compiled pattern between processes
+
+    shared = share(BytesRegex("user=[a-z]+"))  # in the parent
+    regex = attach(shared.name)                # in any worker
+    regex.find_all_matches(data)
+    shared.unlink()                            # once the workers are done
+
+share() builds the whole dfa of a BytesRegex ahead of time (its alphabet is
+the 256 bytes, so the dfa is finite and known up front) and lays it out in a
+multiprocessing.shared_memory segment. attach() maps the segment and reads
+the tables in place through memoryviews: no parsing, no nfa, no copy, and
+every worker shares the same physical pages.
+
+The layout is native-endian, as the segment never leaves the machine:
+
+    header          HEADER_INTS int32, see share()
+    table           states x 256 int32, see SharedDFAEngine
+    accept_end      states bytes
+    literal         the required literal (see regex_ast.required_literal)
+
+The table has a column per byte instead of per char class, so a step is a
+single lookup, at the cost of memory.
+
+Lazily built dfas can't be shared this way, so patterns whose dfa has more
+than max_states states can't be shared.
+"""
+
+MAGIC = 0x4D524446
+HEADER_INTS = 13
+ANCHORS = (None, 'start_text', 'start_line', 'end_text')
+
+
+class SharedDFAEngine:
+    """ Runs the flat table of a shared dfa, like LazyDFAEngine.match, on
+    bytes (or anything that gives ints when indexed, like mmaps).
+
+    A state is its row in the table, state * 256, and table[row + byte] is
+    the row of the next state times 2, plus 1 when the state holds a match
+    ending right before byte
+    """
+    def __init__(self, table, accept_end, starts, greedy):
+        self.table = table
+        self.accept_end = accept_end
+        self.starts = starts  # row of the start state, by char_kind
+        self.greedy = greedy
+
+    def match(self, text, pos=0, endpos=None):
+        if endpos is None:
+            endpos = len(text)
+        table = self.table
+        row = self.starts[char_kind(text[pos - 1]) if pos > 0 else EDGE]
+        result = None
+        for i in range(pos, endpos):
+            cell = table[row + text[i]]
+            if cell & 1 and i > pos:
+                if not self.greedy:
+                    return i
+                result = i
+            row = cell >> 1
+            if row == 0:  # the dead state
+                return result
+        if endpos > pos:
+            if endpos < len(text):
+                accepting = table[row + text[endpos]] & 1
+            else:
+                accepting = self.accept_end[row >> 8]
+            if accepting:
+                result = endpos
+        return result
+
+
+    def match_budget(self, text, pos, endpos, budget):
+        """ match, charging budget a step per byte read, see
+        LazyDFAEngine.match_budget
+        """
+        if endpos is None:
+            endpos = len(text)
+        table = self.table
+        row = self.starts[char_kind(text[pos - 1]) if pos > 0 else EDGE]
+        result = None
+        left = budget.next_check - budget.steps
+        i = pos
+        while i < endpos:
+            left -= 1
+            if left <= 0:
+                budget.steps = budget.next_check - left
+                budget.check(i)
+                left = budget.next_check - budget.steps
+            cell = table[row + text[i]]
+            if cell & 1 and i > pos:
+                result = i
+                if not self.greedy:
+                    break
+            row = cell >> 1
+            if row == 0:  # the dead state
+                break
+            i += 1
+        else:
+            if endpos > pos:
+                if endpos < len(text):
+                    accepting = table[row + text[endpos]] & 1
+                else:
+                    accepting = self.accept_end[row >> 8]
+                if accepting:
+                    result = endpos
+        budget.steps = budget.next_check - left
+        return result
+
+
+class SharedPattern:
+    """ The segment holding a shared pattern, owned by the process that
+    shared it
+    """
+    def __init__(self, memory):
+        self.memory = memory
+        self.name = memory.name
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        """ Frees the segment, once no worker needs to attach anymore """
+        self.memory.close()
+        self.memory.unlink()
+
+
+def share(regex, max_states=MAX_DFA_STATES):
+    """ Copies the dfa of a BytesRegex into a new shared memory segment and
+    returns its SharedPattern. Raises when the dfa has more than max_states
+    states
+    """
+    if not isinstance(regex, BytesRegex):
+        raise Exception("only a BytesRegex can be shared")
+    dfa = build_match_dfa(regex._nfa, range(256), max_states)
+    states = len(dfa.transitions)
+    literal = regex._literal or b''
+    header = [MAGIC, states, int(regex._greedy), int(regex._multiline),
+              ANCHORS.index(regex._anchor),
+              int(regex._plan.engine == 'literal'), len(literal),
+              -1 if regex._min_length is None else regex._min_length,
+              -1 if regex._max_length is None else regex._max_length]
+    header.extend(start * 256 for start in dfa.starts)
+    table = array('i', header)
+    for state in range(states):
+        transitions = dfa.transitions[state]
+        accept_before = dfa.accept_before[state]
+        for byte in range(256):
+            char_class = dfa.class_of[byte]
+            table.append((transitions[char_class] * 256 << 1) |
+                         accept_before[char_class])
+
+    data = table.tobytes() + bytes(dfa.accept_end) + literal
+    memory = shared_memory.SharedMemory(create=True, size=len(data))
+    memory.buf[:len(data)] = data
+    return SharedPattern(memory)
+
+
+def open_segment(name):
+    """ On python < 3.13 attaching registers the segment with the resource
+    tracker, which is shared with the parent in worker processes
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedRegex(MiniRegex):
+    """ A BytesRegex attached to a shared pattern. Searching works the same,
+    but capture groups aren't available
+    """
+    newline = b'\n'
+
+    def __init__(self, name, cache_bytes=None):
+        """ cache_bytes works as in MiniRegex, each process has its own
+        cache
+        """
+        self._memory = open_segment(name)
+        buf = self._memory.buf
+        header = buf[:4 * HEADER_INTS].cast('i')
+        if header[0] != MAGIC:
+            raise Exception("not a shared pattern: " + name)
+        (states, greedy, multiline, anchor, literal_only,
+         literal_length, min_length, max_length) = header[1:9]
+        starts = list(header[9:13])
+        header.release()
+
+        table_end = 4 * (HEADER_INTS + 256 * states)
+        ints = buf[:table_end].cast('i')
+        table = ints[HEADER_INTS:]
+        flags_end = table_end + states
+        accept_end = buf[table_end:flags_end]
+        # views into the segment, released before it is closed
+        self._views = [table, accept_end, ints]
+
+        self._greedy = bool(greedy)
+        self._multiline = bool(multiline)
+        self._anchor = ANCHORS[anchor]
+        self._min_length = None if min_length == -1 else min_length
+        self._max_length = None if max_length == -1 else max_length
+        self._literal = bytes(buf[flags_end:flags_end + literal_length])
+        self._literal = self._literal or None
+        self._reverse_engine = None
+        self._pike = None
+        self._cache = None
+        if cache_bytes is not None:
+            self._cache = ResultCache(cache_bytes)
+        if literal_only:
+            self._plan = Plan('literal', "the pattern is a plain string", [])
+            self._engine = LiteralEngine(self._literal)
+        else:
+            self._plan = Plan('shared_dfa', "it was shared", [])
+            self._engine = SharedDFAEngine(table, accept_end, starts,
+                                           self._greedy)
+
+    def close(self):
+        """ The regex can't be used anymore once closed """
+        self._engine = None
+        for view in self._views:
+            view.release()
+        self._memory.close()
+
+    def explain(self):
+        return "shared pattern: " + self._memory.name + "\n" + str(self._plan)
+
+    def _captures(self, text, start, end):
+        raise Exception("capture groups are not supported on a shared regex")
+
+    def _dfa_engine(self):
+        return self._engine
+
+    def _overlapped_engine(self):
+        raise Exception("overlapped matches need the nfa, use a BytesRegex")
+
+    def afinditer(self, stream, **kwargs):
+        raise Exception("afinditer decodes its input, use a MiniRegex")
+
+
+def attach(name):
+    """ Returns a SharedRegex searching with the pattern shared under name """
+    return SharedRegex(name)
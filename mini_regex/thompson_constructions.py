@@ -1,5 +1,6 @@
 from mini_regex.nfa import NFAState, NFA
 from mini_regex.transitions import (
+    create_char_trans,
     create_epsilon_trans,
 )
 
@@ -49,6 +50,46 @@ def union(graph1, graph2, id_alloc):
     return NFA(new_start, new_end)
 
 
+def union_all(graphs, id_alloc):
+    """ A union of any number of graphs, ex) 'a|b|c'. Uses a single pair of
+    new states instead of nesting a pair per pipe operator
+    """
+    new_start = NFAState(id_alloc.create_id())
+    new_end = NFAState(id_alloc.create_id())
+    for graph in graphs:
+        new_start.add_path(create_epsilon_trans(), graph.start)
+        graph.end.add_path(create_epsilon_trans(), new_end)
+    return NFA(new_start, new_end)
+
+
+def construct_trie(words, id_alloc, create_trans=create_char_trans):
+    """ A union of literal words, built as a trie so that words with a common
+    prefix share states. At most one state of the trie is active at a time,
+    no matter how many words there are.
+    Ex) ['cat', 'cow'] -> c -> (a -> t | o -> w)
+    create_trans makes the transition of a single item of a word
+    """
+    start = NFAState(id_alloc.create_id())
+    end = NFAState(id_alloc.create_id())
+    children = {start.id: {}}
+    leaves = set()
+    for word in words:
+        state = start
+        for i, char in enumerate(word):
+            last = i == len(word) - 1
+            nxt = children[state.id].get(char)
+            if nxt is None:
+                nxt = NFAState(id_alloc.create_id())
+                children[nxt.id] = {}
+                children[state.id][char] = nxt
+                state.add_path(create_trans(char), nxt)
+            state = nxt
+            if last and state.id not in leaves:
+                leaves.add(state.id)
+                state.add_path(create_epsilon_trans(), end)
+    return NFA(start, end)
+
+
 def kstar(graph, id_alloc):
     """ Kleene Star operator """
     new_start = NFAState(id_alloc.create_id())
@@ -60,16 +101,16 @@ def kstar(graph, id_alloc):
     return NFA(new_start, new_end)
 
 
-def repeater(graph, repeater_tok, id_alloc):
+def repeater(graph, op, id_alloc):
     """ Constructs an nfa for '*', '+', '?'
     """
-    if repeater_tok.has_val('*'):
+    if op == '*':
         return kstar(graph, id_alloc)
-    elif repeater_tok.has_val('+'):
+    elif op == '+':
         kstar_graph = kstar(graph, id_alloc)
         return concat(graph, kstar_graph)
-    elif repeater_tok.has_val('?'):
+    elif op == '?':
         empty_graph = construct_graph(create_epsilon_trans(), id_alloc)
-        return union(graph, empty_graph)
+        return union(graph, empty_graph, id_alloc)
     else:
-        raise Exception("repeater not recognized: " + repeater_tok)
+        raise Exception("repeater not recognized: " + str(op))
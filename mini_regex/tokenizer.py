@@ -57,7 +57,7 @@ class Tokenizer:
                 token = Token(char, pos-1, True)
                 escaped_flag = False
                 yield token
-            elif char is "\\":
+            elif char == "\\":
                 escaped_flag = True
             else:
                 token = Token(char, pos)
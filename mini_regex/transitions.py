@@ -1,8 +1,44 @@
+from bisect import bisect_right
+
+# What a zero-width assertion can see of the chars around a position
+EDGE = 0  # the start or the end of the text
+NEWLINE = 1
+WORD = 2
+OTHER = 3
+
+
+def char_kind(char):
+    """ char is None past either edge of the text. The bytes engine passes
+    ints: only ascii bytes can be word chars or newlines, like in python's
+    bytes patterns
+    """
+    if char is None:
+        return EDGE
+    elif isinstance(char, int):
+        if char >= 0x80:
+            return OTHER
+        char = chr(char)
+    if char == '\n':
+        return NEWLINE
+    elif char == '_' or char.isalnum():
+        return WORD
+    return OTHER
+
+
 class Transition:
-    def __init__(self, func, eats_input, desc):
+    # The single char accepted by a char literal transition. NFAStates use it
+    # to look up literal paths in a dict instead of testing every transition
+    literal = None
+    # Zero-width assertions don't eat input, but can only be followed when
+    # assertion(prev_kind, next_kind) holds for the chars around the position
+    assertion = None
+
+    def __init__(self, func, eats_input, desc, literal=None, assertion=None):
         self._is_available = func
         self._eats_input = eats_input
         self._desc = desc  # descriptor for debugs and error msgs
+        self.literal = literal
+        self.assertion = assertion
 
     def __str__(self):
         return self._desc
@@ -33,7 +69,23 @@ class Transition:
 def create_char_trans(char):
     def f(c):
         return c == char
-    return Transition(f, True, ("char: " + char))
+    return Transition(f, True, ("char: " + char), char)
+
+
+def create_byte_trans(byte):
+    """ byte is an int, the bytes engine searches bytes objects """
+    def f(c):
+        return c == byte
+    return Transition(f, True, "byte: " + hex(byte), byte)
+
+
+def create_byte_range_trans(first, last):
+    if first == last:
+        return create_byte_trans(first)
+
+    def f(c):
+        return first <= c <= last
+    return Transition(f, True, "bytes: " + hex(first) + "-" + hex(last))
 
 
 def create_epsilon_trans():
@@ -42,43 +94,108 @@ def create_epsilon_trans():
     return Transition(f, False, "epsilon")
 
 
+ASSERTIONS = {
+    'start_text': lambda prev, next: prev == EDGE,
+    'end_text': lambda prev, next: next == EDGE,
+    'start_line': lambda prev, next: prev in (EDGE, NEWLINE),
+    'end_line': lambda prev, next: next in (EDGE, NEWLINE),
+    'word_boundary': lambda prev, next: (prev == WORD) != (next == WORD),
+    'not_word_boundary': lambda prev, next: (prev == WORD) == (next == WORD),
+}
+
+
+def create_assert_trans(kind):
+    """ kind is one of the keys of ASSERTIONS """
+    def f(c):
+        return True
+    return Transition(f, False, "assert: " + kind, assertion=ASSERTIONS[kind])
+
+
 def create_metachar_trans():
     def f(c):
         return not c == '\n'
     return Transition(f, True, "metachar")
 
 
+def has_case(char):
+    return char.lower() != char or char.upper() != char
+
+
+def merge_ranges(ranges):
+    """ Sorts (first, last) code point ranges and merges the ones that
+    overlap or touch
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def range_table_func(ranges):
+    """ Returns f(char) testing if char is in any of the merged ranges with
+    a binary search, whatever the number or size of the ranges
+    """
+    firsts = [first for first, _ in ranges]
+    lasts = [last for _, last in ranges]
+
+    def f(char):
+        code = ord(char)
+        i = bisect_right(firsts, code) - 1
+        return i >= 0 and code <= lasts[i]
+    return f
+
+
 class RegexClassBuilder:
-    def __init__(self, negate=False):
-        self.funcs = []
+    def __init__(self, negate=False, ignore_case=False):
+        """ When ignore_case, a char is in the class when it, its lower case
+        or its upper case is. Negation applies after the case folding
+        """
+        self.ranges = []  # (first, last) code points, any unicode range
         self.negate = negate
+        self.ignore_case = ignore_case
         self.desc = []
 
-    def add_range(self, ascii_range):
-        (start, end) = ascii_range
-
-        def f(c):
-            return ord(start) <= ord(c) and ord(c) <= ord(end)
-        self.funcs.append(f)
+    def add_range(self, char_range):
+        (start, end) = char_range
+        if ord(start) > ord(end):
+            raise Exception("bad class range: " + start + "-" + end)
+        self.ranges.append((ord(start), ord(end)))
         self.desc.append(start + "-" + end)
 
     def add_char(self, char):
-        def f(c):
-            return c == char
-        self.funcs.append(f)
+        self.ranges.append((ord(char), ord(char)))
         self.desc.append(char)
 
     def create_trans(self):
-        def f(char):
-            for func in self.funcs:
-                if func(char):
-                    return True
-            return False
+        """ The ranges are compiled once into a sorted table of merged
+        ranges, so testing a char is a single binary search
+        """
+        f = range_table_func(merge_ranges(self.ranges))
 
         def f_neg(char):
             return not f(char)
 
+        if self.ignore_case:
+            f_cased = f
+
+            def f(char):
+                if f_cased(char):
+                    return True
+                # 'ß'.upper() is 'SS', and 'İ'.lower() is two chars too:
+                # like utf8.fold_ranges, only single char variants count
+                lower = char.lower()
+                if len(lower) == 1 and f_cased(lower):
+                    return True
+                upper = char.upper()
+                return len(upper) == 1 and f_cased(upper)
+
         desc = ''.join([str(x) for x in self.desc])
+        if self.ignore_case:
+            desc += "/i"
         if self.negate:
             return Transition(f_neg, True, "neg-class: " + desc)
         else:
@@ -0,0 +1,244 @@
+from mini_regex.regex_ast import (
+    Empty,
+    Literal,
+    String,
+    LiteralSet,
+    AnyChar,
+    CharClass,
+    Assert,
+    Concat,
+    Alternate,
+    Repeat,
+    Group,
+)
+from mini_regex.utf8 import class_ranges
+
+""" Trigram queries for regexes, in the style of Russ Cox's codesearch
+
+    trigram_query(ast) -> 'err' AND 'rro' AND ('r: ' OR ...)
+
+A text can only hold a match if it holds every trigram (3 consecutive utf-8
+bytes) of the query, which an index of the trigrams of every document (see
+corpus_index.py) answers without reading any document.
+
+Each node of the ast is summed up by an Info:
+  - exact: every string the node matches, when there are few of them
+  - prefix / suffix: strings that every match starts / ends with
+  - match: a query that every text holding a match satisfies
+Info is combined bottom up. When sets grow too large, their strings are
+turned into trigram queries and cut down to their first (or last) two chars,
+which only ever makes the query less precise, never wrong.
+"""
+
+# Above this many strings, exact sets are turned into queries
+MAX_EXACT = 16
+# Above this many strings, only the first trigram of each is queried
+MAX_QUERY_STRINGS = 256
+# Prefixes and suffixes are cut down to this many chars
+MAX_AFFIX = 2
+
+
+class Query:
+    """ op is 'all' (every text), 'none', 'trigram' (args holds 3 bytes),
+    'and' or 'or' (args holds sub queries)
+    """
+    def __init__(self, op, args=()):
+        self.op = op
+        self.args = args
+
+    def key(self):
+        if self.op in ('and', 'or'):
+            return (self.op, frozenset(arg.key() for arg in self.args))
+        return (self.op, self.args)
+
+    def __eq__(self, other):
+        return isinstance(other, Query) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        if self.op == 'trigram':
+            return repr(self.args.decode('utf-8', 'replace'))
+        elif self.op in ('and', 'or'):
+            parts = sorted("(" + repr(arg) + ")"
+                           if arg.op in ('and', 'or') else repr(arg)
+                           for arg in self.args)
+            return (" " + self.op.upper() + " ").join(parts)
+        return self.op.upper()
+
+
+ALL = Query('all')
+NONE = Query('none')
+
+
+def and_query(queries):
+    args = []
+    for query in queries:
+        if query.op == 'none':
+            return NONE
+        elif query.op == 'and':
+            args.extend(query.args)
+        elif query.op != 'all':
+            args.append(query)
+    args = list(dict.fromkeys(args))
+    if not args:
+        return ALL
+    return args[0] if len(args) == 1 else Query('and', tuple(args))
+
+
+def or_query(queries):
+    args = []
+    for query in queries:
+        if query.op == 'all':
+            return ALL
+        elif query.op == 'or':
+            args.extend(query.args)
+        elif query.op != 'none':
+            args.append(query)
+    args = list(dict.fromkeys(args))
+    if not args:
+        return NONE
+    return args[0] if len(args) == 1 else Query('or', tuple(args))
+
+
+def trigrams(data):
+    """ The distinct trigrams of utf-8 bytes, in order """
+    return list(dict.fromkeys(data[i:i + 3] for i in range(len(data) - 2)))
+
+
+def string_query(string):
+    """ Every text containing string holds all of its trigrams. Strings
+    shorter than a trigram tell nothing
+    """
+    return and_query([Query('trigram', trigram)
+                      for trigram in trigrams(string.encode('utf-8'))])
+
+
+def strings_query(strings):
+    """ A text containing any of the strings """
+    if len(strings) > MAX_QUERY_STRINGS:
+        return or_query([string_query(string[:3]) for string in strings])
+    return or_query([string_query(string) for string in strings])
+
+
+def cross(left, right):
+    return set(a + b for a in left for b in right)
+
+
+class Info:
+    def __init__(self, emptyable, exact=None, prefix=None, suffix=None,
+                 match=ALL):
+        """ When exact is known, it is also the prefix and suffix """
+        self.emptyable = emptyable
+        self.exact = exact
+        self.prefix = exact if exact is not None else prefix
+        self.suffix = exact if exact is not None else suffix
+        self.match = match
+
+    def full_match(self):
+        """ match, with what exact knows turned into a query """
+        if self.exact is None:
+            return self.match
+        return and_query([self.match, strings_query(self.exact)])
+
+
+def any_info(emptyable):
+    return Info(emptyable, prefix=set(['']), suffix=set(['']))
+
+
+def simplify(info):
+    if info.exact is not None and len(info.exact) > MAX_EXACT:
+        info = Info(info.emptyable, None, info.exact, info.exact,
+                    info.full_match())
+    if info.exact is None:
+        # what is cut from the prefixes and suffixes goes into the query
+        match = [info.match]
+        if any(len(string) > MAX_AFFIX for string in info.prefix):
+            match.append(strings_query(info.prefix))
+            info.prefix = set(string[:MAX_AFFIX] for string in info.prefix)
+        if any(len(string) > MAX_AFFIX for string in info.suffix):
+            match.append(strings_query(info.suffix))
+            info.suffix = set(string[-MAX_AFFIX:] for string in info.suffix)
+        info.match = and_query(match)
+    return info
+
+
+def concat_info(x, y):
+    match = and_query([x.match, y.match])
+    if x.exact is not None and y.exact is not None:
+        return simplify(Info(x.emptyable and y.emptyable,
+                             cross(x.exact, y.exact), match=match))
+    if x.exact is not None:
+        prefix = cross(x.exact, y.prefix)
+    else:
+        prefix = x.prefix | y.prefix if x.emptyable else set(x.prefix)
+    if y.exact is not None:
+        suffix = cross(x.suffix, y.exact)
+    else:
+        suffix = y.suffix | x.suffix if y.emptyable else set(y.suffix)
+    # trigrams that cross from x into y
+    boundary = cross(x.suffix, y.prefix)
+    if len(boundary) <= MAX_QUERY_STRINGS:
+        match = and_query([match, strings_query(boundary)])
+    return simplify(Info(x.emptyable and y.emptyable, None, prefix, suffix,
+                         match))
+
+
+def alternate_info(infos):
+    emptyable = any(info.emptyable for info in infos)
+    if all(info.exact is not None for info in infos):
+        exact = set()
+        for info in infos:
+            exact |= info.exact
+        return simplify(Info(emptyable, exact))
+    prefix = set()
+    suffix = set()
+    for info in infos:
+        prefix |= info.prefix
+        suffix |= info.suffix
+    match = or_query([info.full_match() for info in infos])
+    return simplify(Info(emptyable, None, prefix, suffix, match))
+
+
+def analyze(node):
+    if isinstance(node, Literal):
+        return Info(False, set([node.char]))
+    elif isinstance(node, String):
+        return simplify(Info(False, set([node.chars])))
+    elif isinstance(node, LiteralSet):
+        return simplify(Info(False, set(node.words)))
+    elif isinstance(node, (Empty, Assert)):
+        return Info(True, set(['']))
+    elif isinstance(node, (AnyChar, CharClass)):
+        ranges = class_ranges(node)
+        if sum(last - first + 1 for first, last in ranges) > MAX_EXACT:
+            return any_info(False)
+        return Info(False, set(chr(code) for first, last in ranges
+                               for code in range(first, last + 1)))
+    elif isinstance(node, Concat):
+        info = analyze(node.nodes[0])
+        for child in node.nodes[1:]:
+            info = concat_info(info, analyze(child))
+        return info
+    elif isinstance(node, Alternate):
+        return alternate_info([analyze(child) for child in node.nodes])
+    elif isinstance(node, Repeat):
+        info = analyze(node.node)
+        if node.op == '?':
+            return alternate_info([info, Info(True, set(['']))])
+        elif node.op == '*':
+            return any_info(True)
+        # every match of x+ starts like x and ends like x
+        return Info(info.emptyable, None, set(info.prefix), set(info.suffix),
+                    info.full_match())
+    elif isinstance(node, Group):
+        return analyze(node.node)
+    raise Exception("cannot analyze node: " + repr(node))
+
+
+def trigram_query(ast):
+    """ A query that every text holding a match of ast satisfies """
+    info = analyze(ast)
+    return and_query([info.full_match(), strings_query(info.prefix),
+                      strings_query(info.suffix)])
@@ -0,0 +1,171 @@
+from mini_regex.regex_ast import (
+    Literal,
+    String,
+    LiteralSet,
+    AnyChar,
+    CharClass,
+)
+from mini_regex.transitions import (
+    merge_ranges,
+    create_byte_trans,
+    create_byte_range_trans,
+)
+from mini_regex.thompson_constructions import (
+    construct_graph,
+    concat,
+    union_all,
+    construct_trie,
+)
+from mini_regex.lowering import to_thompson
+
+""" UTF-8 byte automata
+
+Lowers an ast into an nfa that eats the bytes of utf-8 encoded text (ints,
+as iterating over bytes gives), so the text never has to be decoded.
+Literals become their encoded bytes. A class becomes a union of byte
+sequences: every range of code points is split into sub ranges whose
+encodings share the same length and differ only in a range of each byte,
+ex) U+0080-U+07FF -> [C2-DF][80-BF] (in hex)
+(the same technique as RE2 and the rust utf8-ranges crate)
+"""
+
+MAX_CODE_POINT = 0x10FFFF
+SURROGATES = (0xD800, 0xDFFF)  # can't be encoded
+# the last code point encoded with 1, 2 and 3 bytes
+ENCODED_LENGTH_LIMITS = (0x7F, 0x7FF, 0xFFFF)
+
+
+def complement_ranges(ranges):
+    """ The code points that aren't in any of the merged ranges """
+    result = []
+    first = 0
+    for start, end in ranges:
+        if start > first:
+            result.append((first, start - 1))
+        first = end + 1
+    if first <= MAX_CODE_POINT:
+        result.append((first, MAX_CODE_POINT))
+    return result
+
+
+def fold_ranges(ranges):
+    """ Adds the lower and upper case of every char in the ranges """
+    folded = list(ranges)
+    for start, end in ranges:
+        for code in range(start, end + 1):
+            char = chr(code)
+            for variant in (char.lower(), char.upper()):
+                if len(variant) == 1 and variant != char:
+                    folded.append((ord(variant), ord(variant)))
+    return merge_ranges(folded)
+
+
+def class_ranges(node):
+    """ The merged code point ranges accepted by an AnyChar or CharClass """
+    if isinstance(node, AnyChar):
+        return complement_ranges([(ord('\n'), ord('\n'))])
+    ranges = []
+    for item in node.items:
+        if isinstance(item, tuple):
+            ranges.append((ord(item[0]), ord(item[1])))
+        else:
+            ranges.append((ord(item), ord(item)))
+    ranges = merge_ranges(ranges)
+    if node.ignore_case:
+        ranges = fold_ranges(ranges)
+    if node.negate:
+        ranges = complement_ranges(ranges)
+    return ranges
+
+
+def utf8_sequences(first, last):
+    """ Splits a range of code points into a list of byte range sequences.
+    Each sequence is a list of (first byte, last byte) ranges, one per byte
+    of the encoding, and the sequences are sorted by code point
+    """
+    sequences = []
+    stack = [(first, last)]
+    while stack:
+        first, last = stack.pop()
+        if first > last:
+            continue
+        if first <= SURROGATES[1] and last >= SURROGATES[0]:
+            stack.append((SURROGATES[1] + 1, last))
+            stack.append((first, SURROGATES[0] - 1))
+            continue
+        split = None
+        for limit in ENCODED_LENGTH_LIMITS:
+            if first <= limit < last:
+                split = limit
+                break
+        if split is None:
+            # the continuation bytes of a sequence must cover their whole
+            # range, except in the last byte
+            for i in range(1, 4):
+                mask = (1 << (6 * i)) - 1
+                if first & ~mask != last & ~mask:
+                    if first & mask != 0:
+                        split = first | mask
+                        break
+                    if last & mask != mask:
+                        split = (last & ~mask) - 1
+                        break
+        if split is not None:
+            stack.append((split + 1, last))
+            stack.append((first, split))
+            continue
+        sequences.append(list(zip(chr(first).encode('utf-8'),
+                                  chr(last).encode('utf-8'))))
+    return sequences
+
+
+def encode(chars, reverse=False):
+    """ reverse reverses the bytes of every char, for the reversed asts used
+    to search backwards (see rewrites.reverse)
+    """
+    if reverse:
+        return b''.join(char.encode('utf-8')[::-1] for char in chars)
+    return chars.encode('utf-8')
+
+
+def bytes_graph(byte_ranges, id_alloc):
+    graph = None
+    for first, last in byte_ranges:
+        byte_graph = construct_graph(create_byte_range_trans(first, last),
+                                     id_alloc)
+        graph = concat(graph, byte_graph) if graph else byte_graph
+    return graph
+
+
+def lower_utf8_leaf(node, id_alloc, reverse=False):
+    if isinstance(node, (Literal, String)):
+        chars = node.char if isinstance(node, Literal) else node.chars
+        return bytes_graph([(byte, byte) for byte in encode(chars, reverse)],
+                           id_alloc)
+
+    elif isinstance(node, LiteralSet):
+        words = [encode(word, reverse) for word in node.words]
+        return construct_trie(words, id_alloc, create_byte_trans)
+
+    elif isinstance(node, (AnyChar, CharClass)):
+        graphs = []
+        for first, last in class_ranges(node):
+            for sequence in utf8_sequences(first, last):
+                if reverse:
+                    sequence = sequence[::-1]
+                graphs.append(bytes_graph(sequence, id_alloc))
+        if len(graphs) == 1:
+            return graphs[0]
+        return union_all(graphs, id_alloc)
+
+    else:
+        raise Exception("cannot lower node to utf-8: " + repr(node))
+
+
+def to_utf8_nfa(node, id_alloc, reverse=False):
+    """ An nfa over the utf-8 bytes of the text. reverse lowers a reversed
+    ast into an nfa for the reversed bytes of the text
+    """
+    def lower_leaf(leaf, id_alloc):
+        return lower_utf8_leaf(leaf, id_alloc, reverse)
+    return to_thompson(node, id_alloc, lower_leaf)
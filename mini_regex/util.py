@@ -3,7 +3,8 @@ from enum import Enum
 from mini_regex.nfa import NFAState, NFA
 from mini_regex.transitions import (create_char_trans,
                                     create_epsilon_trans,
-                                    create_metachar_trans)
+                                    create_metachar_trans,
+                                    create_assert_trans)
 
 
 class TransitionTypes(Enum):
@@ -64,6 +65,8 @@ def trans_desc_to_trans(desc_str):
         return create_epsilon_trans()
     elif desc_str == "metachar":
         return create_metachar_trans()
+    elif desc_str[0:8] == "assert: ":
+        return create_assert_trans(desc_str[8:])
     elif desc_str[0:6] == "char: ":
         return create_char_trans(desc_str[6])
     else:
@@ -119,3 +122,58 @@ class Counter:
     def next(self):
         self._num += 1
         return self._num
+
+
+class SparseSet:
+    """ A set of small non-negative ints (Briggs & Torczon, "An efficient
+    representation for sparse sets"). dense holds the members in insertion
+    order and sparse maps a member to its index in dense, so add, membership
+    and clear are all O(1) and iteration is O(len), whatever the size of the
+    universe. sparse grows on demand when a bigger int is added.
+    sparse may hold stale garbage, a member is only valid when dense points
+    back to it
+    """
+    __slots__ = ('dense', 'sparse')
+
+    def __init__(self, capacity=0):
+        self.dense = []
+        self.sparse = [0] * capacity
+
+    def __contains__(self, i):
+        if i >= len(self.sparse):
+            return False
+        index = self.sparse[i]
+        return index < len(self.dense) and self.dense[index] == i
+
+    def __iter__(self):
+        return iter(self.dense)
+
+    def __len__(self):
+        return len(self.dense)
+
+    def __repr__(self):
+        return "SparseSet(" + str(self.dense) + ")"
+
+    def add(self, i):
+        """ Returns False when i was already in the set """
+        sparse = self.sparse
+        dense = self.dense
+        if i < len(sparse):
+            index = sparse[i]
+            if index < len(dense) and dense[index] == i:
+                return False
+        else:
+            # grow geometrically, so adding n ints is O(n) overall
+            sparse.extend([0] * (max(i + 1, 2 * len(sparse)) - len(sparse)))
+        sparse[i] = len(dense)
+        dense.append(i)
+        return True
+
+    def index(self, i):
+        """ The insertion rank of member i """
+        return self.sparse[i]
+
+    def clear(self):
+        # sparse is left as is, its stale entries can't point back into an
+        # empty dense
+        self.dense = []
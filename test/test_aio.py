@@ -0,0 +1,58 @@
+from mini_regex.regex import MiniRegex
+import asyncio
+import unittest as ut
+
+
+async def collect(async_iter):
+    return [(match.get_span(), match.get_value())
+            async for match in async_iter]
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class AsyncFinditerTest(ut.TestCase):
+    def test_stream_reader(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data("ab1 élan 22a".encode('utf-8'))
+            reader.feed_eof()
+            regex = MiniRegex("[0-9]+|é[a-z]+")
+            return await collect(regex.afinditer(reader, chunk_size=3))
+        result = asyncio.run(run())
+        self.assertListEqual(result, [((2, 2), "1"), ((4, 7), "élan"),
+                                      ((9, 10), "22")])
+
+    def test_async_iterable_of_str(self):
+        regex = MiniRegex(".el+o")
+        result = asyncio.run(collect(
+            regex.afinditer(chunks("He", "llo Yel", "lo"))))
+        self.assertListEqual(result, [((0, 4), "Hello"), ((6, 10), "Yello")])
+
+    def test_offloads_large_chunks(self):
+        regex = MiniRegex("ab")
+        result = asyncio.run(collect(
+            regex.afinditer(chunks("xab" * 10, "a", "b"), offload_size=8)))
+        self.assertEqual(len(result), 11)
+        self.assertEqual(result[-1], ((30, 31), "ab"))
+
+    def test_groups(self):
+        async def run(regex, *parts):
+            return [(match.group(1), match.group(2), match.span(2))
+                    async for match in regex.afinditer(chunks(*parts))]
+        regex = MiniRegex("(a)(b)")
+        self.assertListEqual(asyncio.run(run(regex, "xa", "bab")),
+                             [("a", "b", (2, 2)), ("a", "b", (4, 4))])
+        expected = [(m.group(1), m.group(2), m.span(2))
+                    for m in MiniRegex("\\b([a-z]+)=([0-9]+)")
+                    .find_all_matches("key=1 xkey=22 ab=3")]
+        regex = MiniRegex("\\b([a-z]+)=([0-9]+)")
+        self.assertListEqual(
+            asyncio.run(run(regex, "key=1 xk", "ey=2", "2 ab", "=3")),
+            expected)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,74 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.dfa_sim import NFAEngine
+from mini_regex.scanner import ThreadScanner
+from mini_regex.batch import match_column
+import unittest as ut
+
+
+PATTERNS = ["^ab", "ab$", "\\bab", "ab\\b", "\\Ba", "^a*b$", "(a|b)+$",
+            "^(ab|a)c?", "\\b(a|b)+\\b", "a$|b", "a^b"]
+SEARCH_STRS = ["", "ab", "abab", "ab ab", "xab abx", "a\nab\nb", "ba aab",
+               "b ab\nab"]
+
+
+def spans(matches):
+    return [match.get_span() for match in matches]
+
+
+class AssertionTest(ut.TestCase):
+    def test_anchors(self):
+        self.assertListEqual(spans(MiniRegex("^ab").find_all_matches(
+            "abab")), [(0, 1)])
+        self.assertListEqual(spans(MiniRegex("ab$").find_all_matches(
+            "abab")), [(2, 3)])
+        self.assertListEqual(spans(MiniRegex("^a*b$").find_all_matches(
+            "aab")), [(0, 2)])
+        self.assertListEqual(MiniRegex("^ab").find_all_matches("xab"), [])
+        self.assertListEqual(MiniRegex("a^b").find_all_matches("ab"), [])
+
+    def test_multiline_anchors(self):
+        text = "ab\nxab\nab"
+        regex = MiniRegex("^ab$", multiline=True)
+        self.assertListEqual(spans(regex.find_all_matches(text)),
+                             [(0, 1), (7, 8)])
+        self.assertListEqual(spans(MiniRegex("^ab$").find_all_matches(text)),
+                             [])
+
+    def test_word_boundaries(self):
+        regex = MiniRegex("\\bab\\b")
+        self.assertListEqual(spans(regex.find_all_matches("ab xab ab_ ab")),
+                             [(0, 1), (11, 12)])
+        self.assertListEqual(spans(MiniRegex("\\Bb").find_all_matches(
+            "b ab")), [(3, 3)])
+
+    def test_engines_agree(self):
+        for greedy in (True, False):
+            for pattern in PATTERNS:
+                regex = MiniRegex(pattern, greedy)
+                nfa_engine = NFAEngine(regex._nfa, greedy)
+                expected = [bool(regex.find_all_matches(text))
+                            for text in SEARCH_STRS]
+                self.assertListEqual(
+                    list(match_column(regex, SEARCH_STRS, use_numpy=False)),
+                    expected, pattern)
+                for text in SEARCH_STRS:
+                    for i in range(len(text)):
+                        self.assertEqual(regex._engine.match(text, i),
+                                         nfa_engine.match(text, i),
+                                         (pattern, text, i))
+                    scanner = ThreadScanner(regex._nfa, greedy)
+                    found = []
+                    for char in text:
+                        found += scanner.feed(char)
+                    found += scanner.finish()
+                    self.assertListEqual(
+                        spans(found), spans(regex.find_all_matches(text)),
+                        (pattern, text))
+
+    def test_assertions_cannot_repeat(self):
+        with self.assertRaises(Exception):
+            MiniRegex("^*a")
+
+
+if __name__ == '__main__':
+    ut.main()
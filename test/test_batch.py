@@ -0,0 +1,61 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+import mini_regex.batch as batch
+import unittest as ut
+
+
+PATTERNS = ["a", ".el+o", "[1-9]+", "abc|bcde", "x(a|bc)*y", "a*", "[^a-z]"]
+COLUMN = ["", "a", "Hello World!", "Not a match", "123abc", "kbcde",
+          "xy", "xabcay", "ABC", "bbbb", "héllo", "zzz"]
+
+
+def expected_mask(regex, column):
+    return [bool(regex.find_all_matches(string)) for string in column]
+
+
+class MatchColumnTest(ut.TestCase):
+    def test_pure_python_agrees_with_find_all_matches(self):
+        for pattern in PATTERNS:
+            regex = MiniRegex(pattern)
+            mask = batch.match_column(regex, COLUMN, use_numpy=False)
+            self.assertListEqual(mask, expected_mask(regex, COLUMN), pattern)
+
+    @ut.skipIf(batch.np is None, "numpy is not installed")
+    def test_numpy_agrees_with_find_all_matches(self):
+        for pattern in PATTERNS:
+            regex = MiniRegex(pattern)
+            mask = batch.match_column(regex, COLUMN, use_numpy=True)
+            self.assertListEqual(mask.tolist(),
+                                 expected_mask(regex, COLUMN), pattern)
+
+    @ut.skipIf(batch.np is None, "numpy is not installed")
+    def test_buffer_and_offsets_input(self):
+        regex = MiniRegex("b+c")
+        buffer, offsets = batch.column_to_buffer(["abc", "", "cb", "bbc"])
+        mask = batch.match_column(regex, buffer, offsets)
+        self.assertListEqual(mask.tolist(), [True, False, False, True])
+
+    def test_dfa_is_kept_on_the_regex(self):
+        for use_numpy in (False, True) if batch.np is not None else (False,):
+            regex = MiniRegex("x(a|bc)*y")
+            batch.match_column(regex, COLUMN, use_numpy=use_numpy)
+            table = regex._column_table
+            # a column over the same chars reuses the dfa
+            mask = batch.match_column(regex, ["xay", "yx"],
+                                      use_numpy=use_numpy)
+            self.assertListEqual(list(mask), [True, False])
+            self.assertIs(regex._column_table, table)
+            # new chars grow the alphabet, and the old ones are still there
+            mask = batch.match_column(regex, ["xβy", "xbcy"],
+                                      use_numpy=use_numpy)
+            self.assertListEqual(list(mask), [False, True])
+            self.assertIsNot(regex._column_table, table)
+            self.assertTrue(regex._column_table.chars > table.chars)
+
+    def test_bytes_regex(self):
+        with self.assertRaises(Exception):
+            batch.match_column(BytesRegex("a"), [b"a"], use_numpy=False)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,53 @@
+from mini_regex.bitparallel import BitParallelEngine
+from mini_regex.dfa_sim import NFAEngine
+from mini_regex.lowering import to_thompson
+from mini_regex.parser import RegexParser, IDAllocator
+from mini_regex.tokenizer import Tokenizer
+from mini_regex.regex import MiniRegex
+import unittest as ut
+
+
+PATTERNS = ["a", "abc|bcde", ".el+o", "[1-9]+", "(ab)*c", "a?b+",
+            "x(a|bc)*y", "cat|dog|cow|c.w", "(a*)*b", "[^ab]c?"]
+SEARCH_STRS = ["", "abcde", "Hello Yelllo", "123abc456", "ababcc abc",
+               "abbb b", "xy xabcay xbcbc", "a cat, a cow, a cxw",
+               "aaab", "cc dc ac"]
+
+
+def parse(pattern):
+    return RegexParser(Tokenizer(pattern)).construct_ast()
+
+
+class BitParallelEngineTest(ut.TestCase):
+    def test_agrees_with_nfa_simulation(self):
+        for greedy in (True, False):
+            for pattern in PATTERNS:
+                ast = parse(pattern)
+                bit_engine = BitParallelEngine(ast, greedy)
+                nfa_engine = NFAEngine(to_thompson(ast, IDAllocator()), greedy)
+                for search_str in SEARCH_STRS:
+                    for i in range(len(search_str)):
+                        self.assertEqual(
+                            bit_engine.match(search_str, i),
+                            nfa_engine.match(search_str, i),
+                            (pattern, search_str, i, greedy))
+
+    def test_respects_endpos(self):
+        engine = BitParallelEngine(parse("a+"))
+        self.assertEqual(engine.match("aaaa", 0, 2), 2)
+        self.assertEqual(engine.match("baaa", 0, 2), None)
+
+    def test_handles_many_positions(self):
+        pattern = "(" + "|".join("w" + str(i) for i in range(60)) + ")!"
+        engine = BitParallelEngine(parse(pattern))
+        self.assertEqual(engine.match("w59!", 0), 4)
+        self.assertEqual(engine.match("w60!", 0), None)
+
+    def test_chosen_for_small_patterns(self):
+        self.assertIsInstance(MiniRegex("ab*")._engine, BitParallelEngine)
+        big = MiniRegex("|".join("w" + str(i) for i in range(300)))
+        self.assertNotIsInstance(big._engine, BitParallelEngine)
+
+
+if __name__ == '__main__':
+    ut.main()
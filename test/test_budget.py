@@ -0,0 +1,100 @@
+import random
+import time
+
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.budget import Budget, BudgetExceeded, CLOCK_INTERVAL
+from mini_regex.shared import share
+import unittest as ut
+
+
+class BudgetTest(ut.TestCase):
+    def test_steps(self):
+        budget = Budget(max_steps=3)
+        for pos in range(3):
+            budget.charge(pos)
+        with self.assertRaises(BudgetExceeded) as context:
+            budget.charge(7)
+        self.assertEqual(context.exception.pos, 7)
+
+    def test_timeout(self):
+        budget = Budget(timeout=0)
+        time.sleep(0.001)
+        # the clock is only read every CLOCK_INTERVAL steps
+        for pos in range(CLOCK_INTERVAL - 1):
+            budget.charge(pos)
+        with self.assertRaises(BudgetExceeded):
+            budget.charge(CLOCK_INTERVAL)
+
+    def test_search_steps(self):
+        # no required literal to skip ahead with
+        regex = MiniRegex("[ab][cd]")
+        text = "ac" + "x" * 100 + "bd"
+        # a step is a char read: 3 for the attempt at 0, which looks past
+        # "ac" for a longer match, then one per 'x'
+        self.assertEqual(len(regex.find_all_matches(text, max_steps=110)), 2)
+        with self.assertRaises(BudgetExceeded) as context:
+            regex.find_all_matches(text, max_steps=50)
+        self.assertEqual(len(context.exception.partial), 1)
+        self.assertEqual(context.exception.pos, 49)
+        matches = regex.find_all_matches(text, max_steps=50, partial=True)
+        self.assertEqual([m.get_value() for m in matches], ["ac"])
+        self.assertEqual(regex.count(text, max_steps=50, partial=True), 1)
+        with self.assertRaises(BudgetExceeded):
+            regex.first_match("x" * 100, max_steps=10)
+        self.assertEqual(regex.first_match("xbc", max_steps=10).get_value(),
+                         "bc")
+
+    def test_search_timeout(self):
+        regex = MiniRegex("[ab]*[cd]")
+        with self.assertRaises(BudgetExceeded):
+            regex.find_all_matches("ab" * 5000, timeout=0.001)
+        self.assertEqual(regex.count("abc" * 10, timeout=1), 10)
+
+    def test_long_attempts(self):
+        # a single attempt reads the whole text, it is stopped partway
+        text = "ab" * 20000
+        for engine in ('bitparallel', 'lazy_dfa', 'nfa', 'codegen'):
+            regex = MiniRegex("[ab]*[cd]", engine=engine)
+            with self.assertRaises(BudgetExceeded) as context:
+                regex.find_all_matches(text, max_steps=10)
+            self.assertLessEqual(context.exception.pos, 10)
+            start = time.monotonic()
+            with self.assertRaises(BudgetExceeded):
+                regex.find_all_matches(text, timeout=0.001)
+            self.assertLess(time.monotonic() - start, 0.1, engine)
+        with self.assertRaises(BudgetExceeded) as context:
+            MiniRegex("needle").first_match("x" * 10 ** 6, max_steps=100)
+        self.assertLessEqual(context.exception.pos, 200)
+        self.assertEqual(MiniRegex("[ab]*c$").count("ab" * 50 + "c",
+                                                    max_steps=101), 1)
+
+    def test_other_searches(self):
+        regex = MiniRegex("[ab]*[cd]")
+        text = "ab" * 100 + "c\n" + "ab" * 100
+        for search in (lambda: regex.sub("x", text, max_steps=50),
+                       lambda: regex.subn("x", text, timeout=0),
+                       lambda: regex.split(text, max_steps=50),
+                       lambda: list(regex.matching_lines(text,
+                                                         max_steps=50))):
+            with self.assertRaises(BudgetExceeded):
+                search()
+        self.assertEqual(regex.split(text, max_steps=10 ** 5),
+                         ["", "\n" + "ab" * 100])
+
+    def test_compile_budgets(self):
+        with self.assertRaises(BudgetExceeded):
+            MiniRegex("(abc|def)+" * 20, max_nfa_states=50)
+        self.assertEqual(MiniRegex("abc", max_nfa_states=50).count("abc"), 1)
+        pattern = "(a|b)*a" + "(a|b)" * 10
+        chars = random.Random(0).choices(b"ab", k=2000)
+        text = bytes(chars)
+        with self.assertRaises(BudgetExceeded):
+            BytesRegex(pattern, max_dfa_states=100).count(text)
+        # without a budget, the dfa only stops caching
+        self.assertEqual(BytesRegex(pattern).count(text), 1)
+        # dfas built ahead of time have a size budget too
+        with self.assertRaises(BudgetExceeded):
+            share(BytesRegex(pattern), max_states=100)
+        with self.assertRaises(BudgetExceeded):
+            MiniRegex(pattern, engine='codegen', max_dfa_states=100)
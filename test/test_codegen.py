@@ -0,0 +1,90 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.codegen import SOURCES
+import mini_regex.codegen as codegen
+import unittest as ut
+
+TEXT = "user=bob failed, user=alice ok\nthe cats are singing αβγ δ\n"
+PATTERNS = ["user=[a-z]+", "[a-z]+ing", "(cat|dog)s?", "\\b[a-z]+s\\b",
+            "[α-ω]+", "[^ ]+", "a*b?c", "ok$", "^the", "[a-z]+ [a-z]+"]
+
+
+def spans(regex, text):
+    return [match.get_span() for match in regex.find_all_matches(text)]
+
+
+class CodegenTest(ut.TestCase):
+    def check(self, cls, text, **kwargs):
+        for pattern in PATTERNS:
+            generated = cls(pattern, engine='codegen', **kwargs)
+            lazy = cls(pattern, engine='lazy_dfa', **kwargs)
+            self.assertEqual(spans(generated, text), spans(lazy, text),
+                             pattern)
+            self.assertEqual(generated.count(text), lazy.count(text))
+            self.assertEqual(generated.count(text, max_steps=10 ** 6),
+                             lazy.count(text))
+
+    def test_same_matches(self):
+        self.check(MiniRegex, TEXT)
+        self.check(MiniRegex, TEXT, greedy=False)
+        self.check(MiniRegex, TEXT, multiline=True)
+        self.check(MiniRegex, TEXT + "STRAßE İst", ignore_case=True)
+        self.check(BytesRegex, (TEXT + "STRAßE İst").encode('utf-8'),
+                   ignore_case=True)
+        self.check(BytesRegex, TEXT.encode('utf-8'))
+        self.check(BytesRegex, TEXT.encode('utf-8'), greedy=False)
+
+    def test_chunks(self):
+        # chunks of a few chars, so that matches, runs, assertions and
+        # unknown chars all cross their edges
+        sizes = (codegen.FIRST_MATCH_CHUNK, codegen.FIRST_SEARCH_CHUNK,
+                 codegen.MAX_CHUNK)
+        text = TEXT * 3 + "x" * 50 + "ing Жук"
+        try:
+            for size in (1, 2, 3, 7):
+                codegen.FIRST_MATCH_CHUNK = codegen.FIRST_SEARCH_CHUNK = size
+                codegen.MAX_CHUNK = 2 * size
+                self.check(MiniRegex, text)
+                self.check(MiniRegex, text, greedy=False)
+                self.check(BytesRegex, text.encode('utf-8'))
+                self.check(MiniRegex, text, multiline=True)
+                for pattern in PATTERNS:
+                    generated = MiniRegex(pattern, engine='codegen')._engine
+                    lazy = MiniRegex(pattern, engine='lazy_dfa')._engine
+                    self.assertEqual(
+                        [generated.match(text, i) for i in range(len(text))],
+                        [lazy.match(text, i) for i in range(len(text))])
+                self.assertEqual(spans(MiniRegex("[^ !]+",
+                                                 engine='codegen'),
+                                       "ab Жук!"), [(0, 1), (3, 5)])
+        finally:
+            (codegen.FIRST_MATCH_CHUNK, codegen.FIRST_SEARCH_CHUNK,
+             codegen.MAX_CHUNK) = sizes
+
+    def test_match(self):
+        engine = MiniRegex("[a-z]+ing", engine='codegen')._engine
+        self.assertEqual(engine.match("singing!"), 7)
+        self.assertEqual(engine.match("singing!", 1), 7)
+        self.assertEqual(engine.match("singing!", 0, 4), 4)
+        self.assertEqual(engine.match("sing", 4), None)
+        self.assertEqual(engine.search("a sing", 0), (2, 6))
+
+    def test_unknown_chars(self):
+        # chars the dfa wasn't built over are classified when first seen
+        regex = MiniRegex("[^ !]+", engine='codegen')
+        self.assertEqual(spans(regex, "ab Жук!"), [(0, 1), (3, 5)])
+        # and the lazy dfa runs the attempts the dfa can't handle
+        regex = MiniRegex("[α-ω]+", engine='codegen')
+        regex._engine.translation.signatures.clear()
+        self.assertEqual(spans(regex, "xαβγx ωβ"), [(1, 3), (6, 7)])
+
+    def test_cached_source(self):
+        MiniRegex("ab+", engine='codegen')
+        count = len(SOURCES)
+        MiniRegex("cd+", engine='codegen')
+        self.assertEqual(len(SOURCES), count)
+
+    def test_explain(self):
+        self.assertIn("engine: codegen",
+                      MiniRegex("a+", engine='codegen').explain())
+        self.assertNotEqual(MiniRegex("a+b")._plan.engine, 'codegen')
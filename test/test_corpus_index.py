@@ -0,0 +1,78 @@
+from mini_regex.corpus_index import CorpusIndex
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+import os
+import random
+import tempfile
+import unittest as ut
+
+
+WORDS = ["error", "disk", "full", "user", "login", "failed", "héllo", "ok"]
+
+
+class CorpusIndexTest(ut.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'index')
+        rng = random.Random(0)
+        self.documents = [
+            ("doc%d" % i, " ".join(rng.choice(WORDS)
+                                   for _ in range(rng.randint(0, 12))))
+            for i in range(120)]
+        self.texts = dict(self.documents)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def search(self, index, regex):
+        return [name for name, _ in index.search(regex,
+                                                 self.texts.__getitem__)]
+
+    def expected(self, regex):
+        return [name for name, text in self.documents
+                if regex.find_all_matches(text)]
+
+    def test_search_across_segments(self):
+        index = CorpusIndex(self.path)
+        self.assertEqual(index.add(self.documents[:50]), 50)
+        index.close()
+        index = CorpusIndex(self.path)
+        index.add(self.documents[50:])
+        self.assertEqual(len(index.segments), 2)
+        for merged in (False, True):
+            if merged:
+                index.merge()
+                self.assertEqual(len(index.segments), 1)
+            for pattern in ("disk full", "(login|user) failed", "héllo",
+                            "f[a-z]+d", "zzz"):
+                for ignore_case in (False, True):
+                    regex = MiniRegex(pattern, ignore_case=ignore_case)
+                    self.assertEqual(self.search(index, regex),
+                                     self.expected(regex))
+        index.close()
+
+    def test_candidates_are_filtered(self):
+        index = CorpusIndex(self.path)
+        index.add(self.documents)
+        regex = MiniRegex("disk full")
+        self.assertLess(len(index.candidates(regex)), len(self.documents))
+        self.assertEqual(len(index.candidates(MiniRegex("a.*b"))),
+                         len(self.documents))
+        self.assertEqual(index.candidates(MiniRegex("quota")), [])
+        index.close()
+
+    def test_files(self):
+        path = os.path.join(self.dir.name, 'a.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("disk full\nhéllo\n")
+        index = CorpusIndex(self.path)
+        index.add([path])
+        self.assertEqual([name for name, _ in
+                          index.search(MiniRegex("h.llo"))], [path])
+        self.assertEqual([name for name, _ in
+                          index.search(BytesRegex("héllo"))], [path])
+        index.close()
+
+
+if __name__ == '__main__':
+    ut.main()
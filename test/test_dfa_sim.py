@@ -1,4 +1,7 @@
-from mini_regex.dfa_sim import DFASimulator
+from mini_regex.dfa_sim import DFASimulator, NFAEngine
+from mini_regex.lazy_dfa import LazyDFAEngine
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
 from mini_regex.util import table_to_nfa
 import unittest as ut
 
@@ -74,3 +77,22 @@ class DFASimTest(ut.TestCase):
         runner.advance_state('d')
         match_end = runner.check_match()
         self.assertIsNone(match_end)
+
+    def test_states_are_recycled(self):
+        # the sparse arrays of the states grow to the largest node id, so a
+        # state per char would cost O(nfa size) per step
+        words = ["w" + str(i) + "x" for i in range(2000)]
+        nfa = RegexParser(Tokenizer("|".join(words))).construct_nfa(
+            'thompson')
+        engine = NFAEngine(nfa)
+        lazy = LazyDFAEngine(nfa)
+        text = " ".join(words[::100])
+        for _ in range(3):
+            ends = [engine.match(text, i) for i in range(len(text))]
+            self.assertEqual(ends, [lazy.match(text, i)
+                                    for i in range(len(text))])
+            # a simulation holds at most three states at once, and every
+            # match gives them back, however many matches ran
+            self.assertLessEqual(engine.spare_states(), 3)
+        self.assertEqual(ends[:3], [3, None, None])
+
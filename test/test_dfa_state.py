@@ -0,0 +1,40 @@
+from mini_regex.dfa_state import NFAIterator, DFAState
+from mini_regex.nfa import NFAState
+import unittest as ut
+
+
+class DFAStateTest(ut.TestCase):
+    def test_one_substate_per_node(self):
+        nodes = [NFAState(i) for i in range(3)]
+        state = DFAState()
+        self.assertTrue(state.add_substate(NFAIterator(nodes[0], 1)))
+        self.assertFalse(state.add_substate(NFAIterator(nodes[0], 2)))
+        self.assertTrue(state.has_node(nodes[0]))
+        self.assertFalse(state.has_node(nodes[1]))
+        self.assertEqual(state.get_substate_with_node(nodes[0]).get_age(), 1)
+        self.assertIsNone(state.get_substate_with_node(nodes[2]))
+
+    def test_substates_are_sorted_by_age(self):
+        nodes = [NFAState(i) for i in range(4)]
+        state = DFAState()
+        for node, age in zip(nodes, [3, 1, 2, 1]):
+            state.add_substate(NFAIterator(node, age))
+        self.assertListEqual(
+            [(s.get_node().id, s.get_age()) for s in state.get_substates()],
+            [(1, 1), (3, 1), (2, 2), (0, 3)])
+        self.assertEqual(state.get_substate_with_node(nodes[2]).get_age(), 2)
+
+    def test_thousands_of_states(self):
+        nodes = [NFAState(i) for i in range(20000)]
+        state = DFAState()
+        # inserting in decreasing age order used to shift the whole list
+        for node in reversed(nodes):
+            state.add_substate(NFAIterator(node, node.id))
+        for node in nodes:
+            state.add_substate(NFAIterator(node, 0))
+        self.assertEqual(len(state.get_substates()), 20000)
+        self.assertEqual(state.get_substates()[0].get_node(), nodes[0])
+
+
+if __name__ == '__main__':
+    ut.main()
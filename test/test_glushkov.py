@@ -0,0 +1,65 @@
+from mini_regex.dfa_sim import NFAEngine
+from mini_regex.glushkov import Positions, construct_glushkov
+from mini_regex.parser import RegexParser, IDAllocator
+from mini_regex.tokenizer import Tokenizer
+from mini_regex.regex import MiniRegex
+from mini_regex.util import nfa_to_table
+import unittest as ut
+
+
+PATTERNS = ["abc|bcde", ".el+o", "(ab)*c", "a?b+", "x(a|bc)*y",
+            "cat|dog|cow|c.w", "(a*)*b", "[^ab]c?"]
+SEARCH_STRS = ["abcde", "Hello Yelllo", "ababcc abc", "abbb b",
+               "xy xabcay xbcbc", "a cat, a cow, a cxw", "aaab", "cc dc ac"]
+
+
+def parse(pattern):
+    return RegexParser(Tokenizer(pattern)).construct_ast()
+
+
+class PositionsTest(ut.TestCase):
+    def test_position_sets(self):
+        # positions: a=0, b=1, c=2
+        positions = Positions(parse("a(b)*c"))
+        self.assertFalse(positions.nullable)
+        self.assertEqual(positions.first, 0b001)
+        self.assertEqual(positions.last, 0b100)
+        self.assertEqual(positions.follow, [0b110, 0b110, 0])
+
+
+class GlushkovNFATest(ut.TestCase):
+    def test_one_state_per_position_and_no_epsilons(self):
+        nfa = construct_glushkov(parse("a(b)*c"), IDAllocator())
+        expected = {0: [("char: a", 1)],
+                    1: [("char: b", 2), ("char: c", 3)],
+                    2: [("char: b", 2), ("char: c", 3)],
+                    3: []}
+        self.assertEqual(nfa_to_table(nfa.start), expected)
+        self.assertEqual([final.id for final in nfa.finals], [3])
+        self.assertTrue(nfa.epsilon_free)
+
+    def test_agrees_with_thompson(self):
+        for greedy in (True, False):
+            for pattern in PATTERNS:
+                parser = RegexParser(Tokenizer(pattern))
+                thompson = NFAEngine(parser.construct_nfa(), greedy)
+                parser = RegexParser(Tokenizer(pattern))
+                glushkov = NFAEngine(parser.construct_nfa('glushkov'), greedy)
+                for search_str in SEARCH_STRS:
+                    for i in range(len(search_str)):
+                        self.assertEqual(
+                            glushkov.match(search_str, i),
+                            thompson.match(search_str, i),
+                            (pattern, search_str, i, greedy))
+
+    def test_selectable_per_pattern(self):
+        pattern = "|".join("w" + str(i) + "[xy]" for i in range(300))
+        regex = MiniRegex(pattern, backend='glushkov')
+        self.assertTrue(regex._nfa.epsilon_free)
+        matches = regex.find_all_matches("w12x w300x w299y")
+        result = [match.get_value() for match in matches]
+        self.assertListEqual(result, ["w12x", "w299y"])
+
+
+if __name__ == '__main__':
+    ut.main()
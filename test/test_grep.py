@@ -0,0 +1,85 @@
+from mini_regex.grep import main
+import io
+import os
+import sys
+import tempfile
+import unittest as ut
+
+
+FILES = {
+    'a.txt': "hello world\nfoo bar\nHello again, héllo hello\n",
+    os.path.join('sub', 'b.txt'): "nothing\nhello",
+    'empty.txt': "",
+}
+
+
+class GrepTest(ut.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for name, text in FILES.items():
+            path = os.path.join(self.dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def grep(self, *args):
+        out = io.StringIO()
+        status = main(list(args), out)
+        root = self.dir.name + os.sep
+        return status, out.getvalue().replace(root, '').splitlines()
+
+    def test_matching_lines(self):
+        path = os.path.join(self.dir.name, 'a.txt')
+        self.assertEqual(self.grep("h.llo", path),
+                         (0, ["1:hello world", "3:Hello again, héllo hello"]))
+
+    def test_directories_in_stable_order(self):
+        expected = ["a.txt:1:hello world",
+                    "a.txt:3:Hello again, héllo hello",
+                    os.path.join('sub', 'b.txt') + ":2:hello"]
+        for jobs in ("1", "3"):
+            self.assertEqual(self.grep("-j", jobs, "hello", self.dir.name),
+                             (0, expected))
+
+    def test_modes(self):
+        self.assertEqual(self.grep("-c", "-i", "hello", self.dir.name)[1],
+                         ["a.txt:2", "empty.txt:0",
+                          os.path.join('sub', 'b.txt') + ":1"])
+        self.assertEqual(self.grep("-l", "foo|nothing", self.dir.name)[1],
+                         ["a.txt", os.path.join('sub', 'b.txt')])
+        self.assertEqual(self.grep("-c", "^hello$", self.dir.name)[1],
+                         ["a.txt:0", "empty.txt:0",
+                          os.path.join('sub', 'b.txt') + ":1"])
+        path = os.path.join(self.dir.name, 'a.txt')
+        self.assertEqual(self.grep("-o", "h[^ ]llo", path)[1],
+                         ["1:hello", "3:héllo", "3:hello"])
+
+    def test_exit_status(self):
+        self.assertEqual(self.grep("zzz", self.dir.name), (1, []))
+        missing = os.path.join(self.dir.name, 'missing')
+        self.assertEqual(self.grep("a", missing)[0], 2)
+
+    def test_ignore_case_non_ascii(self):
+        path = os.path.join(self.dir.name, 'de.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("die Straße\nSTRAßE İst\nstrasse\n")
+        self.assertEqual(self.grep("-i", "straße", path),
+                         (0, ["1:die Straße", "2:STRAßE İst"]))
+        self.assertEqual(self.grep("-i", "-o", "[a-zß]+e", path)[1],
+                         ["1:die", "1:Straße", "2:STRAßE", "3:strasse"])
+
+    def test_bad_pattern(self):
+        stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            self.assertEqual(self.grep("(ab", self.dir.name), (2, []))
+            self.assertIn("bad pattern", sys.stderr.getvalue())
+        finally:
+            sys.stderr = stderr
+
+
+if __name__ == '__main__':
+    ut.main()
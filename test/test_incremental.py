@@ -0,0 +1,61 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+import random
+import unittest as ut
+
+
+class IncrementalTest(ut.TestCase):
+    def check(self, matcher):
+        expected = list(matcher.regex._spans(matcher.text))
+        self.assertEqual(matcher.spans, expected)
+
+    def test_edits(self):
+        matcher = MiniRegex("ab+").incremental("ab x abbb x ab", interval=2)
+        self.assertEqual(matcher.spans, [(0, 2), (5, 9), (12, 14)])
+        matcher.edit(1, 2, "")  # "a x abbb x ab"
+        self.assertEqual(matcher.spans, [(4, 8), (11, 13)])
+        matcher.edit(0, 0, "abb")  # "abba x abbb x ab"
+        self.assertEqual(matcher.spans, [(0, 3), (7, 11), (14, 16)])
+        self.assertEqual([match.get_value()
+                          for match in matcher.find_all_matches()],
+                         ["abb", "abbb", "ab"])
+
+    def test_edit_extends_a_match(self):
+        matcher = MiniRegex("ab+").incremental("xba", interval=1)
+        matcher.edit(0, 1, "a")
+        matcher.edit(2, 3, "b ")
+        self.assertEqual(matcher.text, "abb ")
+        self.assertEqual(matcher.spans, [(0, 3)])
+
+    def test_rescans_only_around_edits(self):
+        text = "error: disk full\nok\n" * 500
+        matcher = MiniRegex("err[a-z]+").incremental(text)
+        matcher.edit(5000, 5001, "error")
+        self.check(matcher)
+        self.assertLess(matcher.rescanned, 200)
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        patterns = ["ab+", "a[^c]*c", "\\bab", "^a", "b$", "(ab|a)c?"]
+        for pattern in patterns:
+            for greedy in (True, False):
+                regex = MiniRegex(pattern, greedy, multiline=True)
+                text = ''.join(rng.choice("abc x\n") for _ in range(60))
+                matcher = regex.incremental(text, rng.choice([1, 4, 16]))
+                for _ in range(20):
+                    start = rng.randint(0, len(matcher.text))
+                    end = rng.randint(start, min(len(matcher.text),
+                                                 start + 4))
+                    new = ''.join(rng.choice("abc x\n")
+                                  for _ in range(rng.randint(0, 4)))
+                    matcher.edit(start, end, new)
+                    self.check(matcher)
+
+    def test_bytes(self):
+        matcher = BytesRegex("é+").incremental("aéé b".encode('utf-8'))
+        matcher.edit(0, 1, "é".encode('utf-8'))
+        self.assertEqual(matcher.spans, [(0, 6)])
+
+
+if __name__ == '__main__':
+    ut.main()
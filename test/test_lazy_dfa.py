@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+from mini_regex.dfa_sim import NFAEngine
+from mini_regex.lazy_dfa import LazyDFAEngine
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+from mini_regex.regex import MiniRegex
+import random
+import sys
+import unittest as ut
+
+
+PATTERNS = ["abc|bcde", ".el+o", "(ab)*c", "a?b+", "x(a|bc)*y", "(a*)*b",
+            "[^ab]c?"]
+SEARCH_STRS = ["abcde", "Hello Yelllo", "ababcc abc", "abbb b",
+               "xy xabcay xbcbc", "aaab", "cc dc ac"]
+
+
+def build_nfa(pattern):
+    return RegexParser(Tokenizer(pattern)).construct_nfa()
+
+
+class LazyDFAEngineTest(ut.TestCase):
+    def test_agrees_with_nfa_simulation(self):
+        for greedy in (True, False):
+            for pattern in PATTERNS:
+                nfa = build_nfa(pattern)
+                lazy = LazyDFAEngine(nfa, greedy)
+                nfa_engine = NFAEngine(nfa, greedy)
+                for text in SEARCH_STRS:
+                    for i in range(len(text)):
+                        self.assertEqual(lazy.match(text, i),
+                                         nfa_engine.match(text, i),
+                                         (pattern, text, i, greedy))
+
+    def test_states_are_cached_across_calls(self):
+        engine = LazyDFAEngine(build_nfa("(ab)*c"))
+        engine.match("ababc")
+        size = len(engine)
+        engine.match("ababababc")
+        self.assertEqual(len(engine), size)
+
+    def test_cache_is_bounded(self):
+        nfa = build_nfa("(a|b)*a(a|b)(a|b)(a|b)")
+        engine = LazyDFAEngine(nfa, max_states=4)
+        self.assertEqual(engine.match("abbbabaabbba"),
+                         NFAEngine(nfa).match("abbbabaabbba"))
+        self.assertLessEqual(len(engine), 4)
+
+
+class ConcurrentUseTest(ut.TestCase):
+    def test_shared_patterns_under_threads(self):
+        rng = random.Random(7)
+        words = ["w" + str(i) for i in range(300)]
+        patterns = ["|".join(words) + "|x(a|bc)*y", "[a-c]+d", "x(a|bc)*y"]
+        texts = ["".join(rng.choice("abcdxyw0123 ") for _ in range(200))
+                 for _ in range(40)]
+
+        def spans(regex, text):
+            return [m.get_span() for m in regex.find_all_matches(text)]
+
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for pattern in patterns:
+                expected = [spans(MiniRegex(pattern), text) for text in texts]
+                shared = MiniRegex(pattern)
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    results = list(pool.map(
+                        lambda text: spans(shared, text), texts * 5))
+                self.assertListEqual(results, expected * 5)
+        finally:
+            sys.setswitchinterval(old_interval)
+
+
+if __name__ == '__main__':
+    ut.main()
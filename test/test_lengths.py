@@ -0,0 +1,55 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.lengths import min_match_length, max_match_length
+import unittest as ut
+
+
+def lengths(pattern, cls=MiniRegex, **kwargs):
+    regex = cls(pattern, **kwargs)
+    return regex.min_length(), regex.max_length()
+
+
+def spans(regex, text):
+    return [match.get_span() for match in regex.find_all_matches(text)]
+
+
+class LengthsTest(ut.TestCase):
+    def test_bounds(self):
+        self.assertEqual(lengths("abc"), (3, 3))
+        self.assertEqual(lengths("a(b|cd)?e"), (2, 4))
+        self.assertEqual(lengths("(ab)?"), (0, 2))
+        self.assertEqual(lengths("ab*"), (1, None))
+        self.assertEqual(lengths("(a|bc)+"), (1, None))
+        self.assertEqual(lengths("^a\\b$"), (1, 1))
+        self.assertEqual(lengths("ab", backend='glushkov'), (2, 2))
+
+    def test_bytes(self):
+        # lengths are counted in the units the nfa eats
+        self.assertEqual(lengths("é+"), (1, None))
+        self.assertEqual(lengths("é+", BytesRegex), (2, None))
+        self.assertEqual(lengths("[aé]", BytesRegex), (1, 2))
+
+    def test_nfa(self):
+        nfa = MiniRegex("x(yz)?")._nfa
+        self.assertEqual(min_match_length(nfa), 1)
+        self.assertEqual(max_match_length(nfa), 3)
+
+    def test_explain(self):
+        report = MiniRegex("a[bc]d?").explain()
+        self.assertIn("min match length: 2", report)
+        self.assertIn("max match length: 3", report)
+
+    def test_pruned_search(self):
+        regex = MiniRegex("[a-z][a-z] ERROR [0-9]")
+        text = "xx" * 100 + "ab ERROR 7 cd ERROR x"
+        self.assertEqual(spans(regex, text), [(200, 209)])
+        self.assertEqual(regex.count(text), 1)
+        # no room left for a match
+        self.assertEqual(spans(MiniRegex("abc"), "xab"), [])
+        self.assertEqual(spans(MiniRegex("a(b|cd)e"), "acdeab"), [(0, 3)])
+        self.assertEqual(MiniRegex("[ab]c").count("acbcb"), 2)
+
+    def test_lines(self):
+        regex = MiniRegex("^x[0-9]", multiline=True)
+        self.assertEqual([lineno for lineno, _, _ in
+                          regex.matching_lines("x1\nx\nyx2\nx3")], [1, 4])
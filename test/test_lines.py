@@ -0,0 +1,72 @@
+from mini_regex.lines import LineIndex
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.regex_ast import required_literal
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+import unittest as ut
+
+
+def lines_of(regex, text):
+    return [(lineno, text[start:end])
+            for lineno, start, end in regex.matching_lines(text)]
+
+
+class LineIndexTest(ut.TestCase):
+    def test_spans(self):
+        index = LineIndex("ab\n\ncd")
+        self.assertEqual(index.line_count, 3)
+        self.assertEqual([index.span(i) for i in range(3)],
+                         [(0, 2), (3, 3), (4, 6)])
+        self.assertEqual([index.line_of(i) for i in range(6)],
+                         [0, 0, 0, 1, 2, 2])
+
+    def test_trailing_newline(self):
+        self.assertEqual(LineIndex("ab\n").line_count, 1)
+        self.assertEqual(LineIndex("").line_count, 0)
+        self.assertEqual(LineIndex(b"a\nb", b'\n').line_count, 2)
+
+
+class RequiredLiteralTest(ut.TestCase):
+    def literal(self, pattern):
+        ast = RegexParser(Tokenizer(pattern)).construct_ast()
+        return required_literal(ast)
+
+    def test_required_literal(self):
+        self.assertEqual(self.literal("abc"), "abc")
+        self.assertEqual(self.literal("a*(error)+[0-9]x"), "error")
+        self.assertEqual(self.literal("ab|cd"), None)
+        self.assertEqual(self.literal("(ab)?c"), "c")
+
+
+class MatchingLinesTest(ut.TestCase):
+    text = "error: a\nok\nwarning: b\nerror: c\n"
+
+    def test_lines(self):
+        regex = MiniRegex("err.r|warn")
+        self.assertEqual(lines_of(regex, self.text),
+                         [(1, "error: a"), (3, "warning: b"),
+                          (4, "error: c")])
+        self.assertEqual(lines_of(MiniRegex("zzz"), self.text), [])
+
+    def test_matches_do_not_cross_lines(self):
+        self.assertEqual(lines_of(MiniRegex("a[^x]+o"), "a\nok"), [])
+        self.assertEqual(lines_of(MiniRegex("a\nb"), "a\nb"), [])
+
+    def test_anchors(self):
+        regex = MiniRegex("^[a-z]+$", multiline=True)
+        self.assertEqual(lines_of(regex, "ab\nc d\nef"), [(1, "ab"),
+                                                         (3, "ef")])
+        self.assertEqual(lines_of(MiniRegex("^e"), self.text),
+                         [(1, "error: a")])
+        self.assertEqual(lines_of(MiniRegex("c$"), "c\nc"), [(2, "c")])
+
+    def test_bytes(self):
+        regex = BytesRegex("é+")
+        self.assertEqual(lines_of(regex, "a\nbé\né".encode('utf-8')),
+                         [(2, "bé".encode('utf-8')),
+                          (3, "é".encode('utf-8'))])
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,73 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.budget import BudgetExceeded
+from mini_regex.shared import SharedRegex
+import unittest as ut
+
+TEXT = "user=bob failed, user=alice ok\nthe cats are singing\n"
+PATTERNS = ["[a-z]+", "(cat|dog)s?", "\\b[a-z]+\\b", "a*b?c", "ok$",
+            "^the", "[a-z]+ [a-z]", "(ab|a)c?", "[^ ]+!?"]
+
+
+def spans(regex, text):
+    return [match.get_span()
+            for match in regex.find_all_matches(text, overlapped=True)]
+
+
+def expected(regex, text):
+    """ The match from every start, one attempt at a time """
+    found = []
+    for start in range(len(text)):
+        end = regex._engine.match(text, start)
+        if end is not None:
+            found.append((start, end - 1))
+    return found
+
+
+class OverlapTest(ut.TestCase):
+    def check(self, cls, text, **kwargs):
+        for pattern in PATTERNS:
+            for engine in ('lazy_dfa', 'nfa'):
+                regex = cls(pattern, engine=engine, **kwargs)
+                self.assertEqual(spans(regex, text), expected(regex, text),
+                                 pattern)
+
+    def test_every_start(self):
+        self.check(MiniRegex, TEXT)
+        self.check(MiniRegex, TEXT, greedy=False)
+        self.check(MiniRegex, TEXT, multiline=True)
+        self.check(BytesRegex, TEXT.encode('utf-8'))
+        self.check(BytesRegex, TEXT.encode('utf-8'), greedy=False)
+
+    def test_spans(self):
+        self.assertEqual(spans(MiniRegex("aba"), "ababa"), [(0, 2), (2, 4)])
+        self.assertEqual(spans(MiniRegex("a+"), "aab"), [(0, 1), (1, 1)])
+        self.assertEqual(spans(MiniRegex("a+", greedy=False), "aab"),
+                         [(0, 0), (1, 1)])
+
+    def test_long_matches(self):
+        # every start runs to the end, yet the text is read once
+        text = "ab " * 2000
+        regex = MiniRegex("[a-z ]+!?")
+        found = spans(regex, text)
+        self.assertEqual(len(found), len(text))
+        self.assertEqual(found[-1], (len(text) - 1, len(text) - 1))
+
+    def test_budget(self):
+        regex = MiniRegex("[a-z]+")
+        with self.assertRaises(BudgetExceeded) as context:
+            regex.find_all_matches("ab cd ef", max_steps=4, overlapped=True)
+        found = [match.get_span() for match in context.exception.partial]
+        self.assertEqual(found, [(0, 1), (1, 1)])
+        found = regex.find_all_matches("ab cd ef", max_steps=4,
+                                       partial=True, overlapped=True)
+        self.assertEqual([match.get_span() for match in found],
+                         [(0, 1), (1, 1)])
+
+    def test_shared(self):
+        with self.assertRaises(Exception):
+            SharedRegex("ab").find_all_matches(b"ab", overlapped=True)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -56,6 +56,23 @@ class ParserTest(ut.TestCase):
         actual = nfa_to_table(result_nfa.start)
         self.assertEqual(expected, actual)
 
+    def test_trie_shares_prefixes(self):
+        expected = {0: [("char: c", 2)],
+                    1: [],
+                    2: [("char: a", 3), ("char: o", 5)],
+                    3: [("char: t", 4)],
+                    4: [("epsilon", 1)],
+                    5: [("char: w", 6)],
+                    6: [("epsilon", 1)]}
+        result_nfa = TC.construct_trie(['cat', 'cow'], CounterStub(0))
+        self.assertEqual(expected, nfa_to_table(result_nfa.start))
+
+    def test_parses_huge_alternations(self):
+        words = ["w" + str(i) + "x" for i in range(5000)]
+        re_parser = parser.RegexParser(Tokenizer("|".join(words)))
+        nfa = re_parser.construct_nfa()
+        self.assertEqual(len(nfa.start.paths), 1)
+
     def test_parenthesis_builds_inner_nfa_first(self):
         # Note the difference between "(ab)*" and ab*
         re_parser1 = parser.RegexParser(Tokenizer("(ab)*"))
@@ -0,0 +1,61 @@
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+from mini_regex.pike import PikeVM
+from mini_regex.regex import MiniRegex
+import unittest as ut
+
+
+def build_vm(pattern, greedy=True):
+    parser = RegexParser(Tokenizer(pattern))
+    ast = parser.parse()
+    return PikeVM(ast, len(parser.groups), greedy)
+
+
+class PikeVMTest(ut.TestCase):
+    def test_groups_are_numbered_by_open_paren(self):
+        vm = build_vm("((a)(b))c")
+        self.assertListEqual(vm.captures("xabc", 1, 4),
+                             [1, 4, 1, 3, 1, 2, 2, 3])
+
+    def test_prefers_left_branch_and_more_iterations(self):
+        self.assertListEqual(build_vm("(a|ab)(c|bcd)").captures("abcd", 0, 4),
+                             [0, 4, 0, 1, 1, 4])
+        self.assertListEqual(build_vm("(a*)(a*)").captures("aaa", 0, 3),
+                             [0, 3, 0, 3, 3, 3])
+        self.assertListEqual(
+            build_vm("(a*)(a*)", greedy=False).captures("aaa", 0, 3),
+            [0, 3, 0, 0, 0, 3])
+
+    def test_last_iteration_wins_and_missing_groups_are_none(self):
+        self.assertListEqual(build_vm("((a)|b)+").captures("ab", 0, 2),
+                             [0, 2, 1, 2, 0, 1])
+        self.assertListEqual(build_vm("a(b)?").captures("a", 0, 1),
+                             [0, 1, None, None])
+
+    def test_span_must_match_exactly(self):
+        self.assertIsNone(build_vm("(ab)").captures("abc", 0, 3))
+
+
+class MatchGroupsTest(ut.TestCase):
+    def test_match_groups(self):
+        regex = MiniRegex("([a-z]+)@([a-z]+)\\.com")
+        match = regex.find_all_matches("mail jo@ex.com now")[0]
+        self.assertEqual(match.group(), "jo@ex.com")
+        self.assertEqual(match.group(1), "jo")
+        self.assertTupleEqual(match.groups(), ("jo", "ex"))
+        self.assertTupleEqual(match.span(2), (8, 9))
+        self.assertTupleEqual(match.span(), match.get_span())
+
+    def test_groups_are_only_computed_when_asked_for(self):
+        regex = MiniRegex("(a)(b)?")
+        matches = regex.find_all_matches("a ab")
+        self.assertIsNone(regex._pike)
+        self.assertTupleEqual(matches[1].groups(), ("a", "b"))
+        self.assertTupleEqual(matches[0].groups(), ("a", None))
+        self.assertIsNone(matches[0].span(2))
+        with self.assertRaises(Exception):
+            matches[0].group(3)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,73 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.planner import ENGINES, estimate_dfa_states, PROBE_LIMIT
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+import unittest as ut
+
+
+def parse(pattern, ignore_case=False):
+    return RegexParser(Tokenizer(pattern),
+                       ignore_case=ignore_case).construct_ast()
+
+
+class PlannerTest(ut.TestCase):
+    def test_chosen_engines(self):
+        self.assertEqual(MiniRegex("ERROR")._plan.engine, 'literal')
+        self.assertEqual(MiniRegex("(ab)")._plan.engine, 'literal')
+        self.assertEqual(MiniRegex("ab+c")._plan.engine, 'bitparallel')
+        self.assertEqual(MiniRegex("^ab")._plan.engine, 'lazy_dfa')
+        self.assertEqual(MiniRegex("a" * 300 + "+")._plan.engine,
+                         'lazy_dfa')
+        self.assertEqual(BytesRegex("ab+c")._plan.engine, 'lazy_dfa')
+        self.assertEqual(BytesRegex("abc")._plan.engine, 'literal')
+
+    def test_dfa_estimate(self):
+        self.assertEqual(estimate_dfa_states(parse("abc")), 4)
+        blowup = "(a|b)*a" + "(a|b)" * 12
+        self.assertEqual(estimate_dfa_states(parse(blowup)), PROBE_LIMIT)
+
+    def test_dfa_estimate_ignore_case(self):
+        # the sample chars hold 'ß' and 'İ', whose case variants are two
+        # chars long: the case folded classes must still take them
+        for pattern in ["straße", "[a-zß]+İ", "(ß|x)y"]:
+            ast = parse(pattern, ignore_case=True)
+            self.assertGreater(estimate_dfa_states(ast), 1, pattern)
+        self.assertIn("engine:", MiniRegex("straße", ignore_case=True)
+                      .explain())
+
+    def test_explain(self):
+        report = MiniRegex("user=[a-z]+").explain()
+        self.assertIn("engine: bitparallel", report)
+        self.assertIn("required literal: 'user='", report)
+        self.assertIn("max match length: None", report)
+        self.assertIn("because it was forced",
+                      MiniRegex("ab", engine='nfa').explain())
+
+    def test_forced_engines_agree(self):
+        text = "xx ERROR abERRORbb ERRORERROR"
+
+        def spans(regex):
+            return [match.span() for match in regex.find_all_matches(text)]
+        for pattern in ("ERROR", "E[RO]+", "b+E"):
+            expected = spans(MiniRegex(pattern))
+            for engine in ENGINES:
+                if engine == 'literal' and pattern != "ERROR":
+                    continue
+                regex = MiniRegex(pattern, engine=engine)
+                self.assertEqual(spans(regex), expected)
+                self.assertEqual(regex.count(text), len(expected))
+
+    def test_bad_override(self):
+        with self.assertRaises(Exception):
+            MiniRegex("a+", engine='literal')
+        with self.assertRaises(Exception):
+            MiniRegex("^a", engine='bitparallel')
+        with self.assertRaises(Exception):
+            BytesRegex("a", engine='bitparallel')
+        with self.assertRaises(Exception):
+            MiniRegex("a", engine='backtracking')
+
+
+if __name__ == '__main__':
+    ut.main()
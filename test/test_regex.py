@@ -61,3 +61,53 @@ class RegexEngineTest(ut.TestCase):
         matches = regex.find_all_matches(search_str)
         result = [match.get_span() for match in matches]
         self.assertListEqual(result, [(0, 2), (6, 8)])
+
+    def test_optional(self):
+        regex = RE.MiniRegex("colou?r")
+        matches = regex.find_all_matches("color colour")
+        result = [match.get_span() for match in matches]
+        self.assertListEqual(result, [(0, 4), (6, 11)])
+
+    def test_literal_set_composes_with_regex_syntax(self):
+        regex = RE.MiniRegex("<(cat|dog|cow)s?>")
+        matches = regex.find_all_matches("<cats> <dog> <cowss> <co>")
+        result = [match.get_value() for match in matches]
+        self.assertListEqual(result, ["<cats>", "<dog>"])
+
+    def test_factored_alternation(self):
+        regex = RE.MiniRegex("foo|foobar|fox")
+        matches = regex.find_all_matches("foobar fox fo")
+        result = [match.get_value() for match in matches]
+        self.assertListEqual(result, ["foobar", "fox"])
+
+    def test_count(self):
+        text = "ab abab\nab b"
+        for pattern in ["ab", "b+", "^ab", "b$", "a|b", "x"]:
+            for multiline in (False, True):
+                regex = RE.MiniRegex(pattern, multiline=multiline)
+                self.assertEqual(regex.count(text),
+                                 len(regex.find_all_matches(text)), pattern)
+        self.assertEqual(RE.MiniRegex("ab").count(text), 4)
+
+    def test_ignore_case(self):
+        regex = RE.MiniRegex("hel+o [a-c]+|x-1", ignore_case=True)
+        text = "HeLLo aBc hello d X-1"
+        matches = regex.find_all_matches(text)
+        result = [match.get_value() for match in matches]
+        self.assertListEqual(result, ["HeLLo aBc", "X-1"])
+        # the text isn't copied, spans index into the original
+        self.assertTupleEqual(matches[1].get_span(), (18, 20))
+        self.assertListEqual(RE.MiniRegex("HELLO").find_all_matches(text),
+                             [])
+
+    def test_ignore_case_multi_char_folds(self):
+        # the case variants of 'İ' and 'ß' are two chars long, every class
+        # and literal is a range table that only takes single chars
+        for engine in ('bitparallel', 'lazy_dfa', 'nfa', None):
+            regex = RE.MiniRegex("b", ignore_case=True, engine=engine)
+            self.assertListEqual([m.get_span() for m in
+                                  regex.find_all_matches("İb ß B")],
+                                 [(1, 1), (5, 5)])
+            regex = RE.MiniRegex("straße|[^a-z ]", ignore_case=True,
+                                 engine=engine)
+            self.assertEqual(regex.count("STRAßE İst straße"), 3)
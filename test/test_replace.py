@@ -0,0 +1,53 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.replace import parse_template
+import io
+import unittest as ut
+
+
+class TemplateTest(ut.TestCase):
+    def test_parse_template(self):
+        self.assertListEqual(parse_template("a\\1b\\g<12>\\\\c\\n"),
+                             ['a', 1, 'b', 12, '\\c\\n'])
+        with self.assertRaises(Exception):
+            parse_template("\\g<x>")
+
+
+class SubTest(ut.TestCase):
+    def test_sub(self):
+        regex = MiniRegex("([a-z]+)@([a-z]+)")
+        text = "to: jo@ex, al@ya."
+        self.assertEqual(regex.sub("\\2/\\g<1>", text), "to: ex/jo, ya/al.")
+        self.assertEqual(regex.sub("X", text, count=1), "to: X, al@ya.")
+        self.assertTupleEqual(regex.subn("", text), ("to: , .", 2))
+        self.assertEqual(MiniRegex("z").sub("X", text), text)
+
+    def test_callable_replacement(self):
+        regex = MiniRegex("[0-9]+")
+        self.assertEqual(
+            regex.sub(lambda match: str(int(match.get_value()) * 2), "a1b22"),
+            "a2b44")
+
+    def test_sink(self):
+        sink = io.StringIO()
+        result = MiniRegex("b+").subn("-", "abbcbd", sink=sink)
+        self.assertTupleEqual(result, (None, 2))
+        self.assertEqual(sink.getvalue(), "a-c-d")
+
+
+class SplitTest(ut.TestCase):
+    def test_split(self):
+        regex = MiniRegex(", *")
+        self.assertListEqual(regex.split("a, b,,c"), ["a", "b", "", "c"])
+        self.assertListEqual(regex.split("a, b,,c", maxsplit=1),
+                             ["a", "b,,c"])
+        self.assertListEqual(regex.split(",a,"), ["", "a", ""])
+        self.assertListEqual(regex.split(""), [""])
+
+    def test_split_to_sink(self):
+        pieces = []
+        self.assertIsNone(MiniRegex(";").split("x;y", sink=pieces.append))
+        self.assertListEqual(pieces, ["x", "y"])
+
+
+if __name__ == '__main__':
+    ut.main()
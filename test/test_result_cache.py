@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
+
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.budget import BudgetExceeded
+from mini_regex.result_cache import ResultCache, cache_key, HASH_ABOVE
+import unittest as ut
+
+
+def spans(regex, text):
+    return [match.get_span() for match in regex.find_all_matches(text)]
+
+
+class ResultCacheTest(ut.TestCase):
+    def test_hits(self):
+        regex = MiniRegex("[a-z]+=[0-9]+", cache_bytes=1 << 16)
+        text = "a=1 bb=22 c"
+        self.assertEqual(spans(regex, text), [(0, 2), (4, 8)])
+        # a hit runs no engine at all
+        regex._engine = None
+        self.assertEqual(spans(regex, text), [(0, 2), (4, 8)])
+        self.assertEqual(regex.count(text), 2)
+        self.assertEqual(regex.sub("x", text), "x x c")
+        info = regex.cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['entries']),
+                         (3, 1, 1))
+        # first_match only finds one match, it doesn't use the cache
+        regex._engine = MiniRegex("[a-z]+=[0-9]+")._engine
+        self.assertEqual(regex.first_match(text).get_span(), (0, 2))
+        self.assertEqual(regex.cache_info()['misses'], 1)
+
+    def test_large_texts(self):
+        regex = BytesRegex("ab+", cache_bytes=1 << 16)
+        text = b"x" * HASH_ABOVE + b"abb"
+        self.assertNotEqual(cache_key(text), text)
+        self.assertEqual(spans(regex, text),
+                         [(HASH_ABOVE, HASH_ABOVE + 2)])
+        self.assertEqual(spans(regex, bytes(text)),
+                         [(HASH_ABOVE, HASH_ABOVE + 2)])
+        self.assertEqual(regex.cache_info()['hits'], 1)
+        # same length and content, but a str
+        self.assertNotEqual(cache_key(text.decode()), cache_key(text))
+        # mutable texts aren't cached
+        spans(regex, bytearray(text))
+        self.assertEqual(regex.cache_info()['entries'], 1)
+
+    def test_eviction(self):
+        cache = ResultCache(2000)
+        for i in range(100):
+            cache.put(str(i), [(0, 1)])
+            cache.get("0")  # keeps "0" the most recently used
+        self.assertLessEqual(cache.size, 2000)
+        self.assertGreater(cache.evictions, 0)
+        self.assertEqual(cache.get("0"), ((0, 1),))
+        self.assertIsNone(cache.get("1"))
+        # an entry over the whole budget is never stored
+        cache.put("big", [(0, 1)] * 1000)
+        self.assertIsNone(cache.get("big"))
+
+    def test_incomplete_searches(self):
+        regex = MiniRegex("[ab][cd]", cache_bytes=1 << 16)
+        text = "ac" * 50
+        with self.assertRaises(BudgetExceeded):
+            regex.find_all_matches(text, max_steps=5)
+        self.assertEqual(regex.cache_info()['entries'], 0)
+        # a search stopped by its caller isn't stored either
+        self.assertEqual(regex.sub("x", text, count=1), "x" + "ac" * 49)
+        self.assertEqual(regex.cache_info()['entries'], 0)
+        self.assertEqual(len(regex.find_all_matches(text, max_steps=500)),
+                         50)
+        # once stored, the budget isn't charged at all
+        self.assertEqual(regex.count(text, max_steps=1), 50)
+
+    def test_shared_under_threads(self):
+        # a small cache, so that threads keep evicting each other's texts
+        cache = ResultCache(1000)
+
+        def hammer(i):
+            for j in range(300):
+                key = "k" + str((i * 7 + j) % 50)
+                if cache.get(key) is None:
+                    cache.put(key, [(0, 1)])
+
+        regex = MiniRegex("(ab)+", cache_bytes=4000)
+        texts = ["abab" * (i % 7) + "x" + str(i) for i in range(200)]
+        expected = [spans(MiniRegex("(ab)+"), text) for text in texts]
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                list(pool.map(hammer, range(64)))
+                results = list(pool.map(lambda text: spans(regex, text),
+                                        texts * 10))
+        finally:
+            sys.setswitchinterval(old_interval)
+        self.assertEqual(cache.hits + cache.misses, 64 * 300)
+        # the size is still the sum of the entries held
+        self.assertEqual(cache.size,
+                         sum(size for _, size in cache._entries.values()))
+        self.assertLessEqual(cache.size, 1000)
+        self.assertListEqual(results, expected * 10)
+        info = regex.cache_info()
+        self.assertEqual(info['hits'] + info['misses'], len(texts) * 10)
+
+    def test_off(self):
+        regex = MiniRegex("a")
+        self.assertIsNone(regex.cache_info())
+        self.assertEqual(spans(regex, "aa"), [(0, 0), (1, 1)])
+        with self.assertRaises(Exception):
+            MiniRegex("a", cache_bytes=0)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,71 @@
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+from mini_regex.regex_ast import (
+    Literal, String, LiteralSet, CharClass, Concat, Alternate, Repeat, Group
+)
+import mini_regex.rewrites as rewrites
+import unittest as ut
+
+
+def parse(pattern):
+    return RegexParser(Tokenizer(pattern)).parse()
+
+
+class RewritesTest(ut.TestCase):
+    def test_parser_builds_flat_ast(self):
+        expected = Alternate([
+            Concat([Literal('a'), Repeat(Literal('b'), '*')]),
+            Group(Literal('c'), 1),
+            CharClass([('1', '3'), 'x'], True)])
+        self.assertEqual(parse("ab*|(c)|[^1-3x]"), expected)
+
+    def test_merges_adjacent_literals(self):
+        result = rewrites.merge_literals(parse("abc*de"))
+        expected = Concat([String('ab'), Repeat(Literal('c'), '*'),
+                           String('de')])
+        self.assertEqual(result, expected)
+
+    def test_collapses_nested_repeats(self):
+        self.assertEqual(rewrites.collapse_repeats(parse("(a*)*")),
+                         Group(Repeat(Literal('a'), '*'), 1))
+        self.assertEqual(rewrites.collapse_repeats(parse("(a+)+")),
+                         Group(Repeat(Literal('a'), '+'), 1))
+        self.assertEqual(rewrites.collapse_repeats(parse("(a+)?")),
+                         Group(Repeat(Literal('a'), '*'), 1))
+
+    def test_factors_common_prefixes(self):
+        result = rewrites.optimize(parse("abcx*|abdy|z"))
+        expected = Alternate([
+            Concat([String('ab'),
+                    Alternate([Concat([Literal('c'),
+                                       Repeat(Literal('x'), '*')]),
+                               String('dy')])]),
+            Literal('z')])
+        self.assertEqual(result, expected)
+
+    def test_prefix_of_another_branch_becomes_optional(self):
+        result = rewrites.optimize(parse("ab|a"))
+        expected = Concat([Literal('a'), Repeat(Literal('b'), '?')])
+        self.assertEqual(result, expected)
+
+    def test_folds_single_chars_into_class(self):
+        result = rewrites.optimize(parse("a|[0-9]|bc|d"))
+        expected = Alternate([CharClass(['a', ('0', '9'), 'd']),
+                              String('bc')])
+        self.assertEqual(result, expected)
+
+    def test_collects_literal_words_into_set(self):
+        result = rewrites.optimize(parse("cat|x|dog|a*|cat|cow"))
+        expected = Alternate([LiteralSet(['cat', 'dog', 'cow']),
+                              Literal('x'), Repeat(Literal('a'), '*')])
+        self.assertEqual(result, expected)
+
+    def test_does_not_factor_across_groups(self):
+        result = rewrites.optimize(parse("(ab)c|abd"))
+        expected = Alternate([Concat([Group(String('ab'), 1), Literal('c')]),
+                              String('abd')])
+        self.assertEqual(result, expected)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,51 @@
+from mini_regex.regex import MiniRegex
+from mini_regex.scanner import ThreadScanner
+import unittest as ut
+
+
+PATTERNS = ["abc|bcde", ".el+o", "[1-9]+", "(ab)*c", "a?b+", "x(a|bc)*y",
+            "(a|ab)(c|bcd)", "b*ab*a", "a*"]
+SEARCH_STRS = ["", "abcde", "Hello Yelllo", "123abc456", "ababcc abc",
+               "abbb b", "xy xabcay xbcbc", "abcd acd abbbbaa", "aaab"]
+
+
+def scan(scanner, text, chunk_size):
+    matches = []
+    for i in range(0, len(text), chunk_size):
+        matches += scanner.feed(text[i:i + chunk_size])
+    matches += scanner.finish()
+    return [(match.get_span(), match.get_value()) for match in matches]
+
+
+class ThreadScannerTest(ut.TestCase):
+    def test_agrees_with_find_all_matches_for_any_chunking(self):
+        for greedy in (True, False):
+            for pattern in PATTERNS:
+                regex = MiniRegex(pattern, greedy)
+                for text in SEARCH_STRS:
+                    expected = [(match.get_span(), match.get_value())
+                                for match in regex.find_all_matches(text)]
+                    for chunk_size in (1, 2, 5, 100):
+                        scanner = ThreadScanner(regex._nfa, greedy)
+                        self.assertListEqual(
+                            scan(scanner, text, chunk_size), expected,
+                            (pattern, text, chunk_size, greedy))
+
+    def test_match_across_chunks(self):
+        scanner = ThreadScanner(MiniRegex("ab+c")._nfa)
+        self.assertListEqual(scanner.feed("xxa"), [])
+        self.assertListEqual(scanner.feed("bbb"), [])
+        matches = scanner.feed("cab")
+        self.assertEqual([m.get_span() for m in matches], [(2, 6)])
+        self.assertEqual(matches[0].get_value(), "abbbc")
+        self.assertListEqual(scanner.finish(), [])
+
+    def test_only_buffers_undecided_text(self):
+        scanner = ThreadScanner(MiniRegex("ab")._nfa)
+        for _ in range(100):
+            scanner.feed("xxxxxxxxab")
+        self.assertLess(len(scanner.buffer), 20)
+
+
+if __name__ == '__main__':
+    ut.main()
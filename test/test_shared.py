@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from mini_regex.regex import MiniRegex
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.shared import share, attach
+import unittest as ut
+
+TEXT = b"user=bob failed\nuser=alice ok\n\xc3\xa9t\xc3\xa9 42 fin\nab abb\n"
+
+
+def spans(regex, text):
+    return [match.span() for match in regex.find_all_matches(text)]
+
+
+def count_in_worker(name, text):
+    regex = attach(name)
+    try:
+        return len(regex.find_all_matches(text))
+    finally:
+        regex.close()
+
+
+class SharedTest(ut.TestCase):
+    def check(self, pattern, **kwargs):
+        regex = BytesRegex(pattern, **kwargs)
+        shared = share(regex)
+        try:
+            attached = attach(shared.name)
+            try:
+                self.assertEqual(spans(attached, TEXT), spans(regex, TEXT))
+                self.assertEqual(attached.count(TEXT), regex.count(TEXT))
+                self.assertEqual(list(attached.matching_lines(TEXT)),
+                                 list(regex.matching_lines(TEXT)))
+            finally:
+                attached.close()
+        finally:
+            shared.unlink()
+
+    def test_same_matches(self):
+        for pattern in ["user=[a-z]+", "ab*", "[0-9]+|fin", "é.", "\\w+",
+                        "\\bab\\b", "ok$", "^user", "fin$", "failed",
+                        "a(b|bb)?"]:
+            self.check(pattern)
+        self.check("^[a-z]+=", multiline=True)
+        self.check("[a-z]+$", multiline=True)
+        self.check("ab+", greedy=False)
+        self.check("USER=[A-Z]+", ignore_case=True)
+
+    def test_explain(self):
+        shared = share(BytesRegex("a[bc]+"))
+        regex = attach(shared.name)
+        self.assertIn("engine: shared_dfa", regex.explain())
+        regex.close()
+        shared.unlink()
+
+    def test_workers(self):
+        shared = share(BytesRegex("user=[a-z]+"))
+        try:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                counts = list(pool.map(count_in_worker, [shared.name] * 3,
+                                       [TEXT, TEXT * 2, b"none"]))
+            self.assertEqual(counts, [2, 4, 0])
+        finally:
+            shared.unlink()
+
+    def test_errors(self):
+        with self.assertRaises(Exception):
+            share(MiniRegex("ab"))
+        with self.assertRaises(Exception):
+            share(BytesRegex("(a|b)*a" + "(a|b)" * 12), max_states=100)
@@ -15,6 +15,48 @@ class TransitionTest(ut.TestCase):
         self.assertTrue(transition.is_available('b'))
         self.assertFalse(transition.is_available('\n'))
 
+    def test_case_insensitive_class(self):
+        builder = RegexClassBuilder(ignore_case=True)
+        builder.add_char('a')
+        builder.add_range(('X', 'Z'))
+        transition = builder.create_trans()
+        for char in "aAxYz":
+            self.assertTrue(transition.is_available(char))
+        self.assertFalse(transition.is_available('b'))
+
+        builder = RegexClassBuilder(negate=True, ignore_case=True)
+        builder.add_char('a')
+        transition = builder.create_trans()
+        self.assertFalse(transition.is_available('A'))
+        self.assertTrue(transition.is_available('-'))
+
+    def test_case_insensitive_multi_char_variants(self):
+        # 'ß'.upper() is 'SS' and 'İ'.lower() is 'i̇', neither is a char
+        builder = RegexClassBuilder(ignore_case=True)
+        builder.add_range(('a', 'z'))
+        transition = builder.create_trans()
+        for char in "ßİΐ":
+            self.assertFalse(transition.is_available(char))
+        self.assertTrue(transition.is_available('K'))
+        builder = RegexClassBuilder(negate=True, ignore_case=True)
+        builder.add_char('b')
+        transition = builder.create_trans()
+        self.assertTrue(transition.is_available('İ'))
+        self.assertFalse(transition.is_available('B'))
+
+    def test_unicode_ranges(self):
+        builder = RegexClassBuilder()
+        builder.add_range(('À', 'ÿ'))
+        builder.add_range(('α', 'ω'))
+        builder.add_char('€')
+        transition = builder.create_trans()
+        for char in "Àéÿβω€":
+            self.assertTrue(transition.is_available(char))
+        for char in "aZ×Ω😀":
+            self.assertEqual(transition.is_available(char), char == '×')
+        with self.assertRaises(Exception):
+            RegexClassBuilder().add_range(('z', 'a'))
+
     # def test_upper_lower_case_meta(self):
     #     transition = CaseInsensitiveTransition('a')
     #     self.assertTrue(transition.is_available('a'))
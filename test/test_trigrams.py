@@ -0,0 +1,62 @@
+from mini_regex.trigrams import (
+    trigram_query,
+    and_query,
+    or_query,
+    string_query,
+    Query,
+    ALL,
+    NONE,
+)
+from mini_regex.parser import RegexParser
+from mini_regex.tokenizer import Tokenizer
+import unittest as ut
+
+
+def query(pattern, ignore_case=False):
+    parser = RegexParser(Tokenizer(pattern), ignore_case=ignore_case)
+    return trigram_query(parser.construct_ast())
+
+
+def trigram(text):
+    return Query('trigram', text.encode('utf-8'))
+
+
+class TrigramQueryTest(ut.TestCase):
+    def test_simplification(self):
+        abc = trigram("abc")
+        self.assertEqual(and_query([abc, ALL, abc]), abc)
+        self.assertEqual(and_query([abc, NONE]), NONE)
+        self.assertEqual(or_query([abc, ALL]), ALL)
+        self.assertEqual(or_query([]), NONE)
+        self.assertEqual(string_query("ab"), ALL)
+
+    def test_literals(self):
+        self.assertEqual(query("error"), and_query(
+            [trigram("err"), trigram("rro"), trigram("ror")]))
+        self.assertEqual(query("abc|def"),
+                         or_query([trigram("abc"), trigram("def")]))
+        self.assertEqual(query("é"), ALL)
+        self.assertEqual(query("éa"), Query('trigram', "éa".encode('utf-8')))
+
+    def test_classes_and_repeats(self):
+        self.assertEqual(query("[ab]cd"), or_query(
+            [trigram("acd"), trigram("bcd")]))
+        self.assertEqual(query("a.*b"), ALL)
+        self.assertEqual(query("user=[a-z]+"), and_query(
+            [trigram("use"), trigram("ser"), trigram("er=")]))
+        self.assertEqual(query("(abc)+x"), and_query(
+            [trigram("abc"), trigram("bcx")]))
+        self.assertEqual(query("x(abc)?"), ALL)
+
+    def test_ignore_case(self):
+        self.assertEqual(repr(query("ab", ignore_case=True)), "ALL")
+        self.assertEqual(query("abc", ignore_case=True), or_query(
+            [trigram(a + b + c) for a in "aA" for b in "bB" for c in "cC"]))
+
+    def test_repr(self):
+        self.assertEqual(repr(query("ab(cd|ef)")),
+                         "('abc' AND 'bcd') OR ('abe' AND 'bef')")
+
+
+if __name__ == '__main__':
+    ut.main()
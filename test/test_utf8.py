@@ -0,0 +1,57 @@
+from mini_regex.utf8 import utf8_sequences, complement_ranges
+from mini_regex.bytes_regex import BytesRegex
+from mini_regex.regex import MiniRegex
+import unittest as ut
+
+
+def in_sequences(sequences, data):
+    return any(len(sequence) == len(data) and
+               all(first <= byte <= last
+                   for (first, last), byte in zip(sequence, data))
+               for sequence in sequences)
+
+
+class UTF8SequencesTest(ut.TestCase):
+    def test_whole_range(self):
+        self.assertListEqual(utf8_sequences(0, 0x7FF), [
+            [(0x00, 0x7F)], [(0xC2, 0xDF), (0x80, 0xBF)]])
+        self.assertEqual(len(utf8_sequences(0, 0x10FFFF)), 9)
+
+    def test_membership_matches_the_range(self):
+        for first, last in [(0xC0, 0xFF), (0x3B1, 0x3C9), (0x7F0, 0x1000),
+                            (0xD000, 0xE100), (0xFFF0, 0x10100)]:
+            sequences = utf8_sequences(first, last)
+            for code in range(first - 20, last + 20):
+                if 0xD800 <= code <= 0xDFFF:
+                    continue
+                self.assertEqual(
+                    in_sequences(sequences, chr(code).encode('utf-8')),
+                    first <= code <= last, hex(code))
+
+    def test_complement(self):
+        self.assertListEqual(complement_ranges([(0, 9), (20, 30)]),
+                             [(10, 19), (31, 0x10FFFF)])
+
+
+class BytesRegexTest(ut.TestCase):
+    def test_spans_are_byte_offsets(self):
+        text = "naïve café, Ωμέγα"
+        data = text.encode('utf-8')
+        for pattern in ["[À-ÿ]+", "[α-ω]+", "caf.", "[^a-z ,]+", "é|ï"]:
+            expected = [match.get_value().encode('utf-8')
+                        for match in MiniRegex(pattern).find_all_matches(text)]
+            matches = BytesRegex(pattern).find_all_matches(data)
+            self.assertListEqual([match.get_value() for match in matches],
+                                 expected, pattern)
+        match = BytesRegex("café").find_all_matches(data)[0]
+        self.assertTupleEqual(match.get_span(), (7, 11))
+
+    def test_flags_and_anchors(self):
+        data = "ÉTÉ\nété".encode('utf-8')
+        regex = BytesRegex("^été$", multiline=True, ignore_case=True)
+        self.assertEqual(len(regex.find_all_matches(data)), 2)
+        self.assertEqual(len(BytesRegex("é$").find_all_matches(data)), 1)
+
+
+if __name__ == '__main__':
+    ut.main()
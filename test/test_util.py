@@ -48,3 +48,26 @@ class StackTest(ut.TestCase):
         self.assertFalse(s.is_empty())
         s.pop()
         self.assertTrue(s.is_empty())
+
+
+class SparseSetTest(ut.TestCase):
+    def test_add_and_contains(self):
+        s = util.SparseSet(4)
+        self.assertTrue(s.add(3))
+        self.assertTrue(s.add(100))  # grows past its capacity
+        self.assertFalse(s.add(3))
+        self.assertIn(100, s)
+        self.assertNotIn(5, s)
+        self.assertNotIn(1000, s)
+        self.assertListEqual(list(s), [3, 100])
+
+    def test_clear_ignores_stale_entries(self):
+        s = util.SparseSet(8)
+        s.add(5)
+        s.add(2)
+        s.clear()
+        self.assertEqual(len(s), 0)
+        self.assertNotIn(5, s)
+        s.add(2)
+        self.assertNotIn(5, s)
+        self.assertIn(2, s)